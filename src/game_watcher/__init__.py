@@ -1,10 +1,3 @@
-from .windowing import (
-    WindowInfo,
-    find_window_by_title_regex,
-    get_client_rect_in_screen,
-    is_foreground,
-)
-
 __all__ = [
     "__version__",
     "WindowInfo",
@@ -13,4 +6,14 @@ __all__ = [
     "is_foreground",
 ]
 
-__version__ = "0.1.0"
\ No newline at end of file
+__version__ = "0.1.0"
+
+
+def __getattr__(name: str):
+    # Windowing pulls in pywin32; import it on first use so headless tools
+    # (replay capture, offline matching) work on machines without it.
+    if name in __all__ and name != "__version__":
+        from . import windowing
+
+        return getattr(windowing, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
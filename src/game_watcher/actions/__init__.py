@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from .backends import DirectInputBackend, DryRunBackend, InputBackend, RecordingBackend
+from .executor import ActionExecutor, ActionRunner, ExecutionReport, create_action_runner
+from .plan import ActionPlan, PlanStep, compile_plan
+
+__all__ = [
+    "ActionExecutor",
+    "ActionPlan",
+    "ActionRunner",
+    "DirectInputBackend",
+    "DryRunBackend",
+    "ExecutionReport",
+    "InputBackend",
+    "PlanStep",
+    "RecordingBackend",
+    "compile_plan",
+    "create_action_runner",
+]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Protocol
+
+
+class InputBackend(Protocol):
+    def click(self, x: int, y: int) -> None:
+        """Left click at screen coords."""
+        ...
+
+    def key(self, keys: tuple[str, ...]) -> None:
+        """Press one key, or a chord (held in order, released in reverse)."""
+        ...
+
+
+class RecordingBackend:
+    """Fake input: records (perf_counter, kind, args) for tests and timing checks."""
+
+    def __init__(self) -> None:
+        self.events: list[tuple[float, str, tuple]] = []
+
+    def click(self, x: int, y: int) -> None:
+        self.events.append((time.perf_counter(), "click", (x, y)))
+
+    def key(self, keys: tuple[str, ...]) -> None:
+        self.events.append((time.perf_counter(), "key", keys))
+
+
+class DryRunBackend:
+    """Logs what would be sent instead of sending it."""
+
+    def __init__(self, logger: logging.Logger, tag: str = "") -> None:
+        self.logger = logger
+        self.tag = tag
+
+    def click(self, x: int, y: int) -> None:
+        self.logger.warning(f"{self.tag}[DRY-RUN] click ({x},{y})")
+
+    def key(self, keys: tuple[str, ...]) -> None:
+        self.logger.warning(f"{self.tag}[DRY-RUN] key {'+'.join(keys)}")
+
+
+class DirectInputBackend:
+    """Scan-code input through pydirectinput (works with DirectX games)."""
+
+    def __init__(self) -> None:
+        import pydirectinput
+
+        # pydirectinput sleeps PAUSE seconds after every call; the executor owns timing.
+        pydirectinput.PAUSE = 0
+        self._di = pydirectinput
+
+    def click(self, x: int, y: int) -> None:
+        self._di.click(x=x, y=y)
+
+    def key(self, keys: tuple[str, ...]) -> None:
+        if len(keys) == 1:
+            self._di.press(keys[0])
+            return
+        for k in keys:
+            self._di.keyDown(k)
+        for k in reversed(keys):
+            self._di.keyUp(k)
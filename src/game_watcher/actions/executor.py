@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from ..metrics import METRICS
+from ..safety import RateLimiter, SafetySwitch, create_safety_switch
+from .backends import DirectInputBackend, DryRunBackend, InputBackend
+from .plan import ActionPlan, PlanStep, compile_plan
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StepTiming:
+    step: PlanStep
+    error_s: float   # fired - deadline; > 0 means late
+    call_s: float    # time spent inside the input backend
+    fired_at: float  # perf_counter when the backend call started
+
+
+@dataclass(frozen=True)
+class ExecutionReport:
+    timings: tuple[StepTiming, ...]
+    total_s: float
+    aborted: bool = False  # stopped early by the kill switch / pause
+
+    @property
+    def first_input_at(self) -> float | None:
+        """perf_counter when the first input call returned (the event was sent)."""
+        if not self.timings:
+            return None
+        return self.timings[0].fired_at + self.timings[0].call_s
+
+    @property
+    def max_error_s(self) -> float:
+        return max((abs(t.error_s) for t in self.timings), default=0.0)
+
+    @property
+    def mean_error_s(self) -> float:
+        if not self.timings:
+            return 0.0
+        return sum(abs(t.error_s) for t in self.timings) / len(self.timings)
+
+    def summary(self) -> str:
+        return (f"steps={len(self.timings)} total={self.total_s * 1000:.1f}ms "
+                f"timing_error mean/max={self.mean_error_s * 1000:.3f}/"
+                f"{self.max_error_s * 1000:.3f}ms" + (" ABORTED" if self.aborted else ""))
+
+
+@contextmanager
+def _fine_timer() -> Iterator[None]:
+    # Windows sleeps in ~15.6 ms ticks by default; ask for 1 ms while a plan runs.
+    winmm = None
+    if sys.platform == "win32":
+        import ctypes
+
+        winmm = ctypes.windll.winmm
+        winmm.timeBeginPeriod(1)
+    try:
+        yield
+    finally:
+        if winmm is not None:
+            winmm.timeEndPeriod(1)
+
+
+class ActionExecutor:
+    """Runs resolved ActionPlans against a perf_counter deadline schedule.
+
+    Each step fires at plan start + step.at_s. The wait sleeps until `spin_s`
+    before the deadline and busy-waits the rest, so OS sleep overshoot does not
+    show up as click/key jitter; a slow input call delays only its own step,
+    never the following deadlines. With a `safety` switch, a kill or pause
+    stops the plan before its next step.
+    """
+
+    def __init__(
+        self,
+        backend: InputBackend,
+        spin_s: float = 0.001,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+        safety: SafetySwitch | None = None,
+    ):
+        self.backend = backend
+        self.spin_s = max(0.0, float(spin_s))
+        self._clock = clock
+        self._sleep = sleep
+        self.safety = safety
+
+    def run(self, plan: ActionPlan) -> ExecutionReport:
+        if not plan.resolved:
+            raise ValueError("ActionPlan has relative clicks; call resolve() first")
+        timings: list[StepTiming] = []
+        with _fine_timer():
+            t0 = self._clock()
+            for step in plan.steps:
+                deadline = t0 + step.at_s
+                self._wait_until(deadline)
+                if self.safety is not None and not self.safety.allow_input:
+                    logger.warning("Action plan stopped after %d/%d steps (kill/pause).",
+                                   len(timings), len(plan.steps))
+                    return ExecutionReport(tuple(timings), self._clock() - t0, aborted=True)
+                fired = self._clock()
+                if step.kind == "click":
+                    self.backend.click(step.x, step.y)
+                else:
+                    self.backend.key(step.keys)
+                timings.append(StepTiming(step, fired - deadline, self._clock() - fired, fired))
+                METRICS.observe("action_step_error_seconds", fired - deadline, kind=step.kind)
+            # Trailing sleeps are part of the plan (e.g. wait for a menu to close).
+            self._wait_until(t0 + plan.duration_s)
+            total = self._clock() - t0
+        METRICS.observe("action_plan_seconds", total)
+        return ExecutionReport(tuple(timings), total)
+
+    def _wait_until(self, deadline: float) -> None:
+        remaining = deadline - self._clock()
+        if remaining > self.spin_s:
+            self._sleep(remaining - self.spin_s)
+        while self._clock() < deadline:
+            pass
+
+
+class ActionRunner:
+    """The compiled plan plus the executor that plays it at a match center.
+
+    `submit` hands a trigger to a dedicated action thread with a single slot:
+    while a plan is queued or running, further triggers are dropped, and the
+    gate thread never blocks on input timing. With a `limiter`
+    (safety.max_triggers_per_minute), triggers over the limit are dropped
+    before any input is sent, and so are triggers while the `safety` switch is
+    paused or killed. `stale(t)` tells the caller
+    whether a frame grabbed at perf_counter `t` predates the end of the last
+    plan (its screen no longer reflects the clicks).
+    """
+
+    def __init__(self, plan: ActionPlan, executor: ActionExecutor,
+                 limiter: RateLimiter | None = None, safety: SafetySwitch | None = None):
+        self.plan = plan
+        self.executor = executor
+        self.limiter = limiter
+        self.safety = safety
+        self.finished_at = 0.0  # perf_counter when the last submitted plan ended
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._job: tuple[tuple[tuple[int, int], ...], Callable | None] | None = None
+        self._running = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def run_at(self, x: int, y: int) -> ExecutionReport:
+        """Play the plan at (x, y) on the calling thread."""
+        return self.executor.run(self.plan.resolve(x, y))
+
+    def submit(self, points: Sequence[tuple[int, int]],
+               on_done: Callable[[list[ExecutionReport]], None] | None = None) -> bool:
+        """Queue one plan run per point; False (and logged) when the trigger is dropped."""
+        with self._cond:
+            if self._closed:
+                return False
+            if self.safety is not None and not self.safety.allow_input:
+                self.dropped += 1
+                reason = "killed" if self.safety.killed else "paused"
+                METRICS.inc("actions_dropped_total", reason=reason)
+                logger.info("Trigger dropped: input %s.", reason)
+                return False
+            if self._job is not None or self._running:
+                self.dropped += 1
+                METRICS.inc("actions_dropped_total", reason="busy")
+                logger.info("Trigger dropped: previous action plan still running.")
+                return False
+            if self.limiter is not None and not self.limiter.allow():
+                self.dropped += 1
+                METRICS.inc("actions_dropped_total", reason="rate_limit")
+                logger.warning("Trigger dropped: safety.max_triggers_per_minute=%d reached.",
+                               self.limiter.max_events)
+                return False
+            self._job = (tuple(points), on_done)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="actions", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._job is not None or self._running
+
+    def stale(self, t_capture: float) -> bool:
+        with self._cond:
+            return self._job is not None or self._running or t_capture < self.finished_at
+
+    def close(self) -> None:
+        """Finish the pending plan (if any) and stop the action thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=10.0)
+        if self.safety is not None:
+            self.safety.stop()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._job is None:
+                    return
+                (points, on_done), self._job = self._job, None
+                self._running = True
+            reports: list[ExecutionReport] = []
+            try:
+                for x, y in points:
+                    reports.append(self.run_at(x, y))
+                    if reports[-1].aborted:
+                        break
+            except Exception:
+                logger.exception("Action plan failed.")
+            finally:
+                with self._cond:
+                    self._running = False
+                    self.finished_at = time.perf_counter()
+            if on_done is not None:
+                try:
+                    on_done(reports)
+                except Exception:
+                    logger.exception("Action completion callback failed.")
+
+
+def create_action_runner(cfg, logger) -> ActionRunner:
+    """Raises RuntimeError for live input (dry_run false) without working safety hotkeys."""
+    plan = compile_plan(cfg.actions.sequence, cfg.actions.click_target)
+    safety = create_safety_switch(cfg)
+    backend = DryRunBackend(logger) if cfg.app.dry_run else DirectInputBackend()
+    executor = ActionExecutor(backend, cfg.actions.spin_ms / 1000.0, safety=safety)
+    return ActionRunner(plan, executor, RateLimiter(cfg.safety.max_triggers_per_minute), safety)
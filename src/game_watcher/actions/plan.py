@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Literal
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    at_s: float                    # deadline, seconds after the plan starts
+    kind: Literal["click", "key"]
+    x: int = 0
+    y: int = 0
+    keys: tuple[str, ...] = ()
+    relative: bool = False         # x, y are offsets from the match center until resolved
+
+
+@dataclass(frozen=True)
+class ActionPlan:
+    """Immutable, validated form of `actions.sequence`.
+
+    Sleeps are folded into absolute per-step deadlines, so the executor never
+    accumulates drift from slow input calls. Click offsets stay relative until
+    `resolve()` pins them to a match center.
+    """
+
+    steps: tuple[PlanStep, ...]
+    duration_s: float              # includes trailing sleeps
+
+    @property
+    def resolved(self) -> bool:
+        return not any(s.relative for s in self.steps)
+
+    def resolve(self, center_x: int, center_y: int) -> ActionPlan:
+        """Copy with every relative click made absolute (screen coords)."""
+        if self.resolved:
+            return self
+        steps = tuple(
+            replace(s, x=center_x + s.x, y=center_y + s.y, relative=False) if s.relative else s
+            for s in self.steps
+        )
+        return ActionPlan(steps, self.duration_s)
+
+
+def compile_plan(sequence, click_target: bool = True) -> ActionPlan:
+    """Validate `actions.sequence` once and turn it into an ActionPlan.
+
+    With click_target the plan starts by clicking the match center itself.
+    Raises ValueError naming the first bad step.
+    """
+    t = 0.0
+    steps: list[PlanStep] = []
+    if click_target:
+        steps.append(PlanStep(0.0, "click", relative=True))
+    for i, step in enumerate(sequence):
+        where = f"actions.sequence[{i}] ({step.type})"
+        if step.type == "sleep":
+            if step.seconds is None or step.seconds < 0:
+                raise ValueError(f"{where}: needs seconds >= 0")
+            t += float(step.seconds)
+        elif step.type == "key":
+            if not step.keys:
+                raise ValueError(f"{where}: needs keys")
+            steps.append(PlanStep(t, "key", keys=tuple(k.lower() for k in step.keys)))
+        else:
+            if step.x is None or step.y is None:
+                raise ValueError(f"{where}: needs x and y")
+            steps.append(PlanStep(t, "click", step.x, step.y, relative=step.type == "click_rel"))
+    return ActionPlan(tuple(steps), t)
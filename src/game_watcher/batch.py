@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+from .bench import percentiles_ms
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+FIELDS = ("image", "result", "template", "score", "x", "y", "w", "h", "cx", "cy", "ms", "error")
+
+# Per-process state set by _init_worker: (vision cfg, matcher).
+_WORKER: tuple | None = None
+
+
+def list_images(image_dir: Path) -> list[Path]:
+    if not image_dir.is_dir():
+        raise FileNotFoundError(f"Image dir not found: {image_dir}")
+    return sorted(p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+
+
+def _init_worker(vision_cfg) -> None:
+    from .vision.matcher import create_matcher
+    from .vision.template_cache import load_pack
+
+    global _WORKER
+    bank = load_pack(vision_cfg.templates_dir / vision_cfg.active_pack, vision_cfg)
+    # Parallelism comes from the process pool; keep each matcher single-threaded.
+    match_cfg = vision_cfg.match.model_copy(update={"workers": 0})
+    _WORKER = (vision_cfg, create_matcher(bank, match_cfg))
+
+
+def worker_state() -> tuple:
+    """(vision cfg, matcher) of the current pool worker."""
+    return _WORKER
+
+
+def match_image(path: Path) -> dict:
+    from .vision.preprocess import edges_from_gray, to_gray
+
+    vision_cfg, matcher = _WORKER
+    row = dict.fromkeys(FIELDS, "")
+    row["image"] = str(path)
+    t0 = time.perf_counter()
+    try:
+        bgr = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise RuntimeError("failed to read image")
+        gray = to_gray(bgr)
+        c = vision_cfg.canny
+        edges = edges_from_gray(gray, c.low, c.high, c.blur_ksize)
+        best = matcher.match_best(gray, edges, vision_cfg.mode)
+    except Exception as e:
+        row.update(result="error", error=str(e), ms=round((time.perf_counter() - t0) * 1000, 3))
+        return row
+
+    row["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    if best is None:
+        row["result"] = "none"
+        return row
+    if best.score >= vision_cfg.match.threshold:
+        row["result"] = "hit"
+    elif best.score >= vision_cfg.match.near_miss:
+        row["result"] = "near"
+    else:
+        row["result"] = "miss"
+    row.update(
+        template=best.template_name,
+        score=round(best.score, 5),
+        x=best.top_left[0],
+        y=best.top_left[1],
+        w=best.size[0],
+        h=best.size[1],
+        cx=best.center[0],
+        cy=best.center[1],
+    )
+    return row
+
+
+def iter_matches(
+    images: list, vision_cfg, workers: int, fn: Callable = match_image
+) -> Iterator:
+    """Apply `fn` (a module-level function, so it pickles) to every item in worker
+    processes that each hold a loaded matcher; results come back in input order."""
+    if workers <= 1:
+        _init_worker(vision_cfg)
+        yield from map(fn, images)
+        return
+
+    chunksize = max(1, min(16, len(images) // (workers * 4)))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(vision_cfg,)) as pool:
+        yield from pool.map(fn, images, chunksize=chunksize)
+
+
+class _RowWriter:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("w", newline="", encoding="utf-8")
+        self._csv = None
+        if path.suffix.lower() != ".jsonl":
+            self._csv = csv.DictWriter(self._f, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._f.write(json.dumps(row) + "\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def run_batch(images: list[Path], vision_cfg, out_path: Path, workers: int | None = None) -> dict:
+    """Stream match rows for `images` to `out_path` (.csv or .jsonl); return a summary."""
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(images)))
+    counts: dict[str, int] = {}
+    per_image_s: list[float] = []
+
+    t0 = time.perf_counter()
+    writer = _RowWriter(out_path)
+    try:
+        for row in iter_matches(images, vision_cfg, workers):
+            writer.write(row)
+            counts[row["result"]] = counts.get(row["result"], 0) + 1
+            per_image_s.append(row["ms"] / 1000.0)
+    finally:
+        writer.close()
+    wall_s = time.perf_counter() - t0
+
+    return {
+        "images": len(per_image_s),
+        "workers": workers,
+        "wall_s": round(wall_s, 3),
+        "images_per_s": round(len(per_image_s) / wall_s, 2) if wall_s > 0 else 0.0,
+        "per_image": percentiles_ms(per_image_s),
+        "results": counts,
+        "out": str(out_path),
+    }
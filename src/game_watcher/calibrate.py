@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import csv
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .batch import iter_matches, worker_state
+
+_TRUE = {"1", "true", "yes", "hit", "y"}
+
+
+@dataclass(frozen=True)
+class LabeledFrame:
+    image: Path
+    hit: bool
+    template: str | None = None                        # expected template name, if known
+    box: tuple[int, int, int, int] | None = None       # expected (x, y, w, h), if known
+
+
+def load_labels(path: Path) -> list[LabeledFrame]:
+    """CSV with columns image,label[,template][,x,y,w,h]; image paths relative to the file."""
+    out = []
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            image = Path(row["image"])
+            if not image.is_absolute():
+                image = path.parent / image
+            box = None
+            if all(row.get(k) not in (None, "") for k in ("x", "y", "w", "h")):
+                box = tuple(int(float(row[k])) for k in ("x", "y", "w", "h"))
+            out.append(LabeledFrame(
+                image=image,
+                hit=str(row["label"]).strip().lower() in _TRUE,
+                template=(row.get("template") or "").strip() or None,
+                box=box,
+            ))
+    return out
+
+
+def score_frame(item: LabeledFrame) -> list[tuple[str, float, bool]] | None:
+    """(template, best score over scales, location ok) per template, or None if unreadable."""
+    from .vision.preprocess import edges_from_gray, to_gray
+
+    vision_cfg, matcher = worker_state()
+    bgr = cv2.imread(str(item.image), cv2.IMREAD_COLOR)
+    if bgr is None:
+        return None
+    gray = to_gray(bgr)
+    c = vision_cfg.canny
+    edges = edges_from_gray(gray, c.low, c.high, c.blur_ksize)
+
+    out = []
+    for t in matcher.bank:
+        mr = matcher.match_best(gray, edges, vision_cfg.mode, names={t.name})
+        if mr is None:
+            out.append((t.name, 0.0, False))
+            continue
+        loc_ok = True
+        if item.box is not None:
+            x, y, w, h = item.box
+            loc_ok = x <= mr.center[0] < x + w and y <= mr.center[1] < y + h
+        out.append((t.name, float(mr.score), loc_ok))
+    return out
+
+
+@dataclass(frozen=True)
+class Curve:
+    thresholds: np.ndarray  # descending
+    precision: np.ndarray
+    recall: np.ndarray
+    tp: np.ndarray
+    fp: np.ndarray
+    positives: int
+
+
+def pr_curve(scores: np.ndarray, correct: np.ndarray, positives: int) -> Curve:
+    """Precision/recall at every distinct score used as threshold (score >= t fires).
+
+    `correct[i]` marks frames where firing is right (labeled hit, right template
+    and location); any other firing counts as a false positive.
+    """
+    order = np.argsort(-scores, kind="stable")
+    s = scores[order]
+    c = correct[order].astype(np.int64)
+    tp = np.cumsum(c)
+    fp = np.cumsum(1 - c)
+    # Only the last index of each run of equal scores is a reachable operating point.
+    last = np.r_[s[1:] != s[:-1], True] if s.size else np.zeros(0, bool)
+    tp, fp, s = tp[last], fp[last], s[last]
+    precision = tp / np.maximum(tp + fp, 1)
+    recall = tp / positives if positives else np.zeros_like(precision, dtype=np.float64)
+    return Curve(s, precision, recall, tp, fp, positives)
+
+
+def recommend(curve: Curve, min_precision: float) -> dict:
+    """Lowest threshold (max recall) whose precision is still >= min_precision.
+
+    Falls back to the best-F1 point when no threshold reaches the target.
+    """
+    if curve.thresholds.size == 0 or curve.positives == 0:
+        return {"threshold": None}
+    ok = np.flatnonzero(curve.precision >= min_precision)
+    if ok.size:
+        i = int(ok[-1])
+        basis = f"precision>={min_precision}"
+    else:
+        f1 = 2 * curve.precision * curve.recall / np.maximum(curve.precision + curve.recall, 1e-12)
+        i = int(np.argmax(f1))
+        basis = "max_f1"
+    # Sit just between the chosen score and the next lower one, so small jitter
+    # on the weakest accepted hit does not flip it.
+    t = float(curve.thresholds[i])
+    if i + 1 < curve.thresholds.size:
+        t = (t + float(curve.thresholds[i + 1])) / 2
+    return {
+        "threshold": round(t, 4),
+        "precision": round(float(curve.precision[i]), 4),
+        "recall": round(float(curve.recall[i]), 4),
+        "basis": basis,
+    }
+
+
+def recommend_near_miss(scores: np.ndarray, hit: np.ndarray, threshold: float | None,
+                        recall: float = 0.99) -> float | None:
+    """Near-miss floor: 80% (the default near_miss/threshold ratio) of the lower of
+    the threshold and the score that keeps `recall` of labeled hits."""
+    pos = np.sort(scores[hit])
+    if pos.size == 0:
+        return None
+    nm = float(pos[int(np.floor((1 - recall) * (pos.size - 1)))])
+    if threshold is not None:
+        nm = min(nm, threshold)
+    return round(nm * 0.8, 4)
+
+
+def calibrate(frames: list[LabeledFrame], vision_cfg, workers: int | None = None,
+              min_precision: float = 0.99) -> tuple[dict, dict[str, Curve]]:
+    workers = max(1, min(workers or os.cpu_count() or 1, len(frames)))
+    t0 = time.perf_counter()
+    results = list(iter_matches(frames, vision_cfg, workers, fn=score_frame))
+    score_s = time.perf_counter() - t0
+
+    kept = [(f, r) for f, r in zip(frames, results, strict=True) if r is not None]
+    names = [name for name, _, _ in kept[0][1]] if kept else []
+    n = len(kept)
+
+    # (frames x templates) matrices; every sweep below is plain array math.
+    shape = (n, len(names))
+    scores = np.array([[s for _, s, _ in r] for _, r in kept], dtype=np.float64).reshape(shape)
+    loc_ok = np.array([[ok for _, _, ok in r] for _, r in kept], dtype=bool).reshape(shape)
+    hit = np.array([f.hit for f, _ in kept], dtype=bool)
+    expected = np.array([f.template or "" for f, _ in kept])
+
+    t1 = time.perf_counter()
+    curves: dict[str, Curve] = {}
+    per_template = {}
+    for j, name in enumerate(names):
+        # Frames labeled for another template are negatives for this one.
+        pos = hit & ((expected == "") | (expected == name))
+        curve = pr_curve(scores[:, j], pos & loc_ok[:, j], int(pos.sum()))
+        curves[name] = curve
+        rec = recommend(curve, min_precision)
+        rec["near_miss"] = recommend_near_miss(scores[:, j], pos, rec["threshold"])
+        per_template[name] = {"positives": int(pos.sum()), "negatives": int((~pos).sum()), **rec}
+
+    # What the gate sees: the single best template per frame against one threshold.
+    overall = {}
+    if names:
+        jbest = np.argmax(scores, axis=1)
+        best = scores[np.arange(n), jbest]
+        best_names = np.asarray(names)[jbest]
+        right_template = (expected == "") | (expected == best_names)
+        correct = hit & right_template & loc_ok[np.arange(n), jbest]
+        curve = pr_curve(best, correct, int(hit.sum()))
+        curves["*"] = curve
+        overall = recommend(curve, min_precision)
+        overall["near_miss"] = recommend_near_miss(best, hit, overall["threshold"])
+    sweep_s = time.perf_counter() - t1
+
+    report = {
+        "frames": len(frames),
+        "unreadable": len(frames) - n,
+        "hits": int(hit.sum()),
+        "mode": vision_cfg.mode,
+        "method": vision_cfg.match.method,
+        "scales": list(vision_cfg.match.scales),
+        "min_precision": min_precision,
+        "recommended": overall,
+        "templates": per_template,
+        "timing": {"workers": workers, "score_s": round(score_s, 3), "sweep_s": round(sweep_s, 4)},
+    }
+    return report, curves
+
+
+def write_curves(path: Path, curves: dict[str, Curve]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["template", "threshold", "precision", "recall", "tp", "fp", "positives"])
+        for name, c in curves.items():
+            for t, p, r, tp, fp in zip(c.thresholds, c.precision, c.recall, c.tp, c.fp,
+                                       strict=True):
+                w.writerow([name, f"{t:.5f}", f"{p:.4f}", f"{r:.4f}", tp, fp, c.positives])
@@ -1,14 +1,29 @@
 from __future__ import annotations
 
-from .base import CaptureBackend, Region
-from .dxcam_capture import DXCamCapture
-from .mss_capture import MSSCapture
+from .base import CaptureBackend, FrameOutput, Region
 
+__all__ = ["CaptureBackend", "FrameOutput", "Region", "create_capture_backend"]
 
-def create_capture_backend(name: str) -> CaptureBackend:
+
+def create_capture_backend(
+    name: str, replay=None, output: FrameOutput = "bgr", buffers: int = 4
+) -> CaptureBackend:
+    # Backends are imported lazily: dxcam/mss need a desktop session, replay does not.
     name = name.lower().strip()
     if name == "dxcam":
-        return DXCamCapture()
+        from .dxcam_capture import DXCamCapture
+
+        return DXCamCapture(output=output, buffers=buffers)
     if name == "mss":
-        return MSSCapture()
+        from .mss_capture import MSSCapture
+
+        return MSSCapture(output=output, buffers=buffers)
+    if name == "replay":
+        from .replay_capture import ReplayCapture
+
+        if replay is None or replay.path is None:
+            raise ValueError("capture.replay.path must be set for the replay backend")
+        return ReplayCapture(
+            replay.path, fps=replay.fps, loop=replay.loop, prefetch=replay.prefetch, output=output
+        )
     raise ValueError(f"Unknown capture backend: {name}")
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Literal, Protocol
 
+import cv2
 import numpy as np
 
+FrameOutput = Literal["bgr", "gray"]
+
 
 @dataclass(frozen=True)
 class Region:
@@ -24,8 +28,56 @@ class Region:
 
 class CaptureBackend(Protocol):
     def grab(self, region: Region) -> np.ndarray | None:
-        """Return a BGR uint8 image (H,W,3), or None on failure."""
+        """Return a BGR uint8 image (H,W,3), or (H,W) gray in gray output mode.
+
+        None on failure.
+        """
         ...
 
     def close(self) -> None:
         ...
+
+
+class FrameBufferPool:
+    """Rings of preallocated frame buffers, one per frame shape, reused round-robin.
+
+    A buffer is overwritten `size` grabs of the same shape after it was handed
+    out, so the ring must be larger than the number of frames that can be in
+    flight at once. Keeping a ring per shape lets multi-window capture alternate
+    between client sizes without reallocating; the least recently used shape
+    is dropped beyond `max_shapes` (e.g. while a window is being resized).
+    """
+
+    def __init__(self, size: int = 4, max_shapes: int = 8):
+        self.size = max(1, int(size))
+        self.max_shapes = max(1, int(max_shapes))
+        self._rings: OrderedDict[tuple[int, ...], tuple[list[np.ndarray], list[int]]] = (
+            OrderedDict()
+        )
+
+    def acquire(self, shape: tuple[int, ...]) -> np.ndarray:
+        ring = self._rings.get(shape)
+        if ring is None:
+            ring = ([np.empty(shape, dtype=np.uint8) for _ in range(self.size)], [0])
+            self._rings[shape] = ring
+            if len(self._rings) > self.max_shapes:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(shape)
+        bufs, nxt = ring
+        buf = bufs[nxt[0]]
+        nxt[0] = (nxt[0] + 1) % self.size
+        return buf
+
+
+_BGRA_CODES = {"bgr": cv2.COLOR_BGRA2BGR, "gray": cv2.COLOR_BGRA2GRAY}
+
+
+def convert_bgra(bgra: np.ndarray, output: FrameOutput, pool: FrameBufferPool) -> np.ndarray:
+    """Convert a BGRA frame straight into a pooled BGR or gray buffer.
+
+    Single pass, no temporaries.
+    """
+    h, w = bgra.shape[:2]
+    shape = (h, w) if output == "gray" else (h, w, 3)
+    return cv2.cvtColor(bgra, _BGRA_CODES[output], dst=pool.acquire(shape))
@@ -3,35 +3,38 @@ from __future__ import annotations
 import dxcam
 import numpy as np
 
-from .base import CaptureBackend, Region
+from ..metrics import METRICS
+from .base import CaptureBackend, FrameBufferPool, FrameOutput, Region, convert_bgra
 
 
 class DXCamCapture(CaptureBackend):
-    def __init__(self) -> None:
-        # dxcam usually returns numpy arrays already.
-        # We treat output as BGR-like for saving via OpenCV later.
-        self._cam = dxcam.create()
+    def __init__(self, output: FrameOutput = "bgr", buffers: int = 4) -> None:
+        # Ask dxcam for BGRA (its default is RGB) and convert ourselves, so both
+        # output modes come from one cvtColor into a reusable buffer.
+        self._cam = dxcam.create(output_color="BGRA")
+        self.output = output
+        self._pool = FrameBufferPool(buffers)
 
     def grab(self, region: Region) -> np.ndarray | None:
         # dxcam region expects (left, top, right, bottom)
         try:
-            frame = self._cam.grab(region=(int(region.left), int(region.top), int(region.right), 
-                                           int(region.bottom)))
+            with METRICS.timer("capture_seconds", backend="dxcam"):
+                frame = self._cam.grab(region=(int(region.left), int(region.top),
+                                               int(region.right), int(region.bottom)))
         except Exception:
+            METRICS.inc("capture_failures_total", backend="dxcam")
             return None
 
         if frame is None:
+            METRICS.inc("capture_failures_total", backend="dxcam")
             return None
 
         img = np.asarray(frame)
-        if img.ndim != 3 or img.shape[2] < 3:
+        if img.ndim != 3 or img.shape[2] != 4:
+            METRICS.inc("capture_failures_total", backend="dxcam")
             return None
 
-        # If it has alpha, drop it.
-        if img.shape[2] == 4:
-            img = img[:, :, :3]
-
-        return img.astype(np.uint8, copy=False)
+        return convert_bgra(img, self.output, self._pool)
 
     def close(self) -> None:
         try:
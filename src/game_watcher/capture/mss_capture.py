@@ -3,12 +3,15 @@ from __future__ import annotations
 import mss
 import numpy as np
 
-from .base import CaptureBackend, Region
+from ..metrics import METRICS
+from .base import CaptureBackend, FrameBufferPool, FrameOutput, Region, convert_bgra
 
 
 class MSSCapture(CaptureBackend):
-    def __init__(self) -> None:
+    def __init__(self, output: FrameOutput = "bgr", buffers: int = 4) -> None:
         self._sct = mss.mss()
+        self.output = output
+        self._pool = FrameBufferPool(buffers)
 
     def grab(self, region: Region) -> np.ndarray | None:
         monitor = {
@@ -18,20 +21,16 @@ class MSSCapture(CaptureBackend):
             "height": int(region.height),
         }
 
-        shot = self._sct.grab(monitor)  # BGRA
-        img = np.array(shot, dtype=np.uint8)
-
-        if img.ndim != 3 or img.shape[2] < 3:
-            return None
-
-        # Convert BGRA -> BGR (drop alpha)
-        return img[:, :, :3]
-    
-        # # Convert BGRA -> BGR (drop alpha)
-        # bgr_img = img[:, :, :3]
-        
-        # # Convert BGR to grayscale
-        # return cv2.cvtColor(bgr_img, cv2.COLOR_BGR2GRAY)
+        with METRICS.timer("capture_seconds", backend="mss"):
+            shot = self._sct.grab(monitor)  # BGRA
+            # View the raw BGRA bytes in place; the only copy is the conversion
+            # into a pooled output buffer.
+            bgra = np.frombuffer(shot.raw, dtype=np.uint8)
+            if bgra.size != shot.height * shot.width * 4:
+                METRICS.inc("capture_failures_total", backend="mss")
+                return None
+            bgra = bgra.reshape(shot.height, shot.width, 4)
+            return convert_bgra(bgra, self.output, self._pool)
 
     def close(self) -> None:
         try:
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..metrics import METRICS
+from .base import CaptureBackend, FrameOutput, Region
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp")
+
+_END = object()
+
+
+def _iter_images(files: list[Path]) -> Iterator[np.ndarray]:
+    for p in files:
+        img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+        if img is not None:
+            yield img
+
+
+def _iter_video(path: Path) -> Iterator[np.ndarray]:
+    cap = cv2.VideoCapture(str(path))
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+class ReplayCapture(CaptureBackend):
+    """Plays recorded frames (a directory of images or a video file) as a capture source.
+
+    Decoding runs on a background thread into a bounded queue so `grab` only pops
+    a ready frame. The region is ignored: recordings are already client-area frames.
+    `grab` returns None once the recording is exhausted (unless looping).
+    """
+
+    def __init__(self, source: Path, fps: float = 0.0, loop: bool = False, prefetch: int = 8,
+                 output: FrameOutput = "bgr"):
+        self.source = Path(source)
+        if self.source.is_dir():
+            self._files = sorted(
+                p for p in self.source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+            if not self._files:
+                raise FileNotFoundError(f"No frames in replay dir: {self.source}")
+        elif self.source.is_file():
+            self._files = []
+        else:
+            raise FileNotFoundError(f"Replay source not found: {self.source}")
+
+        self.fps = float(fps)  # > 0 paces grab() to this rate, otherwise full speed
+        self.loop = loop
+        self.output = output
+        self.exhausted = False
+        self.frames_read = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(prefetch)))
+        self._stop = threading.Event()
+        self._next_due = 0.0
+        self._thread = threading.Thread(target=self._decode_loop, name="replay-decode", daemon=True)
+        self._thread.start()
+
+    def _frames(self) -> Iterator[np.ndarray]:
+        if self._files:
+            return _iter_images(self._files)
+        return _iter_video(self.source)
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self) -> None:
+        while not self._stop.is_set():
+            produced = False
+            for frame in self._frames():
+                produced = True
+                if self.output == "gray":
+                    # Converted on the decode thread, off the grab path.
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if not self._put(frame):
+                    return
+            if not (self.loop and produced):
+                break
+        self._put(_END)
+
+    def grab(self, region: Region) -> np.ndarray | None:
+        if self.exhausted:
+            return None
+
+        if self.fps > 0:
+            now = time.perf_counter()
+            if self._next_due > now:
+                time.sleep(self._next_due - now)
+            self._next_due = max(now, self._next_due) + 1.0 / self.fps
+
+        with METRICS.timer("capture_seconds", backend="replay"):
+            item = self._queue.get()
+        if item is _END:
+            self.exhausted = True
+            return None
+        self.frames_read += 1
+        return item
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout=1.0)
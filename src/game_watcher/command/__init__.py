@@ -1,3 +1,23 @@
-from .command import Command, DiagCaptureCommand, DiagWindowCommand, RunCommand, create_command
+from .command import (
+    BenchCommand,
+    CalibrateCommand,
+    Command,
+    DiagCaptureCommand,
+    DiagWindowCommand,
+    MatchDirCommand,
+    RunCommand,
+    TraceSummaryCommand,
+    create_command,
+)
 
-__all__ = ["Command", "DiagWindowCommand", "DiagCaptureCommand", "RunCommand", "create_command"]
\ No newline at end of file
+__all__ = [
+    "Command",
+    "DiagWindowCommand",
+    "DiagCaptureCommand",
+    "MatchDirCommand",
+    "CalibrateCommand",
+    "BenchCommand",
+    "RunCommand",
+    "TraceSummaryCommand",
+    "create_command",
+]
\ No newline at end of file
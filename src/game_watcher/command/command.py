@@ -21,28 +21,31 @@ class DiagWindowCommand(Command):
             is_foreground,
         )
 
-        hwnds = find_window_by_title_regex(cfg.window.title_regex)
+        hwnds: list[int] = []
+        for pattern in cfg.window.patterns:
+            found = find_window_by_title_regex(pattern)
+            hwnds += [h for h in (found if cfg.window.match_all else found[:1]) if h not in hwnds]
         if not hwnds:
             logger.error("No windows matched title_regex=%s", cfg.window.title_regex)
             return 2
 
-        hwnd = hwnds[0]
-        info = get_client_rect_in_screen(hwnd)
-
-        logger.info("Matched window: hwnd=%s title=%r", info.hwnd, info.title)
-        logger.info(
-            "Client rect (screen): L=%d T=%d W=%d H=%d",
-            info.client_left,
-            info.client_top,
-            info.client_width,
-            info.client_height,
-        )
+        for hwnd in hwnds:
+            info = get_client_rect_in_screen(hwnd)
+            logger.info("Matched window: hwnd=%s title=%r", info.hwnd, info.title)
+            logger.info(
+                "Client rect (screen): L=%d T=%d W=%d H=%d",
+                info.client_left,
+                info.client_top,
+                info.client_width,
+                info.client_height,
+            )
 
         if self.focus_wait > 0:
             logger.info("Focus-wait: %.2fs. Switch to the game window now.", self.focus_wait)
             time.sleep(self.focus_wait)
 
-        logger.info("Foreground=%s", is_foreground(hwnd))
+        for hwnd in hwnds:
+            logger.info("hwnd=%s foreground=%s", hwnd, is_foreground(hwnd))
         return 0
 
 
@@ -63,7 +66,7 @@ class DiagCaptureCommand(Command):
             is_foreground,
         )
 
-        hwnds = find_window_by_title_regex(cfg.window.title_regex)
+        hwnds = find_window_by_title_regex(cfg.window.patterns[0])
         if not hwnds:
             logger.error("No windows matched title_regex=%s", cfg.window.title_regex)
             return 2
@@ -85,7 +88,9 @@ class DiagCaptureCommand(Command):
         region = Region(left=win.client_left, top=win.client_top, 
                        width=win.client_width, height=win.client_height)
 
-        cap = create_capture_backend(cfg.capture.backend)
+        cap = create_capture_backend(
+            cfg.capture.backend, cfg.capture.replay, cfg.capture.output, cfg.capture.buffers
+        )
         try:
             for i in range(max(1, self.frames)):
                 frame = cap.grab(region)
@@ -133,9 +138,9 @@ class MatchPicCommand(Command):
 
         # Load templates from all packs in templates directory
         from ..vision.debug import draw_match, save_debug_frame
-        from ..vision.matcher import TemplateMatcher
+        from ..vision.matcher import create_matcher
         from ..vision.preprocess import edges_from_gray, to_gray
-        from ..vision.templates import load_templates
+        from ..vision.template_cache import load_pack
 
         templates_dir = Path("templates")  # Hardcoded as per requirement
         if not templates_dir.exists():
@@ -150,12 +155,7 @@ class MatchPicCommand(Command):
                 try:
                     logger.info("MUIE")
                     
-                    all_templates = load_templates(
-                        pack_dir,
-                        cfg.vision.canny.low,
-                        cfg.vision.canny.high,
-                        cfg.vision.canny.blur_ksize,
-                    )
+                    all_templates = load_pack(pack_dir, cfg.vision)
                     logger.info("Loaded %d templates from pack: %s", len(all_templates), pack_dir.name)
                 except Exception as e:
                     logger.warning("Failed to load templates from %s: %s", pack_dir, e)
@@ -164,17 +164,25 @@ class MatchPicCommand(Command):
             logger.error("No templates loaded from %s", templates_dir.absolute())
             return 2
 
-        logger.info("Total templates loaded: %d", len(all_templates))
+        logger.info(
+            "Total templates loaded: %d (scales=%s, %.1f KiB)",
+            len(all_templates),
+            list(all_templates.scales),
+            all_templates.nbytes / 1024,
+        )
 
         # Initialize matcher
-        matcher = TemplateMatcher(all_templates, cfg.vision.match.method, cfg.vision.match.scales)
+        matcher = create_matcher(all_templates, cfg.vision.match)
 
         # Process image
         gray = to_gray(frame_bgr)
         edges = edges_from_gray(gray, cfg.vision.canny.low, cfg.vision.canny.high, cfg.vision.canny.blur_ksize)
 
         # Find best match
-        best = matcher.match_best(gray, edges, cfg.vision.mode)
+        try:
+            best = matcher.match_best(gray, edges, cfg.vision.mode)
+        finally:
+            matcher.close()
         if best is None:
             logger.info("No match computed (templates too large or none loaded)")
             return 0
@@ -214,23 +222,243 @@ class RunCommand(Command):
     def execute(self, cfg, logger) -> int:
         logger.info("dry_run=%s scan_interval=%.2fs cooldown=%.2fs",
                     cfg.app.dry_run, cfg.app.scan_interval_sec, cfg.app.cooldown_sec)
-        logger.info("window.title_regex=%s require_foreground=%s",
-                    cfg.window.title_regex, cfg.window.require_foreground)
+        logger.info("window.title_regex=%s require_foreground=%s match_all=%s schedule=%s",
+                    cfg.window.title_regex, cfg.window.require_foreground,
+                    cfg.window.match_all, cfg.window.schedule)
         logger.info("capture.backend=%s capture_window_only=%s",
                     cfg.capture.backend, cfg.capture.capture_window_only)
-        logger.info("vision.mode=%s threshold=%.3f consecutive_hits=%d",
-                    cfg.vision.mode, cfg.vision.threshold, cfg.vision.require_consecutive_hits)
-        logger.info("templates.pack=%s files=%s",
-                    cfg.templates.active_pack, cfg.templates.files)
+        logger.info("vision.mode=%s threshold=%.3f confirm_hits=%d",
+                    cfg.vision.mode, cfg.vision.match.threshold, cfg.vision.match.confirm_hits)
+        logger.info("vision.pack=%s backend=%s search=%s",
+                    cfg.vision.templates_dir / cfg.vision.active_pack,
+                    cfg.vision.match.backend, cfg.vision.match.search)
+        logger.info("pipeline.vision_workers=%d queue_size=%d",
+                    cfg.app.pipeline.vision_workers, cfg.app.pipeline.queue_size)
         logger.info("actions.steps=%d", len(cfg.actions.sequence))
         logger.info("safety.kill=%s pause=%s max_triggers/min=%d",
                     cfg.safety.kill_switch_key, cfg.safety.pause_toggle_key, cfg.safety.max_triggers_per_minute)
 
-        logger.warning("Scaffold only: capture/matching/actions not implemented yet.")
-        logger.warning("Next step: implement dry-run capture + match + debug frame saving.")
-        return 0
+        from ..runloop import RunLoop
+
+        return RunLoop(cfg, logger).run()
     
     
+class BenchCommand(Command):
+    def __init__(self, frames: int, out_path: str | None):
+        self.frames = frames
+        self.out_path = Path(out_path) if out_path else None
+
+    def execute(self, cfg, logger) -> int:
+        import json
+        import time
+
+        from ..bench import StageTimer, peak_rss_bytes
+        from ..capture import Region, create_capture_backend
+        from ..vision.matcher import create_matcher
+        from ..vision.prefilter import create_prefilter
+        from ..vision.preprocess import TiledPreprocessor, edges_from_gray, to_gray
+        from ..vision.template_cache import load_pack
+        from ..vision.trigger_gate import TriggerGate
+
+        if cfg.capture.backend == "replay":
+            region = Region(left=0, top=0, width=0, height=0)
+        else:
+            from ..windowing.win32_window import (
+                find_window_by_title_regex,
+                get_client_rect_in_screen,
+            )
+
+            hwnds = find_window_by_title_regex(cfg.window.patterns[0])
+            if not hwnds:
+                logger.error("No windows matched title_regex=%s", cfg.window.title_regex)
+                return 2
+            win = get_client_rect_in_screen(hwnds[0])
+            region = Region(left=win.client_left, top=win.client_top,
+                            width=win.client_width, height=win.client_height)
+
+        pack_dir = cfg.vision.templates_dir / cfg.vision.active_pack
+        t0 = time.perf_counter()
+        bank = load_pack(pack_dir, cfg.vision)
+        load_s = time.perf_counter() - t0
+        matcher = create_matcher(bank, cfg.vision.match)
+        prefilter = create_prefilter(cfg.vision.prefilter, bank)
+        c = cfg.vision.canny
+        tiled = TiledPreprocessor(c.low, c.high, c.blur_ksize, c.tile_px) if c.incremental else None
+        gate = TriggerGate(cfg.vision.match.confirm_hits, cfg.vision.match.min_trigger_interval_s)
+
+        timer = StageTimer()
+        cap = create_capture_backend(
+            cfg.capture.backend, cfg.capture.replay, cfg.capture.output, cfg.capture.buffers
+        )
+        frames = 0
+        hits = 0
+        shape = None
+        t_start = time.perf_counter()
+        try:
+            for _ in range(max(1, self.frames)):
+                with timer.stage("capture"):
+                    frame = cap.grab(region)
+                if frame is None:
+                    break
+                shape = frame.shape
+                if tiled is not None:
+                    with timer.stage("preprocess_tiled"):
+                        gray, edges = tiled.process(frame)
+                else:
+                    with timer.stage("to_gray"):
+                        gray = to_gray(frame)
+                    with timer.stage("edges"):
+                        edges = edges_from_gray(gray, c.low, c.high, c.blur_ksize)
+                regions = None
+                if prefilter is not None:
+                    with timer.stage("prefilter"):
+                        regions = prefilter.regions(frame, edges)
+                with timer.stage("match"):
+                    if regions is None:
+                        best = matcher.match_best(gray, edges, cfg.vision.mode)
+                    else:
+                        best = matcher.match_regions(gray, edges, cfg.vision.mode, regions)
+                with timer.stage("gate"):
+                    hit = best is not None and best.score >= cfg.vision.match.threshold
+                    gate.observe(hit)
+                frames += 1
+                hits += int(hit)
+        finally:
+            wall_s = time.perf_counter() - t_start
+            matcher.close()
+            try:
+                cap.close()
+            except Exception:
+                pass
+
+        if frames == 0:
+            logger.error("Bench captured no frames (backend=%s).", cfg.capture.backend)
+            return 3
+
+        report = {
+            "frames": frames,
+            "hits": hits,
+            "frame_shape": list(shape),
+            "fps": round(frames / wall_s, 2) if wall_s > 0 else None,
+            "wall_s": round(wall_s, 3),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "template_load_s": round(load_s, 3),
+            "stages": timer.summary(),
+            "tiles_reused": None if tiled is None else round(tiled.reused_fraction, 4),
+            "prefilter": None if prefilter is None else {
+                "pixels_skipped": round(prefilter.skipped_fraction, 4),
+                "full_fallbacks": prefilter.fallbacks,
+            },
+            "config": {
+                "capture_backend": cfg.capture.backend,
+                "pack": str(pack_dir),
+                "templates": len(bank),
+                "template_bytes": bank.nbytes,
+                "mode": cfg.vision.mode,
+                "scales": list(bank.scales),
+                "matcher_backend": cfg.vision.match.backend,
+                "method": cfg.vision.match.method,
+                "search": cfg.vision.match.search,
+                "workers": cfg.vision.match.workers,
+            },
+        }
+
+        text = json.dumps(report, indent=2)
+        print(text)
+        if self.out_path is not None:
+            self.out_path.parent.mkdir(parents=True, exist_ok=True)
+            self.out_path.write_text(text + "\n", encoding="utf-8")
+            logger.info("Bench report written to: %s", self.out_path)
+        return 0
+
+
+class TraceSummaryCommand(Command):
+    def __init__(self, trace_path: str):
+        self.trace_path = Path(trace_path)
+
+    def execute(self, cfg, logger) -> int:
+        import json
+
+        from ..trace import summarize
+
+        if not self.trace_path.exists():
+            logger.error("Trace file not found: %s", self.trace_path)
+            return 2
+        summary = summarize(self.trace_path)
+        if not summary["records"]:
+            logger.error("No readable spans in %s", self.trace_path)
+            return 2
+        print(json.dumps(summary, indent=2))
+        if summary["unreadable"]:
+            logger.warning("%d trace lines could not be parsed.", summary["unreadable"])
+        return 0
+
+
+class MatchDirCommand(Command):
+    def __init__(self, image_dir: str, out_path: str, workers: int | None):
+        self.image_dir = Path(image_dir)
+        self.out_path = Path(out_path)
+        self.workers = workers
+
+    def execute(self, cfg, logger) -> int:
+        import json
+
+        from ..batch import list_images, run_batch
+
+        try:
+            images = list_images(self.image_dir)
+        except FileNotFoundError as e:
+            logger.error("%s", e)
+            return 2
+        if not images:
+            logger.error("No images found in %s", self.image_dir)
+            return 2
+
+        logger.info("Matching %d images from %s against pack %s",
+                    len(images), self.image_dir, cfg.vision.templates_dir / cfg.vision.active_pack)
+        summary = run_batch(images, cfg.vision, self.out_path, self.workers)
+        logger.info("Results written to: %s", self.out_path)
+        print(json.dumps(summary, indent=2))
+        return 0
+
+
+class CalibrateCommand(Command):
+    def __init__(self, labels_path: str, out_path: str, workers: int | None, min_precision: float):
+        self.labels_path = Path(labels_path)
+        self.out_path = Path(out_path)
+        self.workers = workers
+        self.min_precision = min_precision
+
+    def execute(self, cfg, logger) -> int:
+        import json
+
+        from ..calibrate import calibrate, load_labels, write_curves
+
+        if not self.labels_path.exists():
+            logger.error("Labels file not found: %s", self.labels_path)
+            return 2
+        frames = load_labels(self.labels_path)
+        if not frames:
+            logger.error("No labeled frames in %s", self.labels_path)
+            return 2
+
+        logger.info("Calibrating pack %s on %d labeled frames (%d hits)",
+                    cfg.vision.templates_dir / cfg.vision.active_pack,
+                    len(frames), sum(f.hit for f in frames))
+        report, curves = calibrate(frames, cfg.vision, self.workers, self.min_precision)
+
+        text = json.dumps(report, indent=2)
+        print(text)
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self.out_path.write_text(text + "\n", encoding="utf-8")
+        curves_path = self.out_path.with_suffix(".curves.csv")
+        write_curves(curves_path, curves)
+        logger.info("Calibration report: %s, PR curves: %s", self.out_path, curves_path)
+        if report["unreadable"]:
+            logger.warning("%d labeled frames could not be read.", report["unreadable"])
+        return 0
+
+
 def create_command(args) -> Command:
     if args.diag_window:
         return DiagWindowCommand(args.focus_wait)
@@ -238,5 +466,14 @@ def create_command(args) -> Command:
         return DiagCaptureCommand(args.focus_wait, args.frames, args.frame_interval)
     elif args.match_pic:
         return MatchPicCommand(args.match_pic)
+    elif args.match_dir:
+        return MatchDirCommand(args.match_dir, args.match_out, args.match_workers)
+    elif args.calibrate:
+        return CalibrateCommand(args.calibrate, args.calibrate_out, args.match_workers,
+                                args.min_precision)
+    elif args.bench:
+        return BenchCommand(args.bench_frames, args.bench_out)
+    elif args.trace_summary:
+        return TraceSummaryCommand(args.trace_summary)
     else:
         return RunCommand()
\ No newline at end of file
@@ -8,34 +8,108 @@ from pydantic import BaseModel, Field, PositiveFloat, PositiveInt
 
 
 # --- APP ---
+class PipelineConfig(BaseModel):
+    vision_workers: PositiveInt = 1     # threads running preprocess + match
+    queue_size: PositiveInt = 1         # frames waiting for vision; oldest dropped when full
+    stats_interval_s: float = 60.0      # pipeline stats log line (0 disables)
+
+class AdaptiveScanConfig(BaseModel):
+    enabled: bool = False
+    min_interval_s: PositiveFloat = 0.5   # used right after a hit / near-miss
+    max_interval_s: PositiveFloat = 10.0  # ceiling while nothing happens
+    speedup: float = 0.7                  # frame changed: factor back down toward the base
+    backoff: float = 1.25                 # interval factor per quiet scan
+    idle_ticks: PositiveInt = 3           # quiet scans before backing off
+
 class AppConfig(BaseModel):
     dry_run: bool = True
-    scan_interval_sec: PositiveFloat = 3.5
+    scan_interval_sec: PositiveFloat = 3.5  # fixed period, or the start point when adaptive
     cooldown_sec: PositiveFloat = 2.0
+    pipeline: PipelineConfig = PipelineConfig()
+    adaptive: AdaptiveScanConfig = AdaptiveScanConfig()
 
 # --- WINDOW ---
 class WindowConfig(BaseModel):
-    title_regex: str
+    title_regex: str | list[str]    # several regexes = several targets (list order = priority)
     require_foreground: bool = True
+    match_all: bool = False         # every matching window is a target, not just the first
+    schedule: Literal["round_robin", "priority"] = "round_robin"
+    priority_boost: float = 4.0     # priority: weight multiplier after a hit / near-miss
+    rescan_s: float = 2.0           # re-enumerate windows at most this often while looking for more
+
+    @property
+    def patterns(self) -> list[str]:
+        return [self.title_regex] if isinstance(self.title_regex, str) else list(self.title_regex)
 
 # --- CAPTURE ---
+class ReplayConfig(BaseModel):
+    path: Path | None = None  # directory of frames or a video file
+    fps: float = 0.0          # > 0 paces frames in real time, 0 = as fast as possible
+    loop: bool = False
+    prefetch: int = 8         # decoded frames buffered ahead of grab()
+
 class CaptureConfig(BaseModel):
-    backend: Literal["dxcam", "mss"] = "dxcam"
+    backend: Literal["dxcam", "mss", "replay"] = "dxcam"
     capture_window_only: bool = True
+    output: Literal["bgr", "gray"] = "bgr"  # gray converts straight from BGRA
+    buffers: PositiveInt = 4                 # reusable frame buffers per backend
+    replay: ReplayConfig = ReplayConfig()
 
 # --- VISION ---
 class CannyConfig(BaseModel):
     low: int = 60
     high: int = 160
     blur_ksize: int = 3  # 0 disables
+    incremental: bool = False  # keep gray/edges per tile and redo only the tiles that changed
+    tile_px: int = 64
 
 class MatchConfig(BaseModel):
+    backend: Literal["opencv", "fft"] = "opencv"
     method: str = "TM_CCOEFF_NORMED"
     threshold: float = 0.5
     near_miss: float = 0.4
     scales: list[float] = Field(default_factory=lambda: [1.0])
     confirm_hits: int = 1
     min_trigger_interval_s: float = 10.0
+    search: Literal["full", "pyramid"] = "full"
+    pyramid_levels: int = 2       # each level halves the frame for the coarse pass
+    pyramid_candidates: int = 3   # coarse peaks refined at full resolution
+    workers: int = 0              # >1 fans (template, scale) jobs out to a thread pool
+    fft_cache_mb: int = 256       # template spectra cache for the fft backend
+    max_instances: int = 1        # >1 finds every instance (match_all + NMS), one action each
+    nms_iou: float = 0.3          # overlap above which two instances are the same one
+
+class TrackingConfig(BaseModel):
+    enabled: bool = False
+    pad_px: int = 48        # search margin around the last hit
+    log_every: int = 100    # frames between ROI hit/miss log lines (0 disables)
+
+class ChangeConfig(BaseModel):
+    enabled: bool = False
+    thumb_width: int = 96                # thumbnail width used for the diff
+    pixel_delta: int = 12                # per-pixel difference that counts as "changed"
+    min_changed_fraction: float = 0.002  # share of changed thumbnail pixels to re-run vision
+    max_skip: int = 0                    # force a full pass after N skips (0 = never)
+
+class TemplateCacheConfig(BaseModel):
+    enabled: bool = True
+    dir: Path = Path("artifacts/template_cache")  # one compiled .npz per pack
+
+class HotReloadConfig(BaseModel):
+    enabled: bool = False
+    poll_s: float = 1.0  # how often the pack dir is stat'ed for edits
+
+class PrefilterConfig(BaseModel):
+    enabled: bool = False
+    color_space: Literal["hsv", "bgr"] = "hsv"
+    color_lower: list[int] | None = None  # 3 values; unset = no color test
+    color_upper: list[int] | None = None
+    min_color_fraction: float = 0.02   # share of in-range pixels that keeps a cell
+    min_edge_density: float = 0.08     # share of edge pixels that keeps a cell (0 = no test)
+    cell_px: int = 16                  # grid cell size
+    pad_px: int = 8                    # margin around a region (plus half the largest template)
+    max_coverage: float = 0.5          # regions covering more than this -> full-frame search
+    max_regions: int = 16              # more regions than this -> full-frame search
 
 class VisionConfig(BaseModel):
     templates_dir: Path = Path("templates")
@@ -43,6 +117,11 @@ class VisionConfig(BaseModel):
     mode: Literal["edges", "gray"] = "edges"
     canny: CannyConfig = CannyConfig()
     match: MatchConfig = MatchConfig()
+    tracking: TrackingConfig = TrackingConfig()
+    change: ChangeConfig = ChangeConfig()
+    template_cache: TemplateCacheConfig = TemplateCacheConfig()
+    hot_reload: HotReloadConfig = HotReloadConfig()
+    prefilter: PrefilterConfig = PrefilterConfig()
 
 
 class TemplatesConfig(BaseModel):
@@ -61,6 +140,8 @@ class ActionStep(BaseModel):
 
 class ActionsConfig(BaseModel):
     sequence: list[ActionStep] = Field(default_factory=list)
+    click_target: bool = True   # click the match center before running the sequence
+    spin_ms: float = 1.0        # busy-wait this close to each step deadline instead of sleeping
 
 # --- SAFETY ---
 class SafetyConfig(BaseModel):
@@ -69,10 +150,39 @@ class SafetyConfig(BaseModel):
     max_triggers_per_minute: PositiveInt = 6
 
 # --- DEBUG ---
+class FrameRingConfig(BaseModel):
+    enabled: bool = False
+    budget_mb: float = 32     # memory held by the ring; oldest frames evicted beyond it
+    scale: float = 0.5        # downscale factor applied on push
+    jpeg_quality: int = 0     # >0 keeps JPEG bytes instead of raw pixels (smaller, costs an encode)
+    flush_on: Literal["hit", "trigger", "manual"] = "trigger"
+    # Touch this file to dump the ring(s) now (any flush_on; the only flush for "manual").
+    dump_request_file: Path = Path("artifacts/dump_ring")
+
+class TraceConfig(BaseModel):
+    enabled: bool = False
+    path: Path = Path("artifacts/trace.jsonl")  # one JSON line per trigger
+
 class DebugConfig(BaseModel):
     save_debug_frames: bool = True
     save_on_match: bool = True
     save_on_near_miss: bool = True
+    out_dir: Path = Path("artifacts/debug_frames")
+    format: Literal["png", "jpg"] = "png"
+    png_level: int = 1       # 0-9; higher = smaller files, slower encode
+    jpeg_quality: int = 90
+    queue_size: int = 16     # pending writes; oldest dropped when full
+    quota_mb: float = 512    # total size kept under out_dir (0 = unlimited)
+    max_age_h: float = 72    # delete older artifacts (0 = keep forever)
+    ring: FrameRingConfig = FrameRingConfig()
+    trace: TraceConfig = TraceConfig()
+
+# --- METRICS ---
+class MetricsConfig(BaseModel):
+    enabled: bool = False
+    format: Literal["prom", "jsonl"] = "prom"
+    path: Path = Path("artifacts/metrics.prom")
+    interval_s: PositiveFloat = 10.0
 
 class Config(BaseModel):
     app: AppConfig
@@ -83,6 +193,7 @@ class Config(BaseModel):
     actions: ActionsConfig
     safety: SafetyConfig
     debug: DebugConfig
+    metrics: MetricsConfig = MetricsConfig()
 
 
 def load_config(path: Path) -> Config:
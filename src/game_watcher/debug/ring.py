@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from ..metrics import METRICS
+
+
+@dataclass(frozen=True)
+class RingEntry:
+    t: float                      # wall clock at push
+    image: np.ndarray | None      # downscaled copy (raw mode)
+    encoded: bytes | None = None  # JPEG bytes (compressed mode)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.encoded) if self.encoded is not None else self.image.nbytes
+
+
+class FrameRing:
+    """Fixed-budget history of recent frames for pre-trigger post-mortems.
+
+    Frames are downscaled by `scale` and, when `jpeg_quality` > 0, JPEG-encoded
+    on push. The oldest entries are evicted once the total exceeds `budget_mb`.
+    """
+
+    def __init__(self, budget_mb: float = 32, scale: float = 0.5, jpeg_quality: int = 0):
+        self.budget_bytes = max(1, int(budget_mb * 1024 * 1024))
+        self.scale = min(1.0, max(0.05, float(scale)))
+        self.jpeg_quality = int(jpeg_quality)
+        self._entries: deque[RingEntry] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def push(self, frame: np.ndarray) -> None:
+        entry = self._entry(frame)
+        with self._lock:
+            self._entries.append(entry)
+            self._bytes += entry.nbytes
+            while len(self._entries) > 1 and self._bytes > self.budget_bytes:
+                self._bytes -= self._entries.popleft().nbytes
+            METRICS.set("frame_ring_bytes", self._bytes)
+
+    def snapshot(self) -> list[RingEntry]:
+        """Entries oldest first. They are immutable, so the list is safe to hand off."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, frame: np.ndarray) -> RingEntry:
+        t = time.time()
+        if self.scale < 1.0:
+            h, w = frame.shape[:2]
+            size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame.copy()  # capture buffers are recycled
+        if self.jpeg_quality > 0:
+            ok, buf = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                return RingEntry(t, None, buf.tobytes())
+        return RingEntry(t, small)
+
+
+def create_frame_ring(ring_cfg) -> FrameRing | None:
+    if not ring_cfg.enabled:
+        return None
+    return FrameRing(ring_cfg.budget_mb, ring_cfg.scale, ring_cfg.jpeg_quality)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..metrics import METRICS
+from ..vision.debug import draw_match
+from ..vision.matcher import MatchResult
+from .artifacts import _ts
+from .ring import RingEntry
+
+logger = logging.getLogger(__name__)
+
+_EXTS = (".png", ".jpg")
+
+
+@dataclass(frozen=True)
+class ArtifactJob:
+    prefix: str
+    frame: np.ndarray | None             # private copy; annotated in the writer thread
+    match: MatchResult | None = None
+    label: str = ""
+    ring: tuple[RingEntry, ...] = ()     # pre-trigger history, written to its own folder
+
+
+class ArtifactWriter:
+    """Encodes and writes debug frames on a background thread.
+
+    The queue is bounded and drops the oldest pending job when full, so a burst
+    of near-misses costs the scan thread one memcpy per frame, never an encode.
+    Files under `out_dir` are pruned to `quota_mb` (oldest first) and `max_age_h`.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        fmt: str = "png",
+        png_level: int = 1,
+        jpeg_quality: int = 90,
+        queue_size: int = 16,
+        quota_mb: float = 512,
+        max_age_h: float = 72,
+    ):
+        self.out_dir = Path(out_dir)
+        self.ext = ".jpg" if fmt in ("jpg", "jpeg") else ".png"
+        if self.ext == ".png":
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, int(np.clip(png_level, 0, 9))]
+        else:
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, int(np.clip(jpeg_quality, 1, 100))]
+        self.maxsize = max(1, int(queue_size))
+        self.quota_bytes = int(quota_mb * 1024 * 1024) if quota_mb > 0 else 0  # 0 = no quota
+        self.max_age_s = float(max_age_h) * 3600 if max_age_h > 0 else 0.0     # 0 = keep forever
+
+        self._jobs: deque[ArtifactJob] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # (mtime, path, size) of files we know about, oldest first.
+        self._files: deque[tuple[float, Path, int]] = deque()
+        self._total_bytes = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.pruned = 0
+
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, prefix: str, frame: np.ndarray, match: MatchResult | None = None,
+               label: str = "") -> None:
+        # Capture buffers are pooled and recycled, so the writer needs its own copy.
+        self._enqueue(ArtifactJob(prefix, frame.copy(), match, label))
+
+    def submit_ring(self, prefix: str, entries: list[RingEntry]) -> None:
+        if entries:
+            self._enqueue(ArtifactJob(prefix, None, ring=tuple(entries)))
+
+    def _enqueue(self, job: ArtifactJob) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._jobs) >= self.maxsize:
+                self._jobs.popleft()
+                self.dropped += 1
+                METRICS.inc("artifacts_dropped_total")
+            self._jobs.append(job)
+            self._cond.notify()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting jobs, finish the pending ones and join the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        self._scan_existing()
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+            # One bad frame (annotate/encode error) must not stop the writer thread.
+            try:
+                self._write(job)
+            except Exception:
+                self.failed += 1
+                METRICS.inc("artifacts_failed_total")
+                logger.exception("Failed to write artifact job %s; continuing.", job.prefix)
+
+    def _write(self, job: ArtifactJob) -> None:
+        if job.ring:
+            self._write_ring(job)
+            return
+        img = job.frame
+        if job.match is not None:
+            img = draw_match(img, job.match, job.label)
+        path = self.out_dir / f"{job.prefix}_{_ts()}{self.ext}"
+        with METRICS.timer("artifact_write_seconds"):
+            try:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                ok = cv2.imwrite(str(path), img, self.params)
+            except (OSError, cv2.error) as e:
+                logger.warning("Failed to write artifact %s: %s", path, e)
+                ok = False
+        self._account(path, ok)
+        self._prune()
+
+    def _write_ring(self, job: ArtifactJob) -> None:
+        folder = self.out_dir / f"{job.prefix}_{_ts()}"
+        with METRICS.timer("artifact_write_seconds"):
+            try:
+                folder.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning("Failed to create %s: %s", folder, e)
+                return
+            t_last = job.ring[-1].t
+            for i, e in enumerate(job.ring):
+                # Name frames by their offset to the newest one, e.g. 003_-1.250s.
+                stem = f"{i:03d}_{e.t - t_last:+.3f}s"
+                try:
+                    if e.encoded is not None:
+                        path = folder / f"{stem}.jpg"
+                        path.write_bytes(e.encoded)
+                        ok = True
+                    else:
+                        path = folder / f"{stem}{self.ext}"
+                        ok = cv2.imwrite(str(path), e.image, self.params)
+                except (OSError, cv2.error) as err:
+                    logger.warning("Failed to write artifact %s: %s", path, err)
+                    ok = False
+                self._account(path, ok)
+        self._prune()
+
+    def _account(self, path: Path, ok: bool) -> None:
+        if not ok:
+            self.failed += 1
+            METRICS.inc("artifacts_failed_total")
+            return
+        self.written += 1
+        METRICS.inc("artifacts_written_total")
+        size = path.stat().st_size
+        self._files.append((time.time(), path, size))
+        self._total_bytes += size
+
+    def _scan_existing(self) -> None:
+        if not self.out_dir.is_dir():
+            return
+        found = []
+        for p in self.out_dir.rglob("*"):
+            if p.suffix.lower() in _EXTS and p.is_file():
+                st = p.stat()
+                found.append((st.st_mtime, p, st.st_size))
+        found.sort()
+        self._files.extend(found)
+        self._total_bytes = sum(f[2] for f in found)
+        self._prune()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.max_age_s if self.max_age_s else None
+        while self._files:
+            mtime, path, size = self._files[0]
+            expired = cutoff is not None and mtime < cutoff
+            over = self.quota_bytes and self._total_bytes > self.quota_bytes
+            if not (expired or over):
+                break
+            self._files.popleft()
+            self._total_bytes -= size
+            try:
+                path.unlink(missing_ok=True)
+                self.pruned += 1
+                if path.parent != self.out_dir and not any(path.parent.iterdir()):
+                    path.parent.rmdir()  # emptied ring dump folder
+            except OSError as e:
+                logger.warning("Failed to prune artifact %s: %s", path, e)
+        METRICS.set("artifacts_bytes", self._total_bytes)
+
+
+def create_artifact_writer(debug_cfg) -> ArtifactWriter | None:
+    wanted = debug_cfg.save_on_match or debug_cfg.save_on_near_miss or debug_cfg.ring.enabled
+    if not (debug_cfg.save_debug_frames and wanted):
+        return None
+    return ArtifactWriter(
+        debug_cfg.out_dir,
+        fmt=debug_cfg.format,
+        png_level=debug_cfg.png_level,
+        jpeg_quality=debug_cfg.jpeg_quality,
+        queue_size=debug_cfg.queue_size,
+        quota_mb=debug_cfg.quota_mb,
+        max_age_h=debug_cfg.max_age_h,
+    )
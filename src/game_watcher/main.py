@@ -8,6 +8,7 @@ from game_watcher.command.command import create_command
 
 from .config_model import load_config
 from .logging_setup import setup_logging
+from .metrics import start_metrics
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -29,6 +30,27 @@ def build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument("--frame-interval", type=float, default=1.0, help="Seconds between frames in --diag-capture")
     
     p.add_argument("--match-pic", type=str, help="Test templates against static image (path to image file)")
+    p.add_argument("--match-dir", type=str,
+                   help="Match every image in a directory against the active pack")
+    p.add_argument("--match-out", type=str, default="artifacts/match_dir.csv",
+                   help="Results file for --match-dir (.csv or .jsonl)")
+    p.add_argument("--match-workers", type=int,
+                   help="Worker processes for --match-dir / --calibrate (default: CPU count)")
+    p.add_argument("--calibrate", type=str,
+                   help="Sweep thresholds over a labeled frame CSV "
+                        "(image,label[,template][,x,y,w,h])")
+    p.add_argument("--calibrate-out", type=str, default="artifacts/calibration.json",
+                   help="Report path for --calibrate (PR curves go next to it as .curves.csv)")
+    p.add_argument("--min-precision", type=float, default=0.99,
+                   help="Precision the recommended --calibrate threshold must reach")
+
+    p.add_argument("--bench", action="store_true",
+                   help="Benchmark capture + vision stages and print a JSON report")
+    p.add_argument("--bench-frames", type=int, default=100,
+                   help="Number of frames to run in --bench")
+    p.add_argument("--bench-out", type=str, help="Also write the --bench JSON report to this path")
+    p.add_argument("--trace-summary", type=str, metavar="PATH",
+                   help="Print latency percentiles from a debug.trace JSONL file and exit")
     
     return p
 
@@ -48,5 +70,11 @@ def main() -> int:
     if args.dry_run:
         cfg.app.dry_run = True
 
+    exporter = start_metrics(cfg.metrics)
+
     command = create_command(args)
-    return command.execute(cfg, logger)
\ No newline at end of file
+    try:
+        return command.execute(cfg, logger)
+    finally:
+        if exporter is not None:
+            exporter.stop()
\ No newline at end of file
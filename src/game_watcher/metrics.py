@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import Literal
+
+# Latency buckets in seconds: 0.5 ms .. 5 s.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+_NULL_CTX = nullcontext()
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: LabelKey, extra: tuple[str, str] | None = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Gauge:
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Timer(AbstractContextManager):
+    __slots__ = ("_hist", "_t0")
+
+    def __init__(self, hist: Histogram) -> None:
+        self._hist = hist
+
+    def __enter__(self) -> _Timer:
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._hist.observe(time.perf_counter() - self._t0)
+
+
+class MetricsRegistry:
+    """Process-wide counters and latency histograms.
+
+    While disabled every call is a flag check returning a shared no-op, so
+    instrumentation can stay on the hot path.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._counters: dict[tuple[str, LabelKey], Counter] = {}
+        self._gauges: dict[tuple[str, LabelKey], Gauge] = {}
+        self._histograms: dict[tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, n: float = 1.0, **labels: object) -> None:
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        c = self._counters.get(key)
+        if c is None:
+            with self._lock:
+                c = self._counters.setdefault(key, Counter())
+        c.inc(n)
+
+    def set(self, name: str, value: float, **labels: object) -> None:
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        g = self._gauges.get(key)
+        if g is None:
+            with self._lock:
+                g = self._gauges.setdefault(key, Gauge())
+        g.set(value)
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        if not self.enabled:
+            return
+        self._histogram(name, labels).observe(value)
+
+    def timer(self, name: str, **labels: object) -> AbstractContextManager:
+        if not self.enabled:
+            return _NULL_CTX
+        return _Timer(self._histogram(name, labels))
+
+    def _histogram(self, name: str, labels: dict[str, object]) -> Histogram:
+        key = (name, _label_key(labels))
+        h = self._histograms.get(key)
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(key, Histogram())
+        return h
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+            histograms = list(self._histograms.items())
+        out: dict = {"counters": {}, "gauges": {}, "histograms": {}}
+        for (name, labels), c in counters:
+            out["counters"][name + _fmt_labels(labels)] = c.value
+        for (name, labels), g in gauges:
+            out["gauges"][name + _fmt_labels(labels)] = g.value
+        for (name, labels), h in histograms:
+            out["histograms"][name + _fmt_labels(labels)] = {
+                "count": h.count,
+                "sum": round(h.sum, 6),
+                "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.counts, strict=True)),
+            }
+        return out
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items(), key=lambda kv: kv[0])
+            gauges = sorted(self._gauges.items(), key=lambda kv: kv[0])
+            histograms = sorted(self._histograms.items(), key=lambda kv: kv[0])
+        lines: list[str] = []
+        typed: set[str] = set()
+        for (name, labels), c in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_fmt_labels(labels)} {c.value:g}")
+        for (name, labels), g in gauges:
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_fmt_labels(labels)} {g.value:g}")
+        for (name, labels), h in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for le, n in zip([*map(str, h.buckets), "+Inf"], h.counts, strict=True):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {h.sum:.6f}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+class MetricsExporter:
+    """Periodically writes the registry to a Prometheus text file or appends JSONL snapshots."""
+
+    def __init__(self, registry: MetricsRegistry, path: Path,
+                 fmt: Literal["prom", "jsonl"] = "prom", interval_s: float = 10.0):
+        self.registry = registry
+        self.path = Path(path)
+        self.fmt = fmt
+        self.interval_s = max(0.1, float(interval_s))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="metrics-export", daemon=True)
+
+    def start(self) -> MetricsExporter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self.write()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.write()
+
+    def write(self) -> None:
+        if self.fmt == "jsonl":
+            rec = {"ts": round(time.time(), 3), **self.registry.snapshot()}
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(self.registry.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def start_metrics(metrics_cfg) -> MetricsExporter | None:
+    METRICS.enabled = bool(metrics_cfg.enabled)
+    if not METRICS.enabled:
+        return None
+    return MetricsExporter(
+        METRICS, metrics_cfg.path, metrics_cfg.format, metrics_cfg.interval_s
+    ).start()
@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Generic, Optional, TypeVar
+
+import numpy as np
+
+from .actions import create_action_runner
+from .capture import Region, create_capture_backend
+from .debug.writer import create_artifact_writer
+from .metrics import METRICS
+from .scheduler import AdaptiveScheduler, WindowScheduler
+from .trace import Span, create_trace_writer
+from .vision.matcher import MatchResult, create_matcher
+from .vision.template_cache import load_pack
+from .vision.template_watch import create_template_watcher
+from .vision.trigger_gate import Vision, analyze_frame, create_window_vision, decide
+from .windowing.service import WindowService, create_window_service
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Frame:
+    seq: int                # monotonic per run
+    t_capture: float        # perf_counter() right after grab
+    image: np.ndarray
+    client_left: int
+    client_top: int
+    window: Hashable = 0    # target key (hwnd) the frame was grabbed from
+    span: Span | None = None  # latency marks, only when debug.trace is enabled
+
+
+@dataclass(frozen=True)
+class Target:
+    key: Hashable           # hwnd, or "replay"
+    rank: int               # index of the title_regex that matched (priority)
+
+
+@dataclass(frozen=True)
+class Analysis:
+    frame: Frame
+    best: Optional[MatchResult]
+    reused: bool
+    t_done: float
+    instances: tuple[MatchResult, ...] = ()
+    forced: bool = False    # matched only because the change detector's max_skip ran out
+
+
+class LatestFrameQueue(Generic[T]):
+    """Bounded queue where a put on a full queue evicts the oldest item (latest frame wins)."""
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = max(1, int(maxsize))
+        self._items: deque[T] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: T) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                METRICS.inc("frames_dropped_total")
+            self._items.append(item)
+            METRICS.set("frame_queue_depth", len(self._items))
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None) -> T | None:
+        """Next item, or None on timeout / when closed and drained."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            METRICS.set("frame_queue_depth", len(self._items))
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _StageStats:
+    """Running count/mean/max per stage for periodic log lines (bounded memory)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        METRICS.observe("pipeline_stage_seconds", seconds, stage=stage)
+        with self._lock:
+            d = self._data.setdefault(stage, [0, 0.0, 0.0])
+            d[0] += 1
+            d[1] += seconds
+            d[2] = max(d[2], seconds)
+
+    def line_and_reset(self) -> str:
+        with self._lock:
+            data, self._data = self._data, {}
+        parts = [
+            f"{k}={v[1] / v[0] * 1000:.1f}/{v[2] * 1000:.1f}ms"
+            for k, v in sorted(data.items())
+            if v[0]
+        ]
+        return " ".join(parts) if parts else "-"
+
+
+class RunLoop:
+    """Capture producer -> vision worker(s) -> single gate thread.
+
+    Capture runs on its own thread at the scan interval and hands frames to the
+    vision workers through a LatestFrameQueue, so a slow match never delays the
+    next grab; stale frames are dropped instead of queued. Gate decisions run on
+    the calling thread, in capture order.
+
+    With several window targets (a list of title regexes and/or
+    window.match_all) every tick scans one window picked by a WindowScheduler,
+    at interval / n_windows so each window keeps its own cadence. The
+    template bank, matcher and artifact writer are shared; gate, ROI tracker,
+    change detector and frame ring are per window.
+
+    The interval is app.scan_interval_sec, or with app.adaptive an
+    AdaptiveScheduler driven by every decision (shared by all windows).
+    """
+
+    def __init__(self, cfg, logger, vision: Vision | None = None,
+                 windows: WindowService | None = None):
+        self.cfg = cfg
+        self.logger = logger
+        # Window lookups go through a cache; pass a service over a fake backend to run headless.
+        if windows is None and cfg.capture.backend != "replay":
+            windows = create_window_service(cfg.window)
+        self.windows = windows
+
+        if vision is None:
+            bank = load_pack(cfg.vision.templates_dir / cfg.vision.active_pack, cfg.vision)
+            self.matcher = create_matcher(bank, cfg.vision.match)
+            self.artifacts = create_artifact_writer(cfg.debug)
+            self.actions = create_action_runner(cfg, logger)
+            self.trace = create_trace_writer(cfg.debug.trace)
+            self.templates = create_template_watcher(cfg.vision, self.matcher,
+                                                     self._templates_swapped)
+            if not self._multi_window():
+                vision = create_window_vision(cfg, self.matcher, self.artifacts,
+                                              actions=self.actions, trace=self.trace)
+        else:
+            self.matcher, self.artifacts = vision.matcher, vision.artifacts
+            self.actions, self.trace = vision.actions, vision.trace
+            self.templates = None
+        # Single-window mode serves every frame from this one Vision.
+        self.vision = vision
+        self.visions: dict[Hashable, Vision] = {}
+        self._visions_lock = threading.Lock()
+        self.scheduler = WindowScheduler(cfg.window.schedule, cfg.window.priority_boost)
+        ad = cfg.app.adaptive
+        self.adaptive = None
+        if ad.enabled:
+            self.adaptive = AdaptiveScheduler(
+                cfg.app.scan_interval_sec, ad.min_interval_s, ad.max_interval_s,
+                ad.speedup, ad.backoff, ad.idle_ticks,
+            )
+
+        pipe = cfg.app.pipeline
+        self.frames: LatestFrameQueue[Frame] = LatestFrameQueue(pipe.queue_size)
+        self.results: queue.Queue[Analysis] = queue.Queue()
+        self.n_workers = max(1, int(pipe.vision_workers))
+        self.stats_interval_s = float(pipe.stats_interval_s)
+
+        # Frames in flight: queued + one per vision worker + one being decided
+        # + the one being captured. Fewer pooled buffers means overwritten frames.
+        in_flight = pipe.queue_size + self.n_workers + 2
+        self.capture_buffers = cfg.capture.buffers
+        if cfg.capture.backend != "replay" and cfg.capture.buffers < in_flight:
+            logger.warning("capture.buffers=%d < %d frames in flight; raising it.",
+                           cfg.capture.buffers, in_flight)
+            self.capture_buffers = in_flight
+
+        self.stop_event = threading.Event()
+        if self.actions is not None and self.actions.safety is not None:
+            self.actions.safety.on_kill = self.stop  # the kill switch is a hard stop
+        self._wake = threading.Event()
+        self.dump_event = threading.Event()
+        ring = cfg.debug.ring
+        self.dump_request_file = ring.dump_request_file if ring.enabled else None
+        self.stats = _StageStats()
+        self._seq = 0
+        self._last_seq: dict[Hashable, int] = {}
+        self.captured = 0
+        self.capture_failures = 0
+        self.decided = 0
+        self.stale = 0
+        self.skipped_action = 0
+
+    def _scan_interval(self) -> float:
+        if self.adaptive is not None:
+            return self.adaptive.interval
+        return float(self.cfg.app.scan_interval_sec)
+
+    def _adapt(self, vision: Vision, a: Analysis) -> None:
+        m = self.cfg.vision.match
+        if a.best is not None and a.best.score >= m.threshold:
+            signal = "hit"
+        elif a.best is not None and a.best.score >= m.near_miss:
+            signal = "near"
+        elif vision.change is not None and not a.reused and not a.forced:
+            signal = "changed"  # only meaningful when the change detector runs
+        else:
+            signal = "idle"
+        old = self.adaptive.interval
+        if self.adaptive.observe(signal) < old:
+            self._wake.set()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self._wake.set()
+
+    def _templates_swapped(self, bank, names: set[str]) -> None:
+        # Watcher thread. A static screen would keep reusing a result from the old bank.
+        with self._visions_lock:
+            visions = [self.vision] if self.vision is not None else list(self.visions.values())
+        for v in visions:
+            if v.prefilter is not None:
+                v.prefilter.fit(bank)
+            if v.change is not None:
+                with v.lock:
+                    v.change.invalidate()
+
+    def _multi_window(self) -> bool:
+        w = self.cfg.window
+        return self.windows is not None and (w.match_all or len(w.patterns) > 1)
+
+    def _vision_for(self, key: Hashable) -> Vision | None:
+        if self.vision is not None:
+            return self.vision
+        with self._visions_lock:
+            return self.visions.get(key)
+
+    def _sync_visions(self, targets: list[Target]) -> None:
+        """Create state for new windows and forget windows that went away."""
+        if self.vision is not None:
+            return
+        live = {t.key for t in targets}
+        with self._visions_lock:
+            for key in [k for k in self.visions if k not in live]:
+                del self.visions[key]
+                self._last_seq.pop(key, None)
+                self.logger.info("Window %x is gone; dropped its state.", key)
+            for key in live - self.visions.keys():
+                self.visions[key] = create_window_vision(
+                    self.cfg, self.matcher, self.artifacts, name=f"{key:x}", actions=self.actions,
+                    trace=self.trace,
+                )
+                self.logger.info("Watching window %x.", key)
+
+    # --- capture producer ---
+    def _resolve_targets(self) -> list[Target]:
+        if self.windows is None:
+            return [Target("replay", 0)]
+
+        w = self.cfg.window
+        found = self.windows.targets()
+        targets = [
+            Target(hwnd, rank) for hwnd, rank in found
+            if not w.require_foreground or self.windows.is_foreground(hwnd)
+        ]
+        if not found:
+            self.logger.warning("No windows matched title_regex=%s", w.title_regex)
+        elif not targets:
+            self.logger.debug("Window not in foreground; skipping capture.")
+        return targets
+
+    def _region(self, target: Target) -> Region:
+        if target.key == "replay":
+            return Region(left=0, top=0, width=0, height=0)
+
+        win = self.windows.client(target.key)
+        return Region(left=win.client_left, top=win.client_top,
+                      width=win.client_width, height=win.client_height)
+
+    def _capture_loop(self) -> None:
+        cap = create_capture_backend(
+            self.cfg.capture.backend,
+            self.cfg.capture.replay,
+            self.cfg.capture.output,
+            self.capture_buffers,
+        )
+        try:
+            while not self.stop_event.is_set():
+                t0 = time.perf_counter()
+                targets = self._resolve_targets()
+                self._sync_visions(targets)
+                key = self.scheduler.pick([(t.key, t.rank) for t in targets])
+                region = None
+                if key is not None:
+                    region = self._region(next(t for t in targets if t.key == key))
+                span = None
+                if self.trace is not None and region is not None:
+                    span = Span(self._seq + 1, key)
+                    span.mark("grab")
+                img = cap.grab(region) if region is not None else None
+                t_grab = time.perf_counter()
+                self.stats.add("capture", t_grab - t0)
+
+                if img is not None:
+                    self._seq += 1
+                    self.captured += 1
+                    if span is not None:
+                        span.mark("captured", t_grab)
+                    self.frames.put(Frame(self._seq, t_grab, img, region.left, region.top, key,
+                                          span))
+                elif region is not None:
+                    self.capture_failures += 1
+                    if getattr(cap, "exhausted", False):
+                        self.logger.info("Replay finished after %d frames.", self.captured)
+                        break
+                    self.logger.error("Capture failed (backend=%s).", self.cfg.capture.backend)
+
+                # Ticks start one period apart; if a tick overran, start the next
+                # one now rather than bursting to catch up. The period is split
+                # across windows so each one is still scanned every interval.
+                # The adaptive interval can shrink mid-wait (wake), so re-check.
+                while not self.stop_event.is_set():
+                    period = self._scan_interval() / max(1, len(targets))
+                    remaining = t0 + period - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(remaining)
+                    self._wake.clear()
+        except Exception:
+            self.logger.exception("Capture thread crashed.")
+        finally:
+            self.frames.close()
+            try:
+                cap.close()
+            except Exception:
+                pass
+
+    # --- vision consumers ---
+    def _vision_loop(self) -> None:
+        while True:
+            frame = self.frames.get(timeout=0.25)
+            if frame is None:
+                if self.frames.closed or self.stop_event.is_set():
+                    return
+                continue
+            vision = self._vision_for(frame.window)
+            if vision is None:
+                continue  # window closed while the frame was queued
+            t0 = time.perf_counter()
+            self.stats.add("queue_wait", t0 - frame.t_capture)
+            if frame.span is not None:
+                frame.span.mark("dequeued", t0)
+            try:
+                best, reused, instances, forced = analyze_frame(
+                    self.cfg, vision, frame.image, self.logger, frame.span)
+            except Exception:
+                self.logger.exception("Vision worker failed on frame #%d.", frame.seq)
+                continue
+            t1 = time.perf_counter()
+            self.stats.add("vision", t1 - t0)
+            self.results.put(Analysis(frame, best, reused, t1, instances, forced))
+
+    # --- gate (caller's thread) ---
+    def _decide(self, a: Analysis) -> None:
+        key = a.frame.window
+        vision = self._vision_for(key)
+        # With several workers results can arrive out of order; never step a
+        # window's gate backwards in time.
+        if vision is None or a.frame.seq <= self._last_seq.get(key, 0):
+            self.stale += 1
+            METRICS.inc("frames_stale_total")
+            return
+        # Frames grabbed before the last action plan finished show the screen as
+        # it was before the clicks; deciding on them would re-trigger on old state.
+        if self.actions is not None and self.actions.stale(a.frame.t_capture):
+            self.skipped_action += 1
+            METRICS.inc("frames_skipped_total", reason="action")
+            self._last_seq[key] = a.frame.seq
+            return
+        t0 = time.perf_counter()
+        decide(self.cfg, vision, a.frame.image, a.best, a.reused,
+               a.frame.client_left, a.frame.client_top, self.logger, a.instances, a.frame.span)
+        active = a.best is not None and a.best.score >= self.cfg.vision.match.near_miss
+        self.scheduler.report(key, active)
+        if self.adaptive is not None:
+            self._adapt(vision, a)
+        if self.dump_request_file is not None and self.dump_request_file.exists():
+            self.dump_request_file.unlink(missing_ok=True)
+            self.request_dump()
+        if self.dump_event.is_set():
+            self.dump_event.clear()
+            visions = [self.vision] if self.vision is not None else list(self.visions.values())
+            n = sum(v.dump_ring(f"ring_manual_{v.name}" if v.name else "ring_manual")
+                    for v in visions)
+            self.logger.info("Dumped %d buffered frames on request.", n)
+        self.stats.add("gate", time.perf_counter() - t0)
+        self.decided += 1
+        self._last_seq[key] = a.frame.seq
+
+    def request_dump(self) -> None:
+        """Ask the gate thread to write out the frame ring(s) at the next decision.
+
+        Users trigger it by touching debug.ring.dump_request_file.
+        """
+        self.dump_event.set()
+
+    def run(self) -> int:
+        threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        threads += [
+            threading.Thread(target=self._vision_loop, name=f"vision-{i}", daemon=True)
+            for i in range(self.n_workers)
+        ]
+        for t in threads:
+            t.start()
+        workers = threads[1:]
+        if self.templates is not None:
+            self.templates.start()
+
+        next_stats = time.monotonic() + self.stats_interval_s
+        try:
+            while True:
+                try:
+                    a = self.results.get(timeout=0.25)
+                except queue.Empty:
+                    a = None
+                if a is not None:
+                    self._decide(a)
+                elif not any(t.is_alive() for t in workers):
+                    break
+
+                if self.stats_interval_s > 0 and time.monotonic() >= next_stats:
+                    self._log_stats()
+                    next_stats = time.monotonic() + self.stats_interval_s
+        except KeyboardInterrupt:
+            self.logger.warning("Interrupted; stopping.")
+        finally:
+            self.stop()
+            if self.templates is not None:
+                self.templates.stop()
+            self.frames.close()
+            for t in threads:
+                t.join(timeout=2.0)
+            # Shared by every window's Vision; close once.
+            if self.actions is not None:
+                self.actions.close()
+            self.matcher.close()
+            if self.artifacts is not None:
+                self.artifacts.close()
+            if self.trace is not None:
+                self.trace.close()
+                self.logger.info("Wrote %d trigger spans to %s.", self.trace.written,
+                                 self.trace.path)
+            self._log_stats()
+        return 0
+
+    def _log_stats(self) -> None:
+        windows = 1 if self.vision is not None else len(self.visions)
+        self.logger.info(
+            "pipeline: windows=%d interval=%.2fs captured=%d failed=%d dropped=%d stale=%d "
+            "during_action=%d decided=%d queue=%d | %s",
+            windows, self._scan_interval(), self.captured, self.capture_failures,
+            self.frames.dropped, self.stale, self.skipped_action, self.decided, len(self.frames),
+            self.stats.line_and_reset(),
+        )
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from .limits import RateLimiter
+from .switch import SafetySwitch, create_safety_switch
+
+__all__ = ["RateLimiter", "SafetySwitch", "create_safety_switch"]
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+
+class RateLimiter:
+    """At most `max_events` per sliding `window_s`; `allow()` consumes a slot when it says yes."""
+
+    def __init__(self, max_events: int, window_s: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_events = max(1, int(max_events))
+        self.window_s = float(window_s)
+        self._clock = clock
+        self._events: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        now = self._clock()
+        with self._lock:
+            while self._events and now - self._events[0] >= self.window_s:
+                self._events.popleft()
+            if len(self._events) >= self.max_events:
+                return False
+            self._events.append(now)
+            return True
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def _hotkey(name: str) -> str:
+    # pynput hotkey syntax: named keys in angle brackets, characters as-is.
+    name = name.strip().lower()
+    return name if len(name) == 1 else f"<{name}>"
+
+
+class SafetySwitch:
+    """Kill switch and pause toggle, bound to global hotkeys by `start`.
+
+    `kill()` is final: input stays blocked and `on_kill` (e.g. RunLoop.stop) is
+    called once. `toggle_pause()` blocks and unblocks input. The action runner
+    checks `allow_input` before each trigger and before each plan step, so a
+    plan already playing stops at the next step.
+    """
+
+    def __init__(self, on_kill: Callable[[], None] | None = None):
+        self.on_kill = on_kill
+        self._killed = threading.Event()
+        self._paused = threading.Event()
+        self._listener = None
+
+    @property
+    def killed(self) -> bool:
+        return self._killed.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused.is_set()
+
+    @property
+    def allow_input(self) -> bool:
+        return not (self._killed.is_set() or self._paused.is_set())
+
+    def kill(self) -> None:
+        if self._killed.is_set():
+            return
+        self._killed.set()
+        logger.warning("Kill switch pressed: input disabled, stopping.")
+        if self.on_kill is not None:
+            self.on_kill()
+
+    def toggle_pause(self) -> None:
+        if self._paused.is_set():
+            self._paused.clear()
+            logger.warning("Resumed: input enabled.")
+        else:
+            self._paused.set()
+            logger.warning("Paused: input disabled until the pause key is pressed again.")
+
+    def start(self, kill_key: str, pause_key: str) -> None:
+        """Listen for the hotkeys on a pynput thread; raises if that is not possible."""
+        from pynput import keyboard
+
+        self._listener = keyboard.GlobalHotKeys({
+            _hotkey(kill_key): self.kill,
+            _hotkey(pause_key): self.toggle_pause,
+        })
+        self._listener.start()
+        logger.info("Safety hotkeys: kill=%s pause=%s", kill_key, pause_key)
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def create_safety_switch(cfg) -> SafetySwitch:
+    """Hotkeys are mandatory for live input; dry-run works without them."""
+    switch = SafetySwitch()
+    try:
+        switch.start(cfg.safety.kill_switch_key, cfg.safety.pause_toggle_key)
+    except Exception as e:
+        if not cfg.app.dry_run:
+            raise RuntimeError(
+                f"Refusing live input: kill switch / pause hotkeys unavailable ({e!r})."
+            ) from e
+        logger.warning("Safety hotkeys unavailable (%r); dry-run only.", e)
+    return switch
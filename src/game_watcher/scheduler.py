@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Hashable, Sequence
+
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class WindowScheduler:
+    """Picks which window target the next scan tick goes to.
+
+    Every target accrues "due" time since its last scan, weighted by its
+    priority; the largest wins. With equal weights (round_robin) that is plain
+    least-recently-scanned rotation, which stays fair as windows come and go.
+    In priority mode, weight falls with the target's rank (order of the
+    title_regex list) and is multiplied by `boost` while its last result was a
+    hit or near-miss, so an active client is revisited sooner.
+    """
+
+    def __init__(self, policy: str = "round_robin", boost: float = 4.0):
+        self.policy = policy
+        self.boost = max(1.0, float(boost))
+        self._last_scan: dict[Hashable, float] = {}
+        self._active: dict[Hashable, bool] = {}
+        self._lock = threading.Lock()
+
+    def pick(self, targets: Sequence[tuple[Hashable, int]], now: float | None = None):
+        """Key of the target to scan now. `targets` holds (key, rank) pairs."""
+        if not targets:
+            return None
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            live = {k for k, _ in targets}
+            for k in [k for k in self._last_scan if k not in live]:
+                del self._last_scan[k]
+                self._active.pop(k, None)
+
+            def due(item: tuple[Hashable, int]) -> float:
+                key, rank = item
+                # Never-scanned targets go first, in list order.
+                waited = now - self._last_scan.get(key, float("-inf"))
+                if self.policy != "priority":
+                    return waited
+                weight = 1.0 / (1 + rank)
+                if self._active.get(key):
+                    weight *= self.boost
+                return waited * weight
+
+            key = max(targets, key=due)[0]
+            self._last_scan[key] = now
+            return key
+
+    def report(self, key: Hashable, active: bool) -> None:
+        """Feed back whether the latest scan of `key` was a hit or near-miss."""
+        with self._lock:
+            if key in self._last_scan:
+                self._active[key] = active
+
+
+class AdaptiveScheduler:
+    """Scan interval that follows recent results instead of a fixed period.
+
+    A hit or near-miss snaps straight to `min_s` (the label is probably about to
+    show up). A changed-but-missed frame only pulls the interval back toward
+    `base_s` (by `speedup` from above, `backoff` from below) and leaves the
+    idle count alone: animated games change nearly every frame, which must not
+    pin the scan rate at `min_s`. After `idle_ticks` consecutive quiet scans
+    it grows by `backoff` per scan, up to `max_s`. Every change is logged with
+    its reason.
+    """
+
+    def __init__(
+        self,
+        base_s: float,
+        min_s: float,
+        max_s: float,
+        speedup: float = 0.7,
+        backoff: float = 1.25,
+        idle_ticks: int = 3,
+    ):
+        self.min_s = float(min_s)
+        self.max_s = max(self.min_s, float(max_s))
+        self.speedup = min(1.0, max(0.05, float(speedup)))
+        self.backoff = max(1.0, float(backoff))
+        self.idle_ticks = max(1, int(idle_ticks))
+        self.base_s = self._clamp(base_s)
+        self._interval = self.base_s
+        self._idle = 0
+        self._lock = threading.Lock()
+        self.changes = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def observe(self, signal: str) -> float:
+        """Feed one scan outcome: "hit", "near", "changed" or "idle". Returns the new interval."""
+        with self._lock:
+            old = self._interval
+            if signal in ("hit", "near"):
+                self._idle = 0
+                new, reason = self.min_s, signal
+            elif signal == "changed":
+                new, reason = old, "frame changed"
+                if old > self.base_s:
+                    new = max(self.base_s, old * self.speedup)
+                elif old < self.base_s:
+                    new = min(self.base_s, old * self.backoff)
+            else:
+                self._idle += 1
+                new, reason = old, "idle"
+                if self._idle >= self.idle_ticks:
+                    new = old * self.backoff
+                    reason = f"idle x{self._idle}"
+            new = self._clamp(new)
+            self._interval = new
+
+        METRICS.set("scan_interval_seconds", new)
+        if abs(new - old) > 1e-6:
+            self.changes += 1
+            logger.info("scan interval %.2fs -> %.2fs (%s)", old, new, reason)
+        return new
+
+    def _clamp(self, s: float) -> float:
+        return min(self.max_s, max(self.min_s, float(s)))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .bench import percentiles_ms
+
+# Marks in pipeline order; each stage is the time from the previous mark to its own.
+# "appear" is the grab of the frame that opened the hit streak (confirm_hits > 1).
+MARKS = ("appear", "grab", "captured", "dequeued", "preprocessed", "matched", "gate", "input")
+STAGES = {
+    "appear": ("appear", "grab"),  # waiting for confirm_hits consecutive hits
+    "capture": ("grab", "captured"),
+    "queue": ("captured", "dequeued"),
+    "preprocess": ("dequeued", "preprocessed"),
+    "match": ("preprocessed", "matched"),
+    "gate": ("matched", "gate"),  # includes waiting in the results queue
+    "input": ("gate", "input"),
+}
+
+
+@dataclass
+class Span:
+    """perf_counter marks of one frame, from grab to the first input event.
+
+    Created by the capture loop and handed along with the frame (capture thread
+    -> vision worker -> gate thread), so only one thread touches it at a time.
+    """
+
+    frame_id: int
+    window: Hashable = 0
+    marks: dict[str, float] = field(default_factory=dict)
+
+    def mark(self, name: str, t: float | None = None) -> None:
+        self.marks[name] = time.perf_counter() if t is None else t
+
+    def stages_ms(self) -> dict[str, float]:
+        out = {}
+        for stage, (a, b) in STAGES.items():
+            if a in self.marks and b in self.marks:
+                out[stage] = round((self.marks[b] - self.marks[a]) * 1000, 3)
+        return out
+
+    def total_ms(self) -> float | None:
+        """Label first grabbed to the first input event (or to the gate when nothing was sent)."""
+        end = self.marks.get("input", self.marks.get("gate"))
+        start = self.marks.get("appear", self.marks.get("grab"))
+        if end is None or start is None:
+            return None
+        return round((end - start) * 1000, 3)
+
+
+class TraceWriter:
+    """Appends one compact JSON line per trigger."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._f = path.open("a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def write(self, span: Span, **fields) -> None:
+        rec = {"id": span.frame_id, "t": round(time.time(), 3), **fields,
+               "ms": span.stages_ms(), "total_ms": span.total_ms()}
+        line = json.dumps(rec, separators=(",", ":"))
+        with self._lock:
+            self._f.write(line + "\n")
+            self.written += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+
+
+def create_trace_writer(trace_cfg) -> TraceWriter | None:
+    if not trace_cfg.enabled:
+        return None
+    return TraceWriter(trace_cfg.path)
+
+
+def summarize(path: Path) -> dict:
+    """Latency percentiles per stage and end to end over a trace file."""
+    stages: dict[str, list[float]] = {s: [] for s in STAGES}
+    total: list[float] = []
+    n = bad = 0
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                bad += 1  # e.g. a line cut short by a crash
+                continue
+            n += 1
+            for stage, ms in rec.get("ms", {}).items():
+                stages.setdefault(stage, []).append(ms / 1000.0)
+            if rec.get("total_ms") is not None:
+                total.append(rec["total_ms"] / 1000.0)
+    return {
+        "records": n,
+        "unreadable": bad,
+        "total": percentiles_ms(total),
+        "stages": {s: percentiles_ms(v) for s, v in stages.items() if v},
+    }
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+    """Cheap "did anything move?" check on a downsampled thumbnail of the raw frame.
+
+    Compares against the last frame that was actually processed, so slow drift
+    still accumulates into a change eventually.
+    """
+
+    def __init__(
+        self,
+        thumb_width: int = 96,
+        pixel_delta: int = 12,
+        min_changed_fraction: float = 0.002,
+        max_skip: int = 0,
+    ):
+        self.thumb_width = max(8, int(thumb_width))
+        self.pixel_delta = int(pixel_delta)
+        self.min_changed_fraction = float(min_changed_fraction)
+        self.max_skip = max(0, int(max_skip))  # 0 = never force a refresh
+
+        self._ref: np.ndarray | None = None
+        self._skip_run = 0
+        # True when the last changed() == True came from max_skip, not from the pixels.
+        self.last_forced = False
+
+        self.processed = 0
+        self.skipped = 0
+
+    def invalidate(self) -> None:
+        self._ref = None
+
+    def changed(self, frame: np.ndarray) -> bool:
+        thumb = self._thumb(frame)
+
+        ref = self._ref
+        forced = bool(self.max_skip) and self._skip_run >= self.max_skip
+        self.last_forced = False
+        if ref is None or ref.shape != thumb.shape:
+            return self._accept(thumb)
+        if forced:
+            self.last_forced = True
+            return self._accept(thumb)
+
+        diff = cv2.absdiff(thumb, ref)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        frac = np.count_nonzero(diff > self.pixel_delta) / diff.size
+        if frac >= self.min_changed_fraction:
+            return self._accept(thumb)
+
+        self._skip_run += 1
+        self.skipped += 1
+        return False
+
+    def _accept(self, thumb: np.ndarray) -> bool:
+        self._ref = thumb
+        self._skip_run = 0
+        self.processed += 1
+        return True
+
+    def _thumb(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        tw = min(w, self.thumb_width)
+        th = max(1, int(round(h * tw / w)))
+        return cv2.resize(frame, (tw, th), interpolation=cv2.INTER_AREA)
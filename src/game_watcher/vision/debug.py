@@ -10,7 +10,7 @@ from .matcher import MatchResult
 
 
 def draw_match(bgr: np.ndarray, match: MatchResult, label: str) -> np.ndarray:
-    out = bgr.copy()
+    out = cv2.cvtColor(bgr, cv2.COLOR_GRAY2BGR) if bgr.ndim == 2 else bgr.copy()
     x, y = match.top_left
     w, h = match.size
     cv2.rectangle(out, (x, y), (x + w, y + h), (0, 255, 0), 2)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .matcher import BankState, TemplateMatcher
+from .templates import TemplateBank
+
+
+@dataclass(frozen=True)
+class _FrameSpectrum:
+    shape: tuple[int, int]         # (H, W) of the frame
+    fft_shape: tuple[int, int]     # padded (P, Q) used for every transform of this frame
+    spectrum: np.ndarray           # rfft2 of the frame
+    isum: np.ndarray               # integral image of pixel values (H+1, W+1)
+    isqsum: np.ndarray             # integral image of squared pixel values (H+1, W+1)
+    spectra: _SpectrumCache        # template spectra of the bank the frame started on
+
+
+class _SpectrumCache:
+    """Template spectra keyed by (name, scale, mode, P, Q), within a byte budget."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.entries: dict[tuple[str, float, str, int, int], np.ndarray] = {}
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def put(self, key: tuple[str, float, str, int, int], spec: np.ndarray) -> None:
+        with self.lock:
+            if key not in self.entries and self.nbytes + spec.nbytes <= self.budget:
+                self.entries[key] = spec
+                self.nbytes += spec.nbytes
+
+
+@dataclass(frozen=True)
+class _FFTBankState(BankState):
+    spectra: _SpectrumCache
+
+
+def _window_sums(integral: np.ndarray, th: int, tw: int) -> np.ndarray:
+    return integral[th:, tw:] - integral[:-th, tw:] - integral[th:, :-tw] + integral[:-th, :-tw]
+
+
+class FFTMatcher(TemplateMatcher):
+    """Normalized cross-correlation computed in the frequency domain.
+
+    The frame spectrum and integral images are built once per frame and shared by
+    every (template, scale) job; template spectra are cached per frame size within
+    a memory budget. Normalization mirrors OpenCV, so scores line up with the
+    spatial matcher. ROI and pyramid-refine searches stay on cv2.matchTemplate.
+    """
+
+    SUPPORTED = ("TM_CCOEFF_NORMED", "TM_CCORR_NORMED")
+
+    def __init__(self, bank: TemplateBank, method_name: str, cache_mb: int = 256, **kwargs):
+        if method_name not in self.SUPPORTED:
+            raise ValueError(f"FFT matcher supports {', '.join(self.SUPPORTED)}; got {method_name}")
+        self.cache_bytes = max(0, int(cache_mb)) * 1024 * 1024
+        super().__init__(bank, method_name, **kwargs)
+
+    def _build_state(self, bank: TemplateBank, prev: Optional[BankState],
+                     changed: Optional[set[str]]) -> BankState:
+        base = super()._build_state(bank, prev, changed)
+        # Spectra of unchanged templates carry over; the rest are rebuilt lazily.
+        spectra = _SpectrumCache(self.cache_bytes)
+        if isinstance(prev, _FFTBankState) and changed is not None:
+            names = {t.name for t in bank} - changed
+            with prev.spectra.lock:
+                kept = {k: v for k, v in prev.spectra.entries.items() if k[0] in names}
+            spectra.entries = kept
+            spectra.nbytes = sum(v.nbytes for v in kept.values())
+        return _FFTBankState(base.bank, base.coarse, spectra)
+
+    def _prepare_frame(self, src: np.ndarray,
+                       state: Optional[BankState] = None) -> Optional[object]:
+        state = self._state if state is None else state
+        assert isinstance(state, _FFTBankState)
+        h, w = src.shape[:2]
+        fft_shape = (cv2.getOptimalDFTSize(h), cv2.getOptimalDFTSize(w))
+        img = src.astype(np.float64)
+        isum, isqsum = cv2.integral2(src, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        return _FrameSpectrum(
+            shape=(h, w),
+            fft_shape=fft_shape,
+            spectrum=np.fft.rfft2(img, s=fft_shape),
+            isum=isum,
+            isqsum=isqsum,
+            spectra=state.spectra,
+        )
+
+    def _template_spectrum(self, templ: np.ndarray, key: tuple[str, float, str],
+                           fft_shape: tuple[int, int],
+                           cache: _SpectrumCache) -> tuple[np.ndarray, float]:
+        t = templ.astype(np.float64)
+        if self.method == cv2.TM_CCOEFF_NORMED:
+            t = t - t.mean()
+        norm = float(np.sqrt(np.sum(t * t)))
+
+        cache_key = (*key, *fft_shape)
+        spec = cache.entries.get(cache_key)
+        if spec is None:
+            # Correlation == convolution with the template rotated by 180 degrees.
+            spec = np.fft.rfft2(t[::-1, ::-1], s=fft_shape)
+            cache.put(cache_key, spec)
+        return spec, norm
+
+    def _response_prepared(self, frame_ctx: object, templ: np.ndarray,
+                           key: tuple[str, float, str]) -> Optional[np.ndarray]:
+        assert isinstance(frame_ctx, _FrameSpectrum)
+        h, w = frame_ctx.shape
+        th, tw = templ.shape[:2]
+
+        spec, tnorm = self._template_spectrum(templ, key, frame_ctx.fft_shape,
+                                              frame_ctx.spectra)
+        full = np.fft.irfft2(frame_ctx.spectrum * spec, s=frame_ctx.fft_shape)
+        num = full[th - 1:h, tw - 1:w]
+
+        n = float(th * tw)
+        wsq = _window_sums(frame_ctx.isqsum, th, tw)
+        if self.method == cv2.TM_CCOEFF_NORMED:
+            ws = _window_sums(frame_ctx.isum, th, tw)
+            var = np.maximum(wsq - ws * ws / n, 0.0)
+        else:
+            var = np.maximum(wsq, 0.0)
+        den = np.sqrt(var) * tnorm
+
+        # Same normalization rules as OpenCV's matchTemplate: near-degenerate
+        # windows snap to +-1, flat windows score 0.
+        absnum = np.abs(num)
+        return np.where(
+            absnum < den,
+            num / np.where(den > 0, den, 1.0),
+            np.where(absnum < den * 1.125, np.sign(num), 0.0),
+        ).astype(np.float32)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 
 import cv2
 import numpy as np
 
-from .templates import LoadedTemplate
+from ..metrics import METRICS
+from .templates import LoadedTemplate, TemplateBank, TemplateVariant
+
+# (x0, y0, x1, y1) in frame coords, end-exclusive.
+Roi = tuple[int, int, int, int]
 
 
 @dataclass(frozen=True)
@@ -17,28 +23,117 @@ class MatchResult:
     size: tuple[int, int]          # (w, h) in frame coords
     center: tuple[int, int]        # in frame coords
 
+@dataclass(frozen=True)
+class BankState:
+    """Templates plus everything derived from them, swapped as one reference."""
+    bank: TemplateBank
+    coarse: dict[tuple[str, float, str], np.ndarray]  # (name, scale, mode) -> downsampled
+
 def _method_from_name(name: str) -> int:
     if not hasattr(cv2, name):
         raise ValueError(f"Unknown OpenCV matchTemplate method: {name}")
     return getattr(cv2, name)
 
+def _is_sqdiff(method: int) -> bool:
+    return method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+
 def _score_from_minmax(method: int, min_val: float, max_val: float) -> float:
     # For SQDIFF, lower is better. Convert to "higher is better" in [~0..1] if possible.
-    if method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED):
+    if _is_sqdiff(method):
         return 1.0 - float(min_val)
     return float(max_val)
 
 def _loc_from_minmax(method: int, min_loc, max_loc):
-    if method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED):
+    if _is_sqdiff(method):
         return min_loc
     return max_loc
 
+def clip_roi(roi: Roi, width: int, height: int) -> Roi:
+    x0, y0, x1, y1 = roi
+    return max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+
+def _downsample(img: np.ndarray, factor: int) -> np.ndarray:
+    w = max(1, int(round(img.shape[1] / factor)))
+    h = max(1, int(round(img.shape[0] / factor)))
+    return cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
+
+def _top_candidates(res: np.ndarray, method: int, k: int,
+                    tw: int, th: int) -> list[tuple[int, int]]:
+    # Greedy peak picking: take the best location, blank out a template-sized
+    # neighbourhood around it, repeat. Keeps the K candidates spatially distinct.
+    work = -res if _is_sqdiff(method) else res.copy()
+    rh, rw = work.shape[:2]
+    out: list[tuple[int, int]] = []
+    for _ in range(k):
+        _, max_val, _, max_loc = cv2.minMaxLoc(work)
+        if not math.isfinite(max_val):
+            break
+        x, y = max_loc
+        out.append((x, y))
+        x0, y0 = max(0, x - tw // 2), max(0, y - th // 2)
+        x1, y1 = min(rw, x + tw // 2 + 1), min(rh, y + th // 2 + 1)
+        work[y0:y1, x0:x1] = -np.inf
+    return out
+
+def response_peaks(score: np.ndarray, threshold: float,
+                   limit: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ys, xs, scores) of local maxima >= threshold in a higher-is-better map,
+    strongest `limit` only."""
+    mask = score >= threshold
+    if not mask.any():
+        empty = np.zeros(0, np.int64)
+        return empty, empty, np.zeros(0, np.float32)
+    # A pixel is a peak when it equals the max of its 3x3 neighbourhood.
+    mask &= score >= cv2.dilate(score, np.ones((3, 3), np.uint8))
+    ys, xs = np.nonzero(mask)
+    vals = score[ys, xs]
+    if vals.size > limit:
+        keep = np.argpartition(-vals, limit - 1)[:limit]
+        ys, xs, vals = ys[keep], xs[keep], vals[keep]
+    return ys, xs, vals
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> list[int]:
+    """Greedy non-maximum suppression; returns kept indices, best score first.
+
+    `boxes` is (N, 4) of x0, y0, x1, y1. Each step drops every remaining box
+    that overlaps the current best by more than `iou_threshold`, in one array op.
+    """
+    boxes = boxes.astype(np.float64)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-scores, kind="stable")
+    keep: list[int] = []
+    while order.size:
+        i = int(order[0])
+        keep.append(i)
+        rest = order[1:]
+        iw = np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0])
+        ih = np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1])
+        inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= iou_threshold]
+    return keep
+
 class TemplateMatcher:
-    def __init__(self, templates: list[LoadedTemplate], method_name: str, scales: list[float]):
-        self.templates = templates
+    def __init__(
+        self,
+        bank: TemplateBank,
+        method_name: str,
+        search: str = "full",
+        pyramid_levels: int = 2,
+        pyramid_candidates: int = 3,
+        workers: int = 0,
+    ):
         self.method_name = method_name
         self.method = _method_from_name(method_name)
-        self.scales = scales[:] if scales else [1.0]
+
+        if search not in ("full", "pyramid"):
+            raise ValueError(f"Unknown match search strategy: {search}")
+        self.search = search
+        self.pyramid_levels = max(0, int(pyramid_levels))
+        self.pyramid_candidates = max(1, int(pyramid_candidates))
+
+        # Each search snapshots this once, so a set_bank() mid-frame never mixes banks.
+        self._state = self._build_state(bank, None, None)
 
         # OpenCV sometimes spawns threads and causes jitter. Optional but often good.
         try:
@@ -46,47 +141,323 @@ class TemplateMatcher:
         except Exception:
             pass
 
-    def match_best(self, frame_gray: np.ndarray, frame_edges: np.ndarray, mode: str) -> Optional[MatchResult]:
+        # matchTemplate releases the GIL, so (template, scale) jobs scale across
+        # a small thread pool. workers <= 1 keeps the serial path.
+        self.workers = max(0, int(workers))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if self.workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="match")
+
+    @property
+    def bank(self) -> TemplateBank:
+        return self._state.bank
+
+    def set_bank(self, bank: TemplateBank, changed: Optional[set[str]] = None) -> None:
+        """Swap in a new bank between frames; searches already running finish on the old one.
+
+        `changed` names the templates whose images differ (None = all): derived
+        data of the others is reused. The rebuild runs on the caller's thread.
+        """
+        self._state = self._build_state(bank, self._state, changed)
+
+    def _build_state(self, bank: TemplateBank, prev: Optional[BankState],
+                     changed: Optional[set[str]]) -> BankState:
+        # Downsampled templates for the coarse pass, keyed by (name, scale, mode).
+        coarse: dict[tuple[str, float, str], np.ndarray] = {}
+        if self.search == "pyramid" and self.pyramid_levels > 0:
+            factor = 2 ** self.pyramid_levels
+            for t in bank:
+                for v in t.variants:
+                    for mode in ("gray", "edges"):
+                        key = (t.name, v.scale, mode)
+                        if prev is not None and changed is not None and t.name not in changed:
+                            if key in prev.coarse:
+                                coarse[key] = prev.coarse[key]
+                            continue
+                        img = v.image(mode)
+                        if img.shape[1] >= 4 * factor and img.shape[0] >= 4 * factor:
+                            coarse[key] = _downsample(img, factor)
+        return BankState(bank, coarse)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def match_best(
+        self,
+        frame_gray: np.ndarray,
+        frame_edges: np.ndarray,
+        mode: str,
+        roi: Optional[Roi] = None,
+        names: Optional[set[str]] = None,
+    ) -> Optional[MatchResult]:
+        """Best match over the frame, or only inside `roi` / for templates in `names`."""
+        with METRICS.timer("match_seconds", scope="frame" if roi is None else "roi"):
+            return self._match_best(frame_gray, frame_edges, mode, roi, names)
+
+    def match_regions(
+        self,
+        frame_gray: np.ndarray,
+        frame_edges: np.ndarray,
+        mode: str,
+        regions: list[Roi],
+        names: Optional[set[str]] = None,
+    ) -> Optional[MatchResult]:
+        """Best match over several ROIs (e.g. prefilter candidates); None if none fit."""
         best: Optional[MatchResult] = None
+        for roi in regions:
+            mr = self.match_best(frame_gray, frame_edges, mode, roi=roi, names=names)
+            if mr is not None and (best is None or mr.score > best.score):
+                best = mr
+        return best
+
+    def _match_best(
+        self,
+        frame_gray: np.ndarray,
+        frame_edges: np.ndarray,
+        mode: str,
+        roi: Optional[Roi],
+        names: Optional[set[str]],
+    ) -> Optional[MatchResult]:
+        best: Optional[MatchResult] = None
+        state = self._state
+
+        src = frame_edges if mode == "edges" else frame_gray
+        offset = (0, 0)
+        if roi is not None:
+            x0, y0, x1, y1 = clip_roi(roi, src.shape[1], src.shape[0])
+            src = src[y0:y1, x0:x1]
+            offset = (x0, y0)
+        sh, sw = src.shape[:2]
 
-        for t in self.templates:
-            base = t.edges if mode == "edges" else t.gray
+        # The downsampled frame is shared by every (template, scale) pair.
+        # ROI searches are already local, so they always run at full resolution.
+        coarse = None
+        if roi is None and self.search == "pyramid" and self.pyramid_levels > 0:
+            coarse = _downsample(src, 2 ** self.pyramid_levels)
 
-            for s in self.scales:
-                if s <= 0:
-                    continue
+        jobs = [
+            (t, v)
+            for t in state.bank
+            if names is None or t.name in names
+            for v in t.variants
+            if v.image(mode).shape[0] < sh and v.image(mode).shape[1] < sw
+        ]
 
-                templ = base
-                if abs(s - 1.0) > 1e-6:
-                    w = max(8, int(base.shape[1] * s))
-                    h = max(8, int(base.shape[0] * s))
-                    templ = cv2.resize(base, (w, h), interpolation=cv2.INTER_AREA)
+        # Per-frame state shared by all full-frame jobs (backends may precompute here).
+        frame_ctx = self._prepare_frame(src, state) if roi is None and coarse is None else None
 
-                src = frame_edges if mode == "edges" else frame_gray
-                th, tw = templ.shape[:2]
-                sh, sw = src.shape[:2]
-                if th >= sh or tw >= sw:
-                    continue
+        def run(job: tuple[LoadedTemplate, TemplateVariant]) -> MatchResult:
+            t, v = job
+            templ = v.image(mode)
+            mr = None
+            if coarse is not None:
+                coarse_templ = state.coarse.get((t.name, v.scale, mode))
+                mr = self._match_pyramid(src, coarse, templ, coarse_templ, t.name)
+            if mr is None and frame_ctx is not None:
+                mr = self._match_prepared(frame_ctx, templ, (t.name, v.scale, mode), t.name)
+            if mr is None:
+                mr = self._match_full(src, templ, t.name, offset=offset)
+            return mr
 
+        METRICS.inc("match_jobs_total", len(jobs))
+
+        # ROI searches are tiny; dispatch overhead would outweigh the gain.
+        if self._pool is not None and roi is None and len(jobs) > 1:
+            results = self._pool.map(run, jobs)
+        else:
+            results = map(run, jobs)
+
+        # Reduce in job order so ties resolve the same way as the serial path.
+        for mr in results:
+            if best is None or mr.score > best.score:
+                best = mr
+
+        return best
+
+    def match_all(
+        self,
+        frame_gray: np.ndarray,
+        frame_edges: np.ndarray,
+        mode: str,
+        threshold: float,
+        roi: Optional[Roi] = None,
+        names: Optional[set[str]] = None,
+        max_results: int = 16,
+        nms_iou: float = 0.3,
+    ) -> list[MatchResult]:
+        """Every match scoring >= threshold, best first, overlaps merged across
+        templates and scales by non-maximum suppression.
+
+        Always scans the full response maps (no pyramid shortcut): a coarse
+        pass only keeps a few candidates, which would cap the instance count.
+        """
+        with METRICS.timer("match_seconds", scope="all"):
+            return self._match_all(frame_gray, frame_edges, mode, threshold, roi, names,
+                                   max(1, int(max_results)), float(nms_iou))
+
+    def _match_all(
+        self,
+        frame_gray: np.ndarray,
+        frame_edges: np.ndarray,
+        mode: str,
+        threshold: float,
+        roi: Optional[Roi],
+        names: Optional[set[str]],
+        max_results: int,
+        nms_iou: float,
+    ) -> list[MatchResult]:
+        state = self._state
+        src = frame_edges if mode == "edges" else frame_gray
+        offset = (0, 0)
+        if roi is not None:
+            x0, y0, x1, y1 = clip_roi(roi, src.shape[1], src.shape[0])
+            src = src[y0:y1, x0:x1]
+            offset = (x0, y0)
+        sh, sw = src.shape[:2]
+
+        jobs = [
+            (t, v)
+            for t in state.bank
+            if names is None or t.name in names
+            for v in t.variants
+            if v.image(mode).shape[0] < sh and v.image(mode).shape[1] < sw
+        ]
+        frame_ctx = self._prepare_frame(src, state) if roi is None else None
+        # Per-map cap before NMS; NMS can only remove peaks, so this loses nothing
+        # from the final top-k unless a single map has that many separate peaks.
+        per_map = max_results * 4
+
+        def run(job: tuple[LoadedTemplate, TemplateVariant]):
+            t, v = job
+            templ = v.image(mode)
+            res = None
+            if frame_ctx is not None:
+                res = self._response_prepared(frame_ctx, templ, (t.name, v.scale, mode))
+            if res is None:
                 res = cv2.matchTemplate(src, templ, self.method)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+            score = 1.0 - res if _is_sqdiff(self.method) else res
+            ys, xs, vals = response_peaks(score, threshold, per_map)
+            th, tw = templ.shape[:2]
+            return t.name, tw, th, xs + offset[0], ys + offset[1], vals
+
+        METRICS.inc("match_jobs_total", len(jobs))
+        if self._pool is not None and roi is None and len(jobs) > 1:
+            results = list(self._pool.map(run, jobs))
+        else:
+            results = [run(job) for job in jobs]
+
+        results = [r for r in results if r[5].size]
+        if not results:
+            return []
+        xs = np.concatenate([r[3] for r in results])
+        ys = np.concatenate([r[4] for r in results])
+        ws = np.concatenate([np.full(r[3].size, r[1]) for r in results])
+        hs = np.concatenate([np.full(r[3].size, r[2]) for r in results])
+        scores = np.concatenate([r[5] for r in results])
+        job_idx = np.concatenate([np.full(r[3].size, i) for i, r in enumerate(results)])
+
+        boxes = np.stack([xs, ys, xs + ws, ys + hs], axis=1)
+        out = []
+        for i in nms(boxes, scores, nms_iou)[:max_results]:
+            x, y, w, h = int(xs[i]), int(ys[i]), int(ws[i]), int(hs[i])
+            out.append(MatchResult(
+                template_name=results[job_idx[i]][0],
+                score=float(scores[i]),
+                top_left=(x, y),
+                size=(w, h),
+                center=(x + w // 2, y + h // 2),
+            ))
+        return out
 
-                score = _score_from_minmax(self.method, min_val, max_val)
-                loc = _loc_from_minmax(self.method, min_loc, max_loc)
+    def _prepare_frame(self, src: np.ndarray,
+                       state: Optional[BankState] = None) -> Optional[object]:
+        # Hook for backends that can share work across templates. None = spatial path.
+        return None
 
-                x, y = int(loc[0]), int(loc[1])
-                cx = x + tw // 2
-                cy = y + th // 2
+    def _response_prepared(self, frame_ctx: object, templ: np.ndarray,
+                           key: tuple[str, float, str]) -> Optional[np.ndarray]:
+        # Full response map from the per-frame context, or None to use matchTemplate.
+        return None
 
-                mr = MatchResult(
-                    template_name=t.name,
-                    score=score,
-                    top_left=(x, y),
-                    size=(tw, th),
-                    center=(cx, cy),
-                )
+    def _match_prepared(self, frame_ctx: object, templ: np.ndarray,
+                        key: tuple[str, float, str], name: str) -> Optional[MatchResult]:
+        res = self._response_prepared(frame_ctx, templ, key)
+        if res is None:
+            return None
+        return self._result_from_response(res, templ, name)
 
-                if best is None or mr.score > best.score:
-                    best = mr
+    def _match_full(self, src: np.ndarray, templ: np.ndarray, name: str,
+                    offset: tuple[int, int] = (0, 0)) -> MatchResult:
+        res = cv2.matchTemplate(src, templ, self.method)
+        return self._result_from_response(res, templ, name, offset)
 
+    def _result_from_response(self, res: np.ndarray, templ: np.ndarray, name: str,
+                              offset: tuple[int, int] = (0, 0)) -> MatchResult:
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+
+        score = _score_from_minmax(self.method, min_val, max_val)
+        loc = _loc_from_minmax(self.method, min_loc, max_loc)
+
+        th, tw = templ.shape[:2]
+        x, y = int(loc[0]) + offset[0], int(loc[1]) + offset[1]
+        cx = x + tw // 2
+        cy = y + th // 2
+
+        return MatchResult(
+            template_name=name,
+            score=score,
+            top_left=(x, y),
+            size=(tw, th),
+            center=(cx, cy),
+        )
+
+    def _match_pyramid(self, src: np.ndarray, coarse: np.ndarray, templ: np.ndarray,
+                       coarse_templ: Optional[np.ndarray], name: str) -> Optional[MatchResult]:
+        # Coarse pass on the downsampled frame, then full-resolution refinement in a
+        # small window around each of the top candidates.
+        # Returns None when the template is too small to survive downsampling.
+        if coarse_templ is None:
+            return None
+        sh, sw = src.shape[:2]
+        ch, cw = coarse.shape[:2]
+        fx, fy = sw / cw, sh / ch
+
+        th, tw = templ.shape[:2]
+        cth, ctw = coarse_templ.shape[:2]
+        if cth >= ch or ctw >= cw:
+            return None
+
+        res = cv2.matchTemplate(coarse, coarse_templ, self.method)
+        candidates = _top_candidates(res, self.method, self.pyramid_candidates, ctw, cth)
+
+        mx, my = int(math.ceil(fx)) + 1, int(math.ceil(fy)) + 1
+        best: Optional[MatchResult] = None
+        for cx, cy in candidates:
+            x, y = int(round(cx * fx)), int(round(cy * fy))
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(sw, x + tw + mx), min(sh, y + th + my)
+            if x1 - x0 < tw or y1 - y0 < th:
+                continue
+            mr = self._match_full(src[y0:y1, x0:x1], templ, name, offset=(x0, y0))
+            if best is None or mr.score > best.score:
+                best = mr
         return best
+
+
+def create_matcher(bank: TemplateBank, match_cfg) -> TemplateMatcher:
+    kwargs = dict(
+        search=match_cfg.search,
+        pyramid_levels=match_cfg.pyramid_levels,
+        pyramid_candidates=match_cfg.pyramid_candidates,
+        workers=match_cfg.workers,
+    )
+    backend = match_cfg.backend.lower().strip()
+    if backend == "opencv":
+        return TemplateMatcher(bank, match_cfg.method, **kwargs)
+    if backend == "fft":
+        from .fft_matcher import FFTMatcher
+
+        return FFTMatcher(bank, match_cfg.method, cache_mb=match_cfg.fft_cache_mb, **kwargs)
+    raise ValueError(f"Unknown matcher backend: {backend}")
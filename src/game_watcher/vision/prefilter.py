@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from ..metrics import METRICS
+from .matcher import MatchResult, Roi, nms
+
+
+def _cell_fractions(mask: np.ndarray, cell: int) -> np.ndarray:
+    """Share of nonzero pixels in each cell x cell block (partial edge blocks included)."""
+    h, w = mask.shape[:2]
+    ii = cv2.integral((mask > 0).view(np.uint8))  # (h+1, w+1) int32
+    ys = np.minimum(np.arange(0, h + cell, cell), h)
+    xs = np.minimum(np.arange(0, w + cell, cell), w)
+    ys, xs = np.unique(ys), np.unique(xs)
+    s = ii[np.ix_(ys, xs)]
+    counts = s[1:, 1:] - s[:-1, 1:] - s[1:, :-1] + s[:-1, :-1]
+    areas = np.outer(np.diff(ys), np.diff(xs))
+    return counts / areas
+
+
+class CandidatePrefilter:
+    """Cheap "where could the label be?" stage in front of template matching.
+
+    The frame is cut into cell_px blocks. A block is kept when enough of its
+    pixels fall in the label's color range and/or carry Canny edges, both
+    counted with integral images. Kept blocks are grouped into connected
+    regions, padded so the largest template still fits, and only those boxes
+    are searched. When the regions would cover more than `max_coverage` of the
+    frame (or exceed `max_regions`) a plain full-frame search is cheaper, so
+    `regions()` returns None.
+    """
+
+    def __init__(
+        self,
+        template_size: tuple[int, int],
+        color_space: str = "hsv",
+        color_lower: list[int] | None = None,
+        color_upper: list[int] | None = None,
+        min_color_fraction: float = 0.02,
+        min_edge_density: float = 0.08,
+        cell_px: int = 16,
+        pad_px: int = 8,
+        max_coverage: float = 0.5,
+        max_regions: int = 16,
+    ):
+        self.tw, self.th = template_size
+        self.color_space = color_space
+        self.color_lower = self.color_upper = None
+        if color_lower and color_upper:
+            self.color_lower = np.array(color_lower, np.uint8)
+            self.color_upper = np.array(color_upper, np.uint8)
+        self.min_color_fraction = float(min_color_fraction)
+        self.min_edge_density = float(min_edge_density)
+        self.cell = max(4, int(cell_px))
+        self.pad_px = max(0, int(pad_px))
+        self.max_coverage = float(max_coverage)
+        self.max_regions = max(1, int(max_regions))
+
+        self.frames = 0
+        self.fallbacks = 0
+        self.pixels_total = 0
+        self.pixels_searched = 0
+
+    @property
+    def skipped_fraction(self) -> float:
+        """Share of frame pixels never handed to matchTemplate, over all frames so far."""
+        if not self.pixels_total:
+            return 0.0
+        return 1.0 - self.pixels_searched / self.pixels_total
+
+    def regions(self, frame: np.ndarray, edges: np.ndarray) -> list[Roi] | None:
+        """Candidate boxes (x0, y0, x1, y1); [] = nothing plausible, None = search everything."""
+        h, w = edges.shape[:2]
+        self.frames += 1
+        self.pixels_total += h * w
+
+        keep = None
+        if self.color_lower is not None and frame.ndim == 3:
+            img = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV) if self.color_space == "hsv" else frame
+            color = _cell_fractions(cv2.inRange(img, self.color_lower, self.color_upper),
+                                    self.cell)
+            keep = color >= self.min_color_fraction
+        if self.min_edge_density > 0:
+            dense = _cell_fractions(edges, self.cell) >= self.min_edge_density
+            keep = dense if keep is None else keep & dense
+        if keep is None:
+            return self._full(h, w)  # nothing configured (or no color on a gray frame)
+
+        # Neighbouring cells belong to one label; grow by a cell before grouping.
+        grown = cv2.dilate(keep.view(np.uint8), np.ones((3, 3), np.uint8))
+        n, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+        if n - 1 > self.max_regions:
+            return self._full(h, w)
+
+        # Kept cells may hold only part of a label; leave room for a whole template.
+        px, py = self.pad_px + self.tw, self.pad_px + self.th
+        out: list[Roi] = []
+        area = 0
+        for x, y, cw, ch, _ in stats[1:]:
+            x0 = max(0, x * self.cell - px)
+            y0 = max(0, y * self.cell - py)
+            x1 = min(w, (x + cw) * self.cell + px)
+            y1 = min(h, (y + ch) * self.cell + py)
+            out.append((int(x0), int(y0), int(x1), int(y1)))
+            area += (x1 - x0) * (y1 - y0)  # overlaps counted twice: an upper bound
+        if area > self.max_coverage * h * w:
+            return self._full(h, w)
+
+        self.pixels_searched += min(area, h * w)
+        METRICS.inc("prefilter_pixels_total", h * w)
+        METRICS.inc("prefilter_pixels_searched_total", min(area, h * w))
+        return out
+
+    def _full(self, h: int, w: int) -> None:
+        self.fallbacks += 1
+        self.pixels_searched += h * w
+        METRICS.inc("prefilter_pixels_total", h * w)
+        METRICS.inc("prefilter_pixels_searched_total", h * w)
+        return None
+
+    def fit(self, bank) -> None:
+        """Re-size the padding after the template bank changed (hot reload)."""
+        self.tw, self.th = template_extent(bank)
+
+    def stats_line(self) -> str:
+        return (f"frames={self.frames} full_fallbacks={self.fallbacks} "
+                f"skipped={self.skipped_fraction:.1%}")
+
+
+def match_all_in(matcher, gray: np.ndarray, edges: np.ndarray, mode: str,
+                 threshold: float, regions: list[Roi], max_results: int = 16,
+                 nms_iou: float = 0.3) -> list[MatchResult]:
+    """`matcher.match_all` over each candidate region, merged by one more NMS pass."""
+    found = [mr for roi in regions for mr in matcher.match_all(
+        gray, edges, mode, threshold, roi=roi, max_results=max_results, nms_iou=nms_iou)]
+    if len(regions) <= 1 or not found:
+        return found
+    # Padded regions can overlap; merge duplicates found through two of them.
+    boxes = np.array([(*m.top_left, m.top_left[0] + m.size[0], m.top_left[1] + m.size[1])
+                      for m in found])
+    scores = np.array([m.score for m in found])
+    return [found[i] for i in nms(boxes, scores, nms_iou)[:max_results]]
+
+
+def template_extent(bank) -> tuple[int, int]:
+    """(w, h) of the largest variant in the bank."""
+    return (max(v.gray.shape[1] for t in bank for v in t.variants),
+            max(v.gray.shape[0] for t in bank for v in t.variants))
+
+
+def create_prefilter(prefilter_cfg, bank) -> CandidatePrefilter | None:
+    if not prefilter_cfg.enabled:
+        return None
+    c = prefilter_cfg
+    return CandidatePrefilter(
+        template_extent(bank),
+        color_space=c.color_space,
+        color_lower=c.color_lower,
+        color_upper=c.color_upper,
+        min_color_fraction=c.min_color_fraction,
+        min_edge_density=c.min_edge_density,
+        cell_px=c.cell_px,
+        pad_px=c.pad_px,
+        max_coverage=c.max_coverage,
+        max_regions=c.max_regions,
+    )
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .templates import (
+    LoadedTemplate,
+    TemplateBank,
+    TemplateVariant,
+    list_template_files,
+    load_templates,
+    normalize_scales,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the preprocessing or on-disk layout changes so old caches are rebuilt.
+CACHE_VERSION = 1
+
+
+def pack_cache_key(files: list[Path], canny_low: int, canny_high: int, blur_ksize: int,
+                   scales: tuple[float, ...]) -> str:
+    h = hashlib.sha1()
+    h.update(json.dumps([CACHE_VERSION, canny_low, canny_high, blur_ksize, list(scales)]).encode())
+    for p in files:
+        h.update(p.name.encode())
+        h.update(hashlib.sha1(p.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def save_compiled_pack(path: Path, key: str, bank: TemplateBank) -> None:
+    arrays: dict[str, np.ndarray] = {}
+    meta = {"key": key, "scales": list(bank.scales), "templates": []}
+    for i, t in enumerate(bank):
+        arrays[f"t{i}_gray"] = t.gray
+        arrays[f"t{i}_edges"] = t.edges
+        for j, v in enumerate(t.variants):
+            if v.gray is t.gray:
+                continue  # the 1.0 variant is the base image
+            arrays[f"t{i}_v{j}_gray"] = v.gray
+            arrays[f"t{i}_v{j}_edges"] = v.edges
+        meta["templates"].append(
+            {"name": t.name, "path": str(t.path), "scales": [v.scale for v in t.variants]}
+        )
+
+    # Uncompressed so loading is a straight read; written beside the target and
+    # renamed so a crash never leaves a truncated cache behind.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.savez(f, __meta__=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8), **arrays)
+    os.replace(tmp, path)
+
+
+def load_compiled_pack(path: Path, key: str) -> TemplateBank | None:
+    """Bank stored at `path`, or None when missing, unreadable or built from other inputs."""
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["__meta__"].tobytes().decode())
+            if meta.get("key") != key:
+                return None
+            templates = []
+            for i, tm in enumerate(meta["templates"]):
+                gray, edges = data[f"t{i}_gray"], data[f"t{i}_edges"]
+                variants = []
+                for j, s in enumerate(tm["scales"]):
+                    k = f"t{i}_v{j}"
+                    if f"{k}_gray" in data.files:
+                        variants.append(TemplateVariant(s, data[f"{k}_gray"], data[f"{k}_edges"]))
+                    else:
+                        variants.append(TemplateVariant(s, gray, edges))
+                templates.append(
+                    LoadedTemplate(tm["name"], Path(tm["path"]), gray, edges, tuple(variants))
+                )
+            return TemplateBank(templates=tuple(templates), scales=tuple(meta["scales"]))
+    except Exception as e:
+        logger.warning("Ignoring unreadable template cache %s: %s", path, e)
+        return None
+
+
+def load_templates_cached(
+    pack_dir: Path,
+    canny_low: int,
+    canny_high: int,
+    blur_ksize: int,
+    scales: list[float] | None,
+    cache_dir: Path,
+) -> TemplateBank:
+    """load_templates backed by a compiled per-pack .npz, rebuilt when images or params change."""
+    files = list_template_files(pack_dir)
+    norm_scales = normalize_scales(scales)
+    key = pack_cache_key(files, canny_low, canny_high, blur_ksize, norm_scales)
+    path = cache_dir / f"{pack_dir.name}.npz"
+
+    bank = load_compiled_pack(path, key)
+    if bank is not None:
+        return bank
+
+    bank = load_templates(pack_dir, canny_low, canny_high, blur_ksize, list(norm_scales))
+    try:
+        save_compiled_pack(path, key, bank)
+        logger.info("Compiled template pack %s -> %s", pack_dir, path)
+    except OSError as e:
+        logger.warning("Could not write template cache %s: %s", path, e)
+    return bank
+
+
+def load_pack(pack_dir: Path, vision_cfg) -> TemplateBank:
+    """Load a pack with the vision config's Canny/scale params, through the cache if enabled."""
+    args = (
+        pack_dir,
+        vision_cfg.canny.low,
+        vision_cfg.canny.high,
+        vision_cfg.canny.blur_ksize,
+        vision_cfg.match.scales,
+    )
+    if vision_cfg.template_cache.enabled:
+        return load_templates_cached(*args, vision_cfg.template_cache.dir)
+    return load_templates(*args)
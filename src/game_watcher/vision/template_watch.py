@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from ..metrics import METRICS
+from .matcher import TemplateMatcher
+from .template_cache import pack_cache_key, save_compiled_pack
+from .templates import LoadedTemplate, TemplateBank, list_template_files, load_template
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size): cheap to stat every poll, changes on every save.
+Signature = tuple[int, int]
+
+
+def _signature(p: Path) -> Signature | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class TemplateBankWatcher:
+    """Polls the active pack directory and hot-swaps edited templates.
+
+    Only added or modified images are re-read and re-preprocessed (with
+    load_template, so gray/edges/scale variants match a cold load); the other
+    LoadedTemplate entries are carried over as-is. The new bank goes to
+    `matcher.set_bank`, which rebuilds derived caches for the changed names
+    only and swaps them in with one assignment; frames already being matched
+    finish on the old bank and the scan loop never waits. An image that fails
+    to read (e.g. still being written) keeps its old entry and is retried on
+    the next poll.
+    """
+
+    def __init__(
+        self,
+        pack_dir: Path,
+        vision_cfg,
+        matcher: TemplateMatcher,
+        poll_s: float = 1.0,
+        on_swap: Callable[[TemplateBank, set[str]], None] | None = None,
+    ):
+        self.pack_dir = pack_dir
+        self.vision_cfg = vision_cfg
+        self.matcher = matcher
+        self.poll_s = max(0.05, float(poll_s))
+        self.on_swap = on_swap
+        self.reloads = 0
+        # Keyed by file name: a bank served from the compiled cache may carry paths
+        # of another directory that held the same images.
+        self._seen: dict[str, Signature] = {
+            t.path.name: sig for t in matcher.bank
+            if (sig := _signature(pack_dir / t.path.name)) is not None
+        }
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="template-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_s):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Template reload failed; keeping the current bank.")
+
+    def poll(self) -> set[str]:
+        """One scan of the pack dir; returns the names swapped in (or removed)."""
+        try:
+            files = list_template_files(self.pack_dir)
+        except FileNotFoundError as e:
+            logger.warning("Template hot-reload: %s; keeping the current bank.", e)
+            return set()
+        current = {p.name: sig for p in files if (sig := _signature(p)) is not None}
+        if current == self._seen:
+            return set()
+
+        t0 = time.perf_counter()
+        bank = self.matcher.bank
+        by_name = {t.path.name: t for t in bank}
+        c = self.vision_cfg.canny
+        templates: list[LoadedTemplate] = []
+        changed: set[str] = set()
+        failed = False
+        seen: dict[str, Signature] = {}
+        for fname, sig in current.items():
+            old = by_name.get(fname)
+            if old is not None and self._seen.get(fname) == sig:
+                templates.append(old)
+                seen[fname] = sig
+                continue
+            try:
+                t = load_template(self.pack_dir / fname, c.low, c.high, c.blur_ksize,
+                                  bank.scales)
+            except RuntimeError as e:
+                logger.warning("Template hot-reload: %s; retrying next poll.", e)
+                failed = True
+                if old is not None:
+                    templates.append(old)
+                    seen[fname] = self._seen[fname]
+                continue
+            templates.append(t)
+            seen[fname] = sig
+            changed.add(t.name)
+        removed = {t.name for t in bank if t.path.name not in current}
+        self._seen = seen
+        if not changed and not removed:
+            return set()
+
+        new_bank = TemplateBank(templates=tuple(templates), scales=bank.scales)
+        self.matcher.set_bank(new_bank, changed)
+        self.reloads += 1
+        METRICS.inc("template_reloads_total")
+        METRICS.observe("template_reload_seconds", time.perf_counter() - t0)
+        logger.info("Templates reloaded from %s in %.1f ms: changed=%s removed=%s",
+                    self.pack_dir, (time.perf_counter() - t0) * 1000,
+                    sorted(changed), sorted(removed))
+        if self.on_swap is not None:
+            self.on_swap(new_bank, changed | removed)
+        if not failed:
+            self._save_cache(files, new_bank)
+        return changed | removed
+
+    def _save_cache(self, files: list[Path], bank: TemplateBank) -> None:
+        # Keep the compiled pack in step so the next start loads the edited images.
+        tc = self.vision_cfg.template_cache
+        if not tc.enabled:
+            return
+        c = self.vision_cfg.canny
+        try:
+            key = pack_cache_key(files, c.low, c.high, c.blur_ksize, bank.scales)
+            save_compiled_pack(tc.dir / f"{self.pack_dir.name}.npz", key, bank)
+        except OSError as e:
+            logger.warning("Could not update template cache for %s: %s", self.pack_dir, e)
+
+
+def create_template_watcher(vision_cfg, matcher: TemplateMatcher,
+                            on_swap: Callable[[TemplateBank, set[str]], None] | None = None,
+                            ) -> TemplateBankWatcher | None:
+    if not vision_cfg.hot_reload.enabled:
+        return None
+    return TemplateBankWatcher(vision_cfg.templates_dir / vision_cfg.active_pack, vision_cfg,
+                               matcher, vision_cfg.hot_reload.poll_s, on_swap)
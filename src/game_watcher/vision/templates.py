@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -9,30 +10,102 @@ import numpy as np
 from .preprocess import edges_from_gray, to_gray
 
 
+@dataclass(frozen=True)
+class TemplateVariant:
+    scale: float
+    gray: np.ndarray
+    edges: np.ndarray
+
+    def image(self, mode: str) -> np.ndarray:
+        return self.edges if mode == "edges" else self.gray
+
 @dataclass(frozen=True)
 class LoadedTemplate:
     name: str
     path: Path
     gray: np.ndarray
     edges: np.ndarray
+    variants: tuple[TemplateVariant, ...] = ()
+
+@dataclass(frozen=True)
+class TemplateBank:
+    templates: tuple[LoadedTemplate, ...]
+    scales: tuple[float, ...]
 
-def load_templates(pack_dir: Path, canny_low: int, canny_high: int, blur_ksize: int) -> list[LoadedTemplate]:
+    def __iter__(self) -> Iterator[LoadedTemplate]:
+        return iter(self.templates)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    @property
+    def nbytes(self) -> int:
+        # The 1.0 variant shares its arrays with the base images; count each buffer once.
+        seen: dict[int, int] = {}
+        for t in self.templates:
+            for arr in (t.gray, t.edges, *(a for v in t.variants for a in (v.gray, v.edges))):
+                seen[id(arr)] = arr.nbytes
+        return sum(seen.values())
+
+def normalize_scales(scales: list[float] | None) -> tuple[float, ...]:
+    out: list[float] = []
+    for s in scales or [1.0]:
+        s = float(s)
+        if s <= 0 or any(abs(s - o) <= 1e-6 for o in out):
+            continue
+        out.append(s)
+    return tuple(out) or (1.0,)
+
+def build_variants(
+    gray: np.ndarray, edges: np.ndarray, scales: tuple[float, ...]
+) -> tuple[TemplateVariant, ...]:
+    out: list[TemplateVariant] = []
+    for s in scales:
+        if abs(s - 1.0) <= 1e-6:
+            out.append(TemplateVariant(scale=s, gray=gray, edges=edges))
+            continue
+        w = max(8, int(gray.shape[1] * s))
+        h = max(8, int(gray.shape[0] * s))
+        out.append(
+            TemplateVariant(
+                scale=s,
+                gray=cv2.resize(gray, (w, h), interpolation=cv2.INTER_AREA),
+                edges=cv2.resize(edges, (w, h), interpolation=cv2.INTER_AREA),
+            )
+        )
+    return tuple(out)
+
+def list_template_files(pack_dir: Path) -> list[Path]:
     if not pack_dir.exists() or not pack_dir.is_dir():
         raise FileNotFoundError(f"Template pack dir not found: {pack_dir}")
 
     files = sorted([p for p in pack_dir.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg")])
     if not files:
         raise FileNotFoundError(f"No template images in pack: {pack_dir}")
+    return files
+
+def load_template(
+    p: Path, canny_low: int, canny_high: int, blur_ksize: int, scales: tuple[float, ...]
+) -> LoadedTemplate:
+    bgr = cv2.imread(str(p), cv2.IMREAD_COLOR)
+    if bgr is None:
+        raise RuntimeError(f"Failed to read template: {p}")
 
-    out: list[LoadedTemplate] = []
-    for p in files:
-        bgr = cv2.imread(str(p), cv2.IMREAD_COLOR)
-        if bgr is None:
-            raise RuntimeError(f"Failed to read template: {p}")
+    gray = to_gray(bgr)
+    edges = edges_from_gray(gray, canny_low, canny_high, blur_ksize)
+    variants = build_variants(gray, edges, scales)
 
-        gray = to_gray(bgr)
-        edges = edges_from_gray(gray, canny_low, canny_high, blur_ksize)
+    return LoadedTemplate(name=p.stem, path=p, gray=gray, edges=edges, variants=variants)
 
-        out.append(LoadedTemplate(name=p.stem, path=p, gray=gray, edges=edges))
+def load_templates(
+    pack_dir: Path,
+    canny_low: int,
+    canny_high: int,
+    blur_ksize: int,
+    scales: list[float] | None = None,
+) -> TemplateBank:
+    files = list_template_files(pack_dir)
+    norm_scales = normalize_scales(scales)
 
-    return out
+    out = [load_template(p, canny_low, canny_high, blur_ksize, norm_scales) for p in files]
+    return TemplateBank(templates=tuple(out), scales=norm_scales)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .matcher import MatchResult, Roi, TemplateMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class RoiTracker:
+    """Matcher wrapper that searches around each template's last hit before the full frame.
+
+    A template that scores >= threshold inside its ROI is taken from there; only
+    the remaining templates are then searched over the frame (or `regions`), so
+    a label appearing elsewhere still wins on score. A tracked template that
+    misses its ROI is forgotten and searched normally. Only hits are remembered.
+
+    Exposes the same `match_best(gray, edges, mode)` call as `TemplateMatcher`
+    and is safe to share between vision worker threads.
+    """
+
+    def __init__(
+        self,
+        matcher: TemplateMatcher,
+        pad_px: int,
+        threshold: float,
+        log_every: int = 100,
+    ):
+        self.matcher = matcher
+        self.pad_px = max(0, int(pad_px))
+        self.threshold = float(threshold)
+        self.log_every = max(0, int(log_every))
+
+        # template name -> (x, y, w, h) of its last hit, frame coords
+        self._last: dict[str, tuple[int, int, int, int]] = {}
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.full_scans = 0   # every template searched outside the ROIs
+        self.rest_scans = 0   # only the templates not hit in their ROI
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+    def close(self) -> None:
+        self.matcher.close()
+
+    def match_best(self, frame_gray: np.ndarray, frame_edges: np.ndarray,
+                   mode: str) -> Optional[MatchResult]:
+        return self.match_regions(frame_gray, frame_edges, mode, None)
+
+    def match_regions(self, frame_gray: np.ndarray, frame_edges: np.ndarray, mode: str,
+                      regions: Optional[list[Roi]]) -> Optional[MatchResult]:
+        """Like match_best, but a missed ROI falls back to `regions` instead of the
+        full frame (None = full frame)."""
+        with self._lock:
+            self.frames += 1
+            frames = self.frames
+        try:
+            return self._match(frame_gray, frame_edges, mode, regions)
+        finally:
+            if self.log_every and frames % self.log_every == 0:
+                logger.info("roi: %s", self.stats_line())
+
+    def match_all(self, frame_gray: np.ndarray, frame_edges: np.ndarray, mode: str,
+                  threshold: float, **kwargs) -> list[MatchResult]:
+        # Several instances can be anywhere; always a full-frame search.
+        return self.matcher.match_all(frame_gray, frame_edges, mode, threshold, **kwargs)
+
+    def stats_line(self) -> str:
+        tried = self.roi_hits + self.roi_misses
+        rate = self.roi_hits / tried if tried else 0.0
+        return (f"frames={self.frames} roi_hits={self.roi_hits} roi_misses={self.roi_misses} "
+                f"full_scans={self.full_scans} rest_scans={self.rest_scans} "
+                f"roi_hit_rate={rate:.2f}")
+
+    def _match(self, frame_gray: np.ndarray, frame_edges: np.ndarray, mode: str,
+               regions: Optional[list[Roi]]) -> Optional[MatchResult]:
+        # Several vision workers share one tracker: snapshot and update the ROI
+        # state under the lock, match outside it.
+        with self._lock:
+            last = list(self._last.items())
+        best: Optional[MatchResult] = None
+        hits: list[MatchResult] = []
+        missed: list[str] = []
+        p = self.pad_px
+        for name, (x, y, w, h) in last:
+            roi = (x - p, y - p, x + w + p, y + h + p)
+            mr = self.matcher.match_best(frame_gray, frame_edges, mode, roi=roi, names={name})
+            if mr is None or mr.score < self.threshold:
+                missed.append(name)  # moved or gone; search it everywhere again
+                continue
+            hits.append(mr)
+            if best is None or mr.score > best.score:
+                best = mr
+
+        names = None
+        if hits:
+            names = {t.name for t in self.matcher.bank} - {mr.template_name for mr in hits}
+        rest = None
+        if names is None or names:
+            if regions is None:
+                rest = self.matcher.match_best(frame_gray, frame_edges, mode, names=names)
+            else:
+                rest = self.matcher.match_regions(frame_gray, frame_edges, mode, regions,
+                                                  names=names)
+            if rest is not None and rest.score >= self.threshold:
+                hits.append(rest)
+            if rest is not None and (best is None or rest.score > best.score):
+                best = rest
+
+        with self._lock:
+            for name in missed:
+                self._last.pop(name, None)
+            for mr in hits:
+                self._remember(mr)
+            if names is not None:
+                self.roi_hits += 1
+                if names:
+                    self.rest_scans += 1
+            else:
+                if last:
+                    self.roi_misses += 1
+                self.full_scans += 1
+        return best
+
+    def _remember(self, mr: MatchResult) -> None:
+        self._last[mr.template_name] = (*mr.top_left, *mr.size)
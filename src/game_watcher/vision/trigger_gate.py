@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import logging
+import threading
 import time
+from dataclasses import dataclass, field
+from typing import Optional
 
-from game_watcher.vision.debug import draw_match, save_debug_frame
-from game_watcher.vision.matcher import TemplateMatcher
-from game_watcher.vision.preprocess import edges_from_gray, to_gray
-from game_watcher.vision.templates import load_templates
+from game_watcher.actions import ActionRunner, ExecutionReport, create_action_runner
+from game_watcher.debug.ring import FrameRing, create_frame_ring
+from game_watcher.debug.writer import ArtifactWriter, create_artifact_writer
+from game_watcher.metrics import METRICS
+from game_watcher.trace import Span, TraceWriter, create_trace_writer
+from game_watcher.vision.change import FrameChangeDetector
+from game_watcher.vision.matcher import MatchResult, TemplateMatcher, create_matcher
+from game_watcher.vision.prefilter import CandidatePrefilter, create_prefilter, match_all_in
+from game_watcher.vision.preprocess import TiledPreprocessor, edges_from_gray, to_gray
+from game_watcher.vision.template_cache import load_pack
+from game_watcher.vision.tracking import RoiTracker
 
 
 class TriggerGate:
@@ -14,10 +25,26 @@ class TriggerGate:
         self.min_interval_s = float(min_interval_s)
         self._streak = 0
         self._last_trigger_ts = 0.0
+        self._streak_from: Optional[int] = None
+        self._streak_t: Optional[float] = None
+        self.fired_from: Optional[int] = None  # frame ID that opened the last firing streak
+        self.fired_from_t: Optional[float] = None  # and its capture time (perf_counter)
 
-    def observe(self, is_hit: bool) -> bool:
+    def observe(self, is_hit: bool, frame_id: Optional[int] = None,
+                t_capture: Optional[float] = None) -> bool:
+        with METRICS.timer("gate_seconds"):
+            fired = self._observe(is_hit, frame_id, t_capture)
+        METRICS.inc("gate_observations_total", result="hit" if is_hit else "miss")
+        if fired:
+            METRICS.inc("gate_triggers_total")
+        return fired
+
+    def _observe(self, is_hit: bool, frame_id: Optional[int],
+                 t_capture: Optional[float]) -> bool:
         now = time.time()
         if is_hit:
+            if self._streak == 0:
+                self._streak_from, self._streak_t = frame_id, t_capture
             self._streak += 1
         else:
             self._streak = 0
@@ -25,63 +52,260 @@ class TriggerGate:
         if self._streak >= self.confirm_hits and (now - self._last_trigger_ts) >= self.min_interval_s:
             self._last_trigger_ts = now
             self._streak = 0
+            self.fired_from, self.fired_from_t = self._streak_from, self._streak_t
             return True
 
         return False
 
-def init_vision(cfg):
+@dataclass
+class Vision:
+    matcher: TemplateMatcher | RoiTracker
+    gate: TriggerGate
+    change: Optional[FrameChangeDetector] = None
+    last_result: Optional[MatchResult] = None
+    last_instances: tuple[MatchResult, ...] = ()
+    artifacts: Optional[ArtifactWriter] = None
+    ring: Optional[FrameRing] = None
+    prefilter: Optional[CandidatePrefilter] = None
+    preprocess: Optional[TiledPreprocessor] = None
+    actions: Optional[ActionRunner] = None  # shared by every window; one input device
+    trace: Optional[TraceWriter] = None
+    name: str = ""  # window tag for logs and artifact names when watching several
+    in_hit_streak: bool = False  # last decided frame was a hit (ring flush_on "hit")
+    # Guards the order-dependent state (change detector reference, last result)
+    # when several vision workers share one Vision.
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def close(self) -> None:
+        self.matcher.close()
+        if self.actions is not None:
+            self.actions.close()  # before the trace: a finishing plan still writes its span
+        if self.artifacts is not None:
+            self.artifacts.close()
+        if self.trace is not None:
+            self.trace.close()
+
+    def dump_ring(self, prefix: str) -> int:
+        """Queue the pre-trigger history for writing and start a fresh one.
+
+        Returns the number of frames handed to the writer.
+        """
+        if self.ring is None or self.artifacts is None:
+            return 0
+        entries = self.ring.snapshot()
+        self.ring.clear()  # consecutive hits must not dump the same frames twice
+        self.artifacts.submit_ring(prefix, entries)
+        return len(entries)
+
+def init_vision(cfg) -> Vision:
     pack_dir = cfg.vision.templates_dir / cfg.vision.active_pack
-    templates = load_templates(
-        pack_dir,
-        cfg.vision.canny.low,
-        cfg.vision.canny.high,
-        cfg.vision.canny.blur_ksize,
-    )
-    matcher = TemplateMatcher(templates, cfg.vision.match.method, cfg.vision.match.scales)
+    templates = load_pack(pack_dir, cfg.vision)
+    matcher = create_matcher(templates, cfg.vision.match)
+    return create_window_vision(cfg, matcher, create_artifact_writer(cfg.debug),
+                                actions=create_action_runner(cfg, logging.getLogger(__name__)),
+                                trace=create_trace_writer(cfg.debug.trace))
+
+def create_window_vision(cfg, matcher: TemplateMatcher, artifacts: Optional[ArtifactWriter],
+                         name: str = "", actions: Optional[ActionRunner] = None,
+                         trace: Optional[TraceWriter] = None) -> Vision:
+    """Per-window state (gate, ROI tracker, change detector, frame ring) around a
+    matcher and artifact writer that may be shared with other windows."""
+    tracked: TemplateMatcher | RoiTracker = matcher
+    if cfg.vision.tracking.enabled:
+        tracked = RoiTracker(
+            matcher,
+            cfg.vision.tracking.pad_px,
+            cfg.vision.match.threshold,
+            log_every=cfg.vision.tracking.log_every,
+        )
     gate = TriggerGate(cfg.vision.match.confirm_hits, cfg.vision.match.min_trigger_interval_s)
-    return matcher, gate
 
-def process_frame(cfg, matcher, gate, frame_bgr, client_left, client_top, logger):
-    gray = to_gray(frame_bgr)
-    edges = edges_from_gray(gray, cfg.vision.canny.low, cfg.vision.canny.high, cfg.vision.canny.blur_ksize)
+    change = None
+    if cfg.vision.change.enabled:
+        change = FrameChangeDetector(
+            thumb_width=cfg.vision.change.thumb_width,
+            pixel_delta=cfg.vision.change.pixel_delta,
+            min_changed_fraction=cfg.vision.change.min_changed_fraction,
+            max_skip=cfg.vision.change.max_skip,
+        )
+    ring = create_frame_ring(cfg.debug.ring) if artifacts is not None else None
+    prefilter = create_prefilter(cfg.vision.prefilter, matcher.bank)
+    c = cfg.vision.canny
+    preprocess = None
+    if c.incremental:
+        preprocess = TiledPreprocessor(c.low, c.high, c.blur_ksize, c.tile_px)
+    return Vision(matcher=tracked, gate=gate, change=change, artifacts=artifacts, ring=ring,
+                  prefilter=prefilter, preprocess=preprocess, actions=actions, trace=trace,
+                  name=name)
 
-    best = matcher.match_best(gray, edges, cfg.vision.mode)
-    if best is None:
-        logger.debug("No match computed (template too large / none loaded).")
+def process_frame(cfg, vision: Vision, frame_bgr, client_left, client_top,
+                  logger, span: Optional[Span] = None) -> Optional[MatchResult]:
+    best, reused, instances, _ = analyze_frame(cfg, vision, frame_bgr, logger, span)
+    decide(cfg, vision, frame_bgr, best, reused, client_left, client_top, logger, instances,
+           span)
+    return best
+
+def analyze_frame(cfg, vision: Vision, frame_bgr, logger, span: Optional[Span] = None,
+                  ) -> tuple[Optional[MatchResult], bool, tuple[MatchResult, ...], bool]:
+    """Vision half of process_frame: safe to run on several worker threads.
+
+    Returns (best match, reused, instances, forced) where reused means the frame
+    was unchanged and the previous result was returned without matching, and
+    forced means it was matched only because change.max_skip ran out. `span`, if
+    given, gets the "preprocessed" and "matched" marks. With
+    match.max_instances > 1, instances holds every match >= near_miss after NMS
+    (best first); otherwise it is empty.
+    """
+    # Static screen: reuse the previous result instead of re-running the vision stack.
+    forced = False
+    with vision.lock:
+        reused = vision.change is not None and not vision.change.changed(frame_bgr)
+        if reused:
+            best, instances = vision.last_result, vision.last_instances
+        elif vision.change is not None:
+            forced = vision.change.last_forced
+    if reused:
+        METRICS.inc("frames_total", result="unchanged")
+        logger.debug("Frame unchanged (skipped=%d processed=%d), reusing last result.",
+                     vision.change.skipped, vision.change.processed)
+        return best, True, instances, False
+
+    m = cfg.vision.match
+    with METRICS.timer("preprocess_seconds"):
+        if vision.preprocess is not None:
+            gray, edges = vision.preprocess.process(frame_bgr)
+        else:
+            gray = to_gray(frame_bgr)
+            c = cfg.vision.canny
+            edges = edges_from_gray(gray, c.low, c.high, c.blur_ksize)
+    if span is not None:
+        span.mark("preprocessed")
+    # Candidate regions: None = search the whole frame, [] = nothing label-like.
+    regions = None
+    if vision.prefilter is not None:
+        with METRICS.timer("prefilter_seconds"):
+            regions = vision.prefilter.regions(frame_bgr, edges)
+    instances: tuple[MatchResult, ...] = ()
+    if m.max_instances > 1:
+        # One pass yields every instance; the best one drives the gate as usual.
+        if regions is None:
+            found = vision.matcher.match_all(
+                gray, edges, cfg.vision.mode, m.near_miss,
+                max_results=m.max_instances, nms_iou=m.nms_iou,
+            )
+        else:
+            found = match_all_in(vision.matcher, gray, edges, cfg.vision.mode, m.near_miss,
+                                 regions, max_results=m.max_instances, nms_iou=m.nms_iou)
+        instances = tuple(found)
+        best = instances[0] if instances else None
+    elif regions is None:
+        best = vision.matcher.match_best(gray, edges, cfg.vision.mode)
+    else:
+        best = vision.matcher.match_regions(gray, edges, cfg.vision.mode, regions)
+    if span is not None:
+        span.mark("matched")
+    with vision.lock:
+        vision.last_result = best
+        vision.last_instances = instances
+    METRICS.inc("frames_total", result="processed")
+    return best, False, instances, forced
+
+def _dispatch(cfg, vision: Vision, best: MatchResult, screen: list[tuple[int, int]],
+              span: Optional[Span], streak_from: Optional[int], tag: str, logger) -> None:
+    """Hand a trigger to the action thread; logging and tracing happen when it is done."""
+    def write_trace() -> None:
+        if span is not None and vision.trace is not None:
+            vision.trace.write(span, win=vision.name, tpl=best.template_name,
+                               sc=round(best.score, 4), streak_from=streak_from,
+                               dry_run=cfg.app.dry_run)
+
+    if vision.actions is None:
+        if cfg.app.dry_run:
+            for x, y in screen:
+                logger.warning(f"{tag}[DRY-RUN] Would trigger action at ({x},{y})")
+        write_trace()
         return
 
+    def done(reports: list[ExecutionReport]) -> None:
+        # Action thread. The span is no longer touched by the gate thread.
+        for (x, y), report in zip(screen, reports, strict=False):  # short if a plan failed
+            logger.info(f"{tag}actions at ({x},{y}): {report.summary()}")
+        if span is not None and reports and reports[0].first_input_at:
+            span.mark("input", reports[0].first_input_at)
+        write_trace()
+
+    if vision.actions.submit(screen, done):
+        METRICS.inc("actions_dispatched_total", dry_run=cfg.app.dry_run)
+
+def decide(cfg, vision: Vision, frame_bgr, best: Optional[MatchResult], reused: bool,
+           client_left: int, client_top: int, logger,
+           instances: tuple[MatchResult, ...] = (), span: Optional[Span] = None) -> bool:
+    """Gate half of process_frame. Not thread-safe: call from a single thread.
+
+    Returns True when the gate fired a trigger for this frame. When it did and
+    both `span` and vision.trace are set, the span is written to the trace.
+    """
+    gate = vision.gate
+    frame_id = span.frame_id if span is not None else None
+    should_trigger = False
+    tag = f"[{vision.name}] " if vision.name else ""
+    suffix = f"_{vision.name}" if vision.name else ""
+    if vision.ring is not None:
+        vision.ring.push(frame_bgr)
+
+    if best is None:
+        vision.in_hit_streak = False
+        gate.observe(False, frame_id)
+        if cfg.vision.match.max_instances > 1:
+            logger.debug(f"{tag}MISS (no instance >= near_miss)")
+        elif vision.prefilter is not None:
+            logger.debug(f"{tag}MISS (no candidate region / template too large)")
+        else:
+            logger.debug("No match computed (template too large / none loaded).")
+        return False
+
     hit = best.score >= cfg.vision.match.threshold
     near = (not hit) and (best.score >= cfg.vision.match.near_miss)
+    streak_opened = hit and not vision.in_hit_streak
+    vision.in_hit_streak = hit
 
     if hit:
-        label = f"HIT {best.template_name} sc={best.score:.4f}"
+        label = f"{tag}HIT {best.template_name} sc={best.score:.4f}"
         logger.info(label)
 
-        annotated = draw_match(frame_bgr, best, label)
-        if cfg.debug.save_match_frames:
-            save_debug_frame(cfg.debug.out_dir, "hit", annotated)
+        if vision.artifacts and cfg.debug.save_on_match and not reused:
+            vision.artifacts.submit(f"hit{suffix}", frame_bgr, best, label)
+
+        # Map to screen coords for future clicking; one target per instance.
+        targets = [mr for mr in instances if mr.score >= cfg.vision.match.threshold] or [best]
+        screen = [(client_left + mr.center[0], client_top + mr.center[1]) for mr in targets]
 
-        # Map to screen coords for future clicking:
-        screen_x = client_left + best.center[0]
-        screen_y = client_top + best.center[1]
+        # Once per hit streak: the frames leading up to it, not every frame it lasts.
+        if cfg.debug.ring.flush_on == "hit" and streak_opened:
+            vision.dump_ring(f"ring_hit{suffix}")
 
-        should_trigger = gate.observe(True)
+        t_grab = span.marks.get("grab") if span is not None else None
+        should_trigger = gate.observe(True, frame_id, t_grab)
         if should_trigger:
-            if cfg.safety.dry_run:
-                logger.warning(f"[DRY-RUN] Would trigger action at ({screen_x},{screen_y})")
-            else:
-                logger.error("Non-dry-run path not wired here yet (good).")
+            if span is not None:
+                span.mark("gate")
+                if gate.fired_from_t is not None:
+                    span.mark("appear", gate.fired_from_t)
+            if cfg.debug.ring.flush_on == "trigger":
+                vision.dump_ring(f"ring_trigger{suffix}")
+            _dispatch(cfg, vision, best, screen, span, gate.fired_from, tag, logger)
         else:
             logger.debug("Hit observed but rate-limited / awaiting confirm_hits.")
     elif near:
-        label = f"NEAR {best.template_name} sc={best.score:.4f}"
+        label = f"{tag}NEAR {best.template_name} sc={best.score:.4f}"
         logger.debug(label)
 
-        annotated = draw_match(frame_bgr, best, label)
-        if cfg.debug.save_near_miss_frames:
-            save_debug_frame(cfg.debug.out_dir, "near", annotated)
+        if vision.artifacts and cfg.debug.save_on_near_miss and not reused:
+            vision.artifacts.submit(f"near{suffix}", frame_bgr, best, label)
 
-        gate.observe(False)
+        gate.observe(False, frame_id)
     else:
-        gate.observe(False)
-        logger.debug(f"MISS best={best.template_name} sc={best.score:.4f}")
+        gate.observe(False, frame_id)
+        logger.debug(f"{tag}MISS best={best.template_name} sc={best.score:.4f}")
+
+    return should_trigger
@@ -1,13 +1,32 @@
-from .win32_window import (
-    WindowInfo,
-    find_window_by_title_regex,
-    get_client_rect_in_screen,
-    is_foreground,
-)
+from .base import WindowBackend, WindowInfo
+from .fake import FakeWindowBackend
+from .service import WindowService, create_window_service
 
 __all__ = [
+    "FakeWindowBackend",
+    "Win32WindowBackend",
+    "WindowBackend",
     "WindowInfo",
-    "find_window_by_title_regex", 
+    "WindowService",
+    "create_window_service",
+    "find_window_by_title_regex",
     "get_client_rect_in_screen",
     "is_foreground",
-]
\ No newline at end of file
+]
+
+_WIN32 = {
+    "Win32WindowBackend",
+    "find_window_by_title_regex",
+    "get_client_rect_in_screen",
+    "is_foreground",
+}
+
+
+def __getattr__(name: str):
+    # The win32 names pull in pywin32; import them on first use so the service
+    # and the fake backend work on machines without it.
+    if name in _WIN32:
+        from . import win32_window
+
+        return getattr(win32_window, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+
+@dataclass(frozen=True)
+class WindowInfo:
+    hwnd: int
+    title: str
+    client_left: int
+    client_top: int
+    client_width: int
+    client_height: int
+
+    @property
+    def client_right(self) -> int:
+        return self.client_left + self.client_width
+
+    @property
+    def client_bottom(self) -> int:
+        return self.client_top + self.client_height
+
+
+Rect = tuple[int, int, int, int]  # left, top, right, bottom (screen)
+
+
+class WindowBackend(Protocol):
+    def list_windows(self) -> list[tuple[int, str]]:
+        """(hwnd, title) of every visible, non-minimized top-level window, in z-order."""
+        ...
+
+    def is_valid(self, hwnd: int) -> bool:
+        """Window still exists and is visible and not minimized."""
+        ...
+
+    def title(self, hwnd: int) -> str:
+        ...
+
+    def window_rect(self, hwnd: int) -> Rect:
+        """Outer window rect in screen coords; one cheap call, used to detect moves/resizes."""
+        ...
+
+    def client_info(self, hwnd: int) -> WindowInfo:
+        """Client area in screen coords (the expensive lookup)."""
+        ...
+
+    def foreground(self) -> int:
+        ...
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from .base import Rect, WindowInfo
+
+
+@dataclass
+class FakeWindow:
+    title: str
+    rect: Rect                           # outer rect, screen coords
+    border: tuple[int, int] = (8, 31)    # client origin inside the outer rect
+    visible: bool = True
+    minimized: bool = False
+
+
+class FakeWindowBackend:
+    """In-memory WindowBackend for tests and benchmarks without a desktop.
+
+    Every call is counted in `calls`; `latency_s` adds a fixed delay per win32
+    round trip the real backend would make (enumeration costs three per window:
+    IsWindowVisible, IsIconic, GetWindowText).
+    """
+
+    def __init__(self, latency_s: float = 0.0):
+        self.windows: dict[int, FakeWindow] = {}
+        self.fg = 0
+        self.latency_s = float(latency_s)
+        self.calls: Counter[str] = Counter()
+
+    # --- scripting ---
+    def add(self, hwnd: int, title: str, rect: Rect = (0, 0, 816, 639), **kw) -> None:
+        self.windows[hwnd] = FakeWindow(title, rect, **kw)
+        self.fg = self.fg or hwnd
+
+    def move(self, hwnd: int, rect: Rect) -> None:
+        self.windows[hwnd].rect = rect
+
+    def close(self, hwnd: int) -> None:
+        self.windows.pop(hwnd, None)
+
+    # --- WindowBackend ---
+    def _call(self, name: str, round_trips: int = 1) -> None:
+        self.calls[name] += 1
+        if self.latency_s:
+            time.sleep(self.latency_s * round_trips)
+
+    def list_windows(self) -> list[tuple[int, str]]:
+        self._call("list_windows", 1 + 3 * len(self.windows))
+        return [(h, w.title) for h, w in self.windows.items()
+                if w.visible and not w.minimized and w.title]
+
+    def is_valid(self, hwnd: int) -> bool:
+        self._call("is_valid", 3)
+        w = self.windows.get(hwnd)
+        return w is not None and w.visible and not w.minimized
+
+    def title(self, hwnd: int) -> str:
+        self._call("title")
+        w = self.windows.get(hwnd)
+        return w.title if w is not None else ""
+
+    def window_rect(self, hwnd: int) -> Rect:
+        self._call("window_rect")
+        return self.windows[hwnd].rect
+
+    def client_info(self, hwnd: int) -> WindowInfo:
+        self._call("client_info", 3)
+        w = self.windows[hwnd]
+        left, top, right, bottom = w.rect
+        bx, by = w.border
+        return WindowInfo(hwnd, w.title, left + bx, top + by,
+                          right - left - 2 * bx, bottom - top - by - bx)
+
+    def foreground(self) -> int:
+        self._call("foreground")
+        return self.fg
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections.abc import Callable
+
+from ..metrics import METRICS
+from .base import Rect, WindowBackend, WindowInfo
+
+logger = logging.getLogger(__name__)
+
+
+class WindowService:
+    """Cached window lookup for the capture loop.
+
+    Title regexes are compiled once. Resolved targets are kept and only
+    re-validated each tick (is_valid + title check per window); the full
+    enumeration runs again when one of them disappears or is renamed, and every
+    `rescan_s` while more windows could show up (match_all, or nothing found
+    yet). Client rects are cached per window and refreshed only when the outer
+    window rect changes, i.e. the window moved or was resized.
+
+    Not thread-safe; the capture thread owns it.
+    """
+
+    def __init__(
+        self,
+        backend: WindowBackend,
+        patterns: list[str],
+        match_all: bool = False,
+        rescan_s: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.backend = backend
+        self.patterns = [re.compile(p) for p in patterns]
+        self.match_all = match_all
+        self.rescan_s = max(0.0, float(rescan_s))
+        self._clock = clock
+
+        self._targets: list[tuple[int, int]] | None = None  # (hwnd, rank)
+        self._next_scan = 0.0
+        self._clients: dict[int, tuple[Rect, WindowInfo]] = {}
+        self.scans = 0
+
+    def invalidate(self) -> None:
+        self._targets = None
+        self._clients.clear()
+
+    def targets(self) -> list[tuple[int, int]]:
+        """(hwnd, rank) of matching windows; rank is the index of the matching regex."""
+        now = self._clock()
+        if self._targets is None or now >= self._next_scan or not self._still_valid():
+            self._targets = self._scan()
+            open_ended = self.match_all or not self._targets
+            self._next_scan = now + self.rescan_s if open_ended else float("inf")
+        return list(self._targets)
+
+    def client(self, hwnd: int) -> WindowInfo:
+        """Client area of `hwnd` in screen coords, re-read only after a move/resize."""
+        rect = self.backend.window_rect(hwnd)
+        cached = self._clients.get(hwnd)
+        if cached is not None and cached[0] == rect:
+            METRICS.inc("window_client_lookups_total", result="cached")
+            return cached[1]
+        info = self.backend.client_info(hwnd)
+        self._clients[hwnd] = (rect, info)
+        METRICS.inc("window_client_lookups_total", result="refreshed")
+        if cached is not None:
+            logger.debug("Window %x moved/resized: client %dx%d at (%d,%d).", hwnd,
+                        info.client_width, info.client_height, info.client_left, info.client_top)
+        return info
+
+    def is_foreground(self, hwnd: int) -> bool:
+        return self.backend.foreground() == hwnd
+
+    def _still_valid(self) -> bool:
+        for hwnd, rank in self._targets:
+            if not self.backend.is_valid(hwnd):
+                return False
+            if not self.patterns[rank].search(self.backend.title(hwnd)):
+                return False
+        return True
+
+    def _scan(self) -> list[tuple[int, int]]:
+        self.scans += 1
+        METRICS.inc("window_scans_total")
+        windows = self.backend.list_windows()
+        out: list[tuple[int, int]] = []
+        seen: set[int] = set()
+        for rank, pattern in enumerate(self.patterns):
+            found = [h for h, title in windows if h not in seen and pattern.search(title)]
+            if not self.match_all:
+                found = found[:1]
+            seen.update(found)
+            out.extend((h, rank) for h in found)
+        for hwnd in [h for h in self._clients if h not in seen]:
+            del self._clients[hwnd]
+        return out
+
+
+def create_window_service(window_cfg, backend: WindowBackend | None = None) -> WindowService:
+    if backend is None:
+        # pywin32 is only needed for live windows.
+        from .win32_window import Win32WindowBackend
+
+        backend = Win32WindowBackend()
+    return WindowService(backend, window_cfg.patterns, window_cfg.match_all, window_cfg.rescan_s)
@@ -1,28 +1,19 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
 from re import Pattern
 
 import win32gui
 
+from .base import Rect, WindowInfo
 
-@dataclass(frozen=True)
-class WindowInfo:
-    hwnd: int
-    title: str
-    client_left: int
-    client_top: int
-    client_width: int
-    client_height: int
-
-    @property
-    def client_right(self) -> int:
-        return self.client_left + self.client_width
-
-    @property
-    def client_bottom(self) -> int:
-        return self.client_top + self.client_height
+__all__ = [
+    "WindowInfo",
+    "Win32WindowBackend",
+    "find_window_by_title_regex",
+    "get_client_rect_in_screen",
+    "is_foreground",
+]
 
 
 def _is_good_window(hwnd: int) -> bool:
@@ -34,7 +25,7 @@ def _is_good_window(hwnd: int) -> bool:
     return True
 
 
-def find_window_by_title_regex(title_regex: str) -> list[int]:
+def find_window_by_title_regex(title_regex: str | Pattern[str]) -> list[int]:
     pattern: Pattern[str] = re.compile(title_regex)
 
     matches: list[int] = []
@@ -74,3 +65,34 @@ def get_client_rect_in_screen(hwnd: int) -> WindowInfo:
 
 def is_foreground(hwnd: int) -> bool:
     return win32gui.GetForegroundWindow() == hwnd
+
+
+class Win32WindowBackend:
+    """WindowBackend over pywin32."""
+
+    def list_windows(self) -> list[tuple[int, str]]:
+        out: list[tuple[int, str]] = []
+
+        def enum_cb(hwnd: int, _):
+            if _is_good_window(hwnd):
+                title = win32gui.GetWindowText(hwnd) or ""
+                if title:
+                    out.append((hwnd, title))
+
+        win32gui.EnumWindows(enum_cb, None)
+        return out
+
+    def is_valid(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindow(hwnd)) and _is_good_window(hwnd)
+
+    def title(self, hwnd: int) -> str:
+        return win32gui.GetWindowText(hwnd) or ""
+
+    def window_rect(self, hwnd: int) -> Rect:
+        return tuple(win32gui.GetWindowRect(hwnd))
+
+    def client_info(self, hwnd: int) -> WindowInfo:
+        return get_client_rect_in_screen(hwnd)
+
+    def foreground(self) -> int:
+        return win32gui.GetForegroundWindow()
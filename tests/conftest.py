@@ -0,0 +1,29 @@
+"""Synthetic labels and frames shared by the vision tests (import with `from conftest import`)."""
+
+import cv2
+import numpy as np
+
+from game_watcher.vision.preprocess import edges_from_gray, to_gray
+
+
+def label(text: str) -> np.ndarray:
+    """40x160 BGR patch with `text` in yellow, as a template or an on-screen label."""
+    patch = np.zeros((40, 160, 3), np.uint8)
+    cv2.putText(patch, text, (5, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 2)
+    return patch
+
+
+def noise_frame(shape: tuple[int, int], seed: int | np.random.Generator,
+                **labels: tuple[int, int]) -> np.ndarray:
+    """Blurred BGR noise of (h, w) with label(text) pasted at each text=(x, y)."""
+    rng = np.random.default_rng(seed)
+    bgr = cv2.GaussianBlur(rng.integers(0, 255, (*shape, 3), dtype=np.uint8), (7, 7), 0)
+    for text, (x, y) in labels.items():
+        bgr[y:y + 40, x:x + 160] = label(text)
+    return bgr
+
+
+def gray_edges(bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Gray + Canny with the default config's thresholds."""
+    gray = to_gray(bgr)
+    return gray, edges_from_gray(gray, 60, 160, 3)
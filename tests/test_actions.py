@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from game_watcher.actions import (
+    ActionExecutor,
+    ActionRunner,
+    RecordingBackend,
+    compile_plan,
+    create_action_runner,
+)
+from game_watcher.config_model import ActionStep, load_config
+from game_watcher.safety import RateLimiter, SafetySwitch
+
+
+def _seq(*steps: dict) -> list[ActionStep]:
+    return [ActionStep(**s) for s in steps]
+
+
+class SlowSleepClock:
+    """Fake time: every sleep overshoots by 0.8 ms, every clock read costs 10 us."""
+
+    def __init__(self):
+        self.t = 100.0
+        self.slept: list[float] = []
+
+    def clock(self) -> float:
+        self.t += 1e-5
+        return self.t
+
+    def sleep(self, s: float) -> None:
+        self.slept.append(s)
+        self.t += s + 0.0008
+
+
+def test_compile_resolves_relative_clicks_and_folds_sleeps():
+    plan = compile_plan(_seq(
+        {"type": "sleep", "seconds": 0.2},
+        {"type": "click_rel", "x": 10, "y": -5},
+        {"type": "key", "keys": ["Ctrl", "A"]},
+        {"type": "sleep", "seconds": 0.1},
+        {"type": "click_abs", "x": 1, "y": 2},
+        {"type": "sleep", "seconds": 0.05},
+    ))
+    assert not plan.resolved
+    assert [s.at_s for s in plan.steps] == [0.0, 0.2, 0.2, pytest.approx(0.3)]
+    assert plan.duration_s == pytest.approx(0.35)
+
+    at = plan.resolve(500, 300)
+    assert at.resolved and plan.steps[1].relative  # the compiled plan is left untouched
+    assert [(s.kind, s.x, s.y, s.keys) for s in at.steps] == [
+        ("click", 500, 300, ()),
+        ("click", 510, 295, ()),
+        ("key", 0, 0, ("ctrl", "a")),
+        ("click", 1, 2, ()),
+    ]
+
+
+@pytest.mark.parametrize("step", [
+    {"type": "sleep"},
+    {"type": "key", "keys": []},
+    {"type": "click_rel", "x": 3},
+])
+def test_compile_rejects_incomplete_steps(step):
+    with pytest.raises(ValueError, match=r"actions\.sequence\[0\]"):
+        compile_plan(_seq(step))
+
+
+def test_executor_hits_deadlines_despite_sleep_overshoot():
+    fake = SlowSleepClock()
+    rec = RecordingBackend()
+    ex = ActionExecutor(rec, spin_s=0.001, clock=fake.clock, sleep=fake.sleep)
+    plan = compile_plan(_seq(
+        {"type": "sleep", "seconds": 0.2},
+        {"type": "key", "keys": ["esc"]},
+        {"type": "sleep", "seconds": 0.2},
+        {"type": "key", "keys": ["enter"]},
+    )).resolve(10, 20)
+
+    report = ex.run(plan)
+
+    assert [e[1:] for e in rec.events] == [("click", (10, 20)), ("key", ("esc",)),
+                                           ("key", ("enter",))]
+    # Sleeps stop spin_s short of the deadline; the overshoot is absorbed by the spin.
+    assert all(0 <= t.error_s < 5e-5 for t in report.timings)
+    assert report.max_error_s < 5e-5
+    assert report.total_s == pytest.approx(0.4, abs=1e-4)
+
+
+def test_executor_refuses_unresolved_plan():
+    plan = compile_plan([])
+    with pytest.raises(ValueError, match="resolve"):
+        ActionExecutor(RecordingBackend()).run(plan)
+
+
+class GatedBackend(RecordingBackend):
+    """Clicks block until released, so a plan can be held "running"."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.threads: set[str] = set()
+
+    def click(self, x: int, y: int) -> None:
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5.0)
+        super().click(x, y)
+
+
+def test_runner_plays_plans_off_thread_with_a_single_slot():
+    backend = GatedBackend()
+    runner = ActionRunner(compile_plan([]), ActionExecutor(backend))
+    done = threading.Event()
+    got = []
+
+    t_before = time.perf_counter()
+    assert runner.submit([(1, 2), (3, 4)], lambda reports: (got.extend(reports), done.set()))
+    assert runner.busy and runner.stale(time.perf_counter())
+    assert not runner.submit([(5, 6)])  # slot taken: dropped, not queued
+    assert runner.dropped == 1
+
+    backend.release.set()
+    assert done.wait(5.0)
+    assert [e[1:] for e in backend.events] == [("click", (1, 2)), ("click", (3, 4))]
+    assert backend.threads == {"actions"} and len(got) == 2
+    assert not runner.busy
+    # Grabbed before the plan ended -> stale; grabbed after -> fresh.
+    assert runner.stale(t_before) and not runner.stale(time.perf_counter())
+
+    runner.close()
+    assert not runner.submit([(7, 8)])
+
+
+def test_rate_limit_drops_triggers_before_any_input():
+    now = [0.0]
+    limiter = RateLimiter(2, 60.0, clock=lambda: now[0])
+    rec = RecordingBackend()
+    runner = ActionRunner(compile_plan([]), ActionExecutor(rec), limiter)
+    done = threading.Semaphore(0)
+
+    for t in (0.0, 1.0, 2.0, 61.0):
+        now[0] = t
+        if runner.submit([(int(t), 0)], lambda _: done.release()):
+            assert done.acquire(timeout=5.0)
+    runner.close()
+
+    # The third trigger within a minute never reached the backend.
+    assert [e[2] for e in rec.events] == [(0, 0), (1, 0), (61, 0)]
+    assert runner.dropped == 1
+
+
+def test_pause_drops_triggers_and_kill_stops_a_running_plan():
+    stops = []
+    safety = SafetySwitch(on_kill=lambda: stops.append(1))
+    backend = GatedBackend()
+    plan = compile_plan(_seq({"type": "sleep", "seconds": 0.01}, {"type": "key", "keys": ["esc"]}))
+    runner = ActionRunner(plan, ActionExecutor(backend, safety=safety), safety=safety)
+    done = threading.Event()
+    got = []
+
+    safety.toggle_pause()
+    assert not runner.submit([(1, 2)])
+    safety.toggle_pause()
+    assert runner.submit([(1, 2)], lambda reports: (got.extend(reports), done.set()))
+    while not backend.threads:  # the click is being sent
+        time.sleep(0.001)
+    safety.kill()
+    backend.release.set()
+    assert done.wait(5.0)
+
+    # The in-flight click finished; the key after it was never pressed.
+    assert [e[1] for e in backend.events] == ["click"]
+    assert got[0].aborted and len(got[0].timings) == 1
+    assert not runner.submit([(3, 4)]) and runner.dropped == 2
+    assert stops == [1]
+    runner.close()
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_live_input_requires_safety_hotkeys(monkeypatch, dry_run):
+    def no_hotkeys(self, kill_key, pause_key):
+        raise ImportError("No module named 'pynput'")
+
+    monkeypatch.setattr(SafetySwitch, "start", no_hotkeys)
+    cfg = load_config(Path("config/default.yaml"))
+    cfg.app.dry_run = dry_run
+    if dry_run:
+        create_action_runner(cfg, logging.getLogger()).close()
+    else:
+        with pytest.raises(RuntimeError, match="Refusing live input"):
+            create_action_runner(cfg, logging.getLogger())
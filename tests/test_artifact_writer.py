@@ -0,0 +1,116 @@
+import logging
+import os
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from game_watcher.config_model import load_config
+from game_watcher.debug.ring import FrameRing
+from game_watcher.debug.writer import ArtifactWriter
+from game_watcher.vision.matcher import MatchResult
+from game_watcher.vision.trigger_gate import TriggerGate, Vision, decide
+
+
+def _frame(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+
+
+def test_writer_annotates_and_writes_in_background(tmp_path):
+    w = ArtifactWriter(tmp_path, png_level=0)
+    match = MatchResult("t0", 0.9, (10, 10), (20, 20), (20, 20))
+    frame = _frame(0)
+    w.submit("hit", frame, match, "HIT t0")
+    frame[:] = 0  # the caller may recycle its buffer right away
+    w.close()
+
+    files = list(tmp_path.glob("hit_*.png"))
+    assert w.written == 1 and len(files) == 1
+    assert files[0].stat().st_size > 10_000  # noise survived, not the zeroed buffer
+
+
+def test_writer_survives_a_failing_job(tmp_path, monkeypatch):
+    def draw(img, match, label):
+        if label == "bad":
+            raise cv2.error("annotate failed")
+        return img
+
+    monkeypatch.setattr("game_watcher.debug.writer.draw_match", draw)
+    w = ArtifactWriter(tmp_path, png_level=0)
+    match = MatchResult("t0", 0.9, (10, 10), (20, 20), (20, 20))
+    w.submit("hit", _frame(0), match, "bad")
+    w.submit("hit", _frame(1), match, "ok")
+    w.close()
+
+    assert (w.failed, w.written) == (1, 1)
+    assert len(list(tmp_path.glob("hit_*.png"))) == 1
+
+
+def test_writer_enforces_quota_and_age(tmp_path):
+    old = tmp_path / "near_old.png"
+    old.write_bytes(b"x" * 100)
+    stale = time.time() - 3 * 3600
+    os.utime(old, (stale, stale))
+
+    w = ArtifactWriter(tmp_path, png_level=0, quota_mb=0.1, max_age_h=1)
+    for i in range(6):
+        w.submit("near", _frame(i))
+        time.sleep(0.02)  # let each job reach the writer so none are dropped
+    w.close()
+
+    assert not old.exists()
+    total = sum(p.stat().st_size for p in tmp_path.iterdir())
+    assert total <= 0.1 * 1024 * 1024
+    assert w.pruned >= 2
+
+
+def test_full_queue_drops_oldest(tmp_path):
+    w = ArtifactWriter(tmp_path, queue_size=2)
+    with w._cond:  # hold the writer thread off while the queue overflows
+        for i in range(5):
+            w.submit(f"f{i}", _frame(i))
+    w.close()
+
+    assert w.dropped == 3 and w.written == 2
+    assert sorted(p.name.split("_")[0] for p in tmp_path.iterdir()) == ["f3", "f4"]
+
+
+@pytest.mark.parametrize("jpeg_quality", [0, 80])
+def test_frame_ring_stays_within_budget_and_dumps_to_folder(tmp_path, jpeg_quality):
+    ring = FrameRing(budget_mb=0.1, scale=0.5, jpeg_quality=jpeg_quality)
+    for i in range(40):
+        ring.push(_frame(i))
+    assert 0 < len(ring) < 40
+    assert ring.nbytes <= 0.1 * 1024 * 1024
+
+    w = ArtifactWriter(tmp_path)
+    entries = ring.snapshot()
+    w.submit_ring("ring_trigger", entries)
+    w.close()
+
+    (folder,) = tmp_path.iterdir()
+    files = sorted(folder.iterdir())
+    assert len(files) == len(entries)
+    assert files[-1].name.startswith(f"{len(entries) - 1:03d}_+0.000s")
+    assert cv2.imread(str(files[0])).shape[:2] == (60, 80)
+
+
+def test_ring_flush_on_hit_dumps_once_per_streak(tmp_path):
+    cfg = load_config(Path("config/default.yaml"))
+    cfg.debug.ring.flush_on = "hit"
+    cfg.debug.save_on_match = False
+    cfg.vision.match.confirm_hits = 10  # never fires; only the ring matters here
+    w = ArtifactWriter(tmp_path)
+    vision = Vision(matcher=None, gate=TriggerGate(10, 0.0), artifacts=w,
+                    ring=FrameRing(budget_mb=1, scale=0.25))
+    hit = MatchResult("t0", 0.99, (10, 10), (20, 10), (20, 15))
+
+    for i, best in enumerate([hit, hit, hit, None, hit, hit]):
+        decide(cfg, vision, _frame(i), best, False, 0, 0, logging.getLogger())
+    w.close()
+
+    # Frame 0 opens the first streak, frame 4 the second (with frames 1-3 before it).
+    dumps = sorted(tmp_path.iterdir())
+    assert [len(list(d.iterdir())) for d in dumps] == [1, 4]
@@ -0,0 +1,42 @@
+import csv
+import json
+
+import cv2
+import numpy as np
+import pytest
+from conftest import label, noise_frame
+
+from game_watcher.batch import list_images, run_batch
+from game_watcher.config_model import VisionConfig
+
+
+@pytest.fixture
+def setup(tmp_path):
+    (tmp_path / "templates" / "p").mkdir(parents=True)
+    cv2.imwrite(str(tmp_path / "templates" / "p" / "loot.png"), label("LOOT"))
+    images = tmp_path / "frames"
+    images.mkdir()
+    rng = np.random.default_rng(3)
+    for i in range(4):
+        bgr = noise_frame((240, 320), rng, LOOT=(30, 20 + i * 10))
+        cv2.imwrite(str(images / f"f{i}.png"), bgr)
+    (images / "broken.png").write_bytes(b"not a png")
+    vision = VisionConfig(templates_dir=tmp_path / "templates", active_pack="p")
+    vision.template_cache.dir = tmp_path / "cache"
+    return tmp_path, list_images(images), vision
+
+
+@pytest.mark.parametrize("workers,suffix", [(1, ".csv"), (2, ".jsonl")])
+def test_run_batch_streams_rows_in_order(setup, workers, suffix):
+    tmp_path, images, vision = setup
+    out = tmp_path / f"out{suffix}"
+    summary = run_batch(images, vision, out, workers)
+
+    if suffix == ".csv":
+        rows = list(csv.DictReader(out.open()))
+    else:
+        rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["image"] for r in rows] == [str(p) for p in images]
+    assert summary["images"] == 5 and summary["results"] == {"error": 1, "hit": 4}
+    assert rows[0]["result"] == "error"
+    assert [int(r["y"]) for r in rows[1:]] == [20, 30, 40, 50]
@@ -0,0 +1,31 @@
+import numpy as np
+
+from game_watcher.calibrate import pr_curve, recommend
+
+
+def test_pr_curve_matches_brute_force_sweep():
+    rng = np.random.default_rng(11)
+    scores = np.round(rng.random(500), 2)  # plenty of ties
+    correct = rng.random(500) < scores     # higher scores are more often right
+    positives = int(correct.sum()) + 7     # some hits were never scored high enough / wrong spot
+
+    curve = pr_curve(scores, correct, positives)
+    assert np.all(np.diff(curve.thresholds) < 0)
+    for t, p, r in zip(curve.thresholds, curve.precision, curve.recall, strict=True):
+        fired = scores >= t
+        tp = int((fired & correct).sum())
+        assert p == tp / fired.sum()
+        assert r == tp / positives
+
+
+def test_recommend_picks_max_recall_at_target_precision():
+    scores = np.array([0.95, 0.9, 0.85, 0.8, 0.7, 0.6])
+    correct = np.array([True, True, True, False, True, False])
+    curve = pr_curve(scores, correct, positives=4)
+
+    rec = recommend(curve, min_precision=1.0)
+    assert 0.8 < rec["threshold"] <= 0.85
+    assert rec["recall"] == 0.75 and rec["precision"] == 1.0
+
+    rec = recommend(curve, min_precision=0.8)
+    assert 0.6 < rec["threshold"] <= 0.7 and rec["recall"] == 1.0
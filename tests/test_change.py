@@ -0,0 +1,45 @@
+import numpy as np
+from conftest import noise_frame
+
+from game_watcher.vision.change import FrameChangeDetector
+
+
+def _frame() -> np.ndarray:
+    return noise_frame((480, 640), 3)
+
+
+def test_static_frame_is_skipped():
+    det = FrameChangeDetector(thumb_width=96, min_changed_fraction=0.01)
+    frame = _frame()
+    assert det.changed(frame)  # no reference yet
+    assert not det.changed(frame.copy())
+    assert not det.changed(frame.copy())
+    assert (det.processed, det.skipped) == (1, 2)
+
+
+def test_change_above_min_fraction_is_processed():
+    det = FrameChangeDetector(thumb_width=96, pixel_delta=12, min_changed_fraction=0.01)
+    frame = _frame()
+    det.changed(frame)
+
+    speck = frame.copy()
+    speck[200:204, 300:304] = 255  # ~1 thumbnail pixel: below 1 %
+    assert not det.changed(speck)
+
+    label = frame.copy()
+    label[100:200, 100:300] = (0, 255, 255)  # ~7 % of the thumbnail
+    assert det.changed(label) and not det.last_forced
+    # The processed frame is the new reference.
+    assert not det.changed(label.copy())
+
+
+def test_max_skip_forces_a_refresh():
+    det = FrameChangeDetector(min_changed_fraction=0.01, max_skip=2)
+    frame = _frame()
+    det.changed(frame)
+
+    results = [det.changed(frame) for _ in range(6)]
+    assert results == [False, False, True, False, False, True]
+    assert det.last_forced
+    assert not det.changed(frame) and not det.last_forced
+    assert (det.processed, det.skipped) == (3, 5)
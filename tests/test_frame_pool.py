@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+import pytest
+
+from game_watcher.capture.base import FrameBufferPool, convert_bgra
+
+
+@pytest.mark.parametrize("output,code", [("bgr", cv2.COLOR_BGRA2BGR),
+                                         ("gray", cv2.COLOR_BGRA2GRAY)])
+def test_convert_bgra_matches_cvtcolor(output, code):
+    rng = np.random.default_rng(0)
+    bgra = rng.integers(0, 255, (45, 70, 4), dtype=np.uint8)
+    pool = FrameBufferPool(2)
+
+    out = convert_bgra(bgra, output, pool)
+
+    ref = cv2.cvtColor(bgra, code)
+    assert out.dtype == np.uint8 and out.shape == ref.shape
+    assert np.array_equal(out, ref)
+
+
+def test_pool_keeps_one_ring_per_shape():
+    pool = FrameBufferPool(2, max_shapes=2)
+    a = [pool.acquire((10, 20, 3)), pool.acquire((30, 40, 3))]
+    b = [pool.acquire((10, 20, 3)), pool.acquire((30, 40, 3))]
+    # Alternating windows of different sizes reuse their rings, round-robin.
+    c = [pool.acquire((10, 20, 3)), pool.acquire((30, 40, 3))]
+    assert all(x is not y for x, y in zip(a, b, strict=True))
+    assert all(x is y for x, y in zip(a, c, strict=True))
+
+    pool.acquire((5, 5))  # third shape evicts the least recently used one
+    assert pool.acquire((30, 40, 3)) is b[1]
+    assert pool.acquire((10, 20, 3)) is not a[0]
@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from conftest import gray_edges, label, noise_frame
+
+from game_watcher.vision.fft_matcher import FFTMatcher
+from game_watcher.vision.matcher import TemplateMatcher, nms
+from game_watcher.vision.preprocess import edges_from_gray, to_gray
+from game_watcher.vision.templates import LoadedTemplate, TemplateBank, build_variants
+
+SCALES = (0.95, 1.0, 1.05)
+
+
+def _bank(*texts: str) -> TemplateBank:
+    out = []
+    for i, text in enumerate(texts):
+        gray, edges = gray_edges(label(text))
+        variants = build_variants(gray, edges, SCALES)
+        out.append(LoadedTemplate(f"t{i}", Path(f"t{i}.png"), gray, edges, variants))
+    return TemplateBank(tuple(out), SCALES)
+
+
+def _frame(text: str, at: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    return gray_edges(noise_frame((360, 640), 7, **{text: at}))
+
+
+@pytest.mark.parametrize("mode", ["gray", "edges"])
+def test_pyramid_finds_same_location_as_full(mode):
+    bank = _bank("FARM", "LOOT")
+    gray, edges = _frame("LOOT", (401, 213))
+
+    full = TemplateMatcher(bank, "TM_CCOEFF_NORMED").match_best(gray, edges, mode)
+    pyr = TemplateMatcher(bank, "TM_CCOEFF_NORMED", search="pyramid").match_best(gray, edges, mode)
+
+    assert full.template_name == pyr.template_name == "t1"
+    assert pyr.top_left == full.top_left == (401, 213)
+    assert pyr.score == pytest.approx(full.score, abs=1e-4)
+
+
+def test_pyramid_falls_back_to_full_search_for_small_templates():
+    # 40 px tall labels do not survive a 16x downsample: the coarse pass is skipped.
+    bank = _bank("FARM", "LOOT")
+    gray, edges = _frame("LOOT", (401, 213))
+    pyr = TemplateMatcher(bank, "TM_CCOEFF_NORMED", search="pyramid", pyramid_levels=4)
+    assert pyr._state.coarse == {}
+
+    best = pyr.match_best(gray, edges, "gray")
+    assert (best.template_name, best.top_left) == ("t1", (401, 213))
+
+
+def test_unknown_search_strategy_is_rejected():
+    with pytest.raises(ValueError, match="search strategy"):
+        TemplateMatcher(_bank("FARM"), "TM_CCOEFF_NORMED", search="coarse")
+
+
+@pytest.mark.parametrize("search", ["full", "pyramid"])
+def test_pooled_matcher_returns_serial_result(search):
+    # t0 and t2 are the same image: the tie must resolve to t0 either way.
+    bank = _bank("LOOT", "FARM", "LOOT")
+    gray, edges = _frame("LOOT", (401, 213))
+    serial = TemplateMatcher(bank, "TM_CCOEFF_NORMED", search=search)
+    pooled = TemplateMatcher(bank, "TM_CCOEFF_NORMED", search=search, workers=4)
+    try:
+        for mode in ("gray", "edges"):
+            want = serial.match_best(gray, edges, mode)
+            assert pooled.match_best(gray, edges, mode) == want
+            assert want.template_name == "t0"
+            want_all = serial.match_all(gray, edges, mode, 0.5)
+            assert pooled.match_all(gray, edges, mode, 0.5) == want_all
+    finally:
+        pooled.close()
+    assert pooled._pool is None
+    pooled.close()  # idempotent
+
+
+@pytest.mark.parametrize("mode", ["gray", "edges"])
+@pytest.mark.parametrize("method", ["TM_CCOEFF_NORMED", "TM_CCORR_NORMED"])
+def test_fft_scores_agree_with_opencv(mode, method):
+    bank = _bank("FARM", "LOOT")
+    gray, edges = _frame("FARM", (57, 290))
+    src = edges if mode == "edges" else gray
+
+    fft = FFTMatcher(bank, method)
+    ctx = fft._prepare_frame(src)
+    for t in bank:
+        for v in t.variants:
+            templ = v.image(mode)
+            ref = fft._match_full(src, templ, t.name)
+            got = fft._match_prepared(ctx, templ, (t.name, v.scale, mode), t.name)
+            assert got.score == pytest.approx(ref.score, abs=1e-3)
+            if ref.score > 0.8:
+                assert got.top_left == ref.top_left
+
+    best = fft.match_best(gray, edges, mode)
+    assert best.template_name == "t0"
+    assert best.top_left == (57, 290)
+
+
+def test_fft_rejects_unsupported_method():
+    with pytest.raises(ValueError):
+        FFTMatcher(_bank("FARM"), "TM_SQDIFF")
+
+
+@pytest.mark.parametrize("matcher_cls", [TemplateMatcher, FFTMatcher])
+def test_match_all_returns_each_instance_once(matcher_cls):
+    bank = _bank("FARM", "LOOT")
+    gray, _ = _frame("LOOT", (401, 213))
+    gray[40:80, 30:190] = to_gray(label("LOOT"))
+    gray[300:340, 60:220] = to_gray(label("FARM"))
+    edges = edges_from_gray(gray, 60, 160, 3)
+
+    found = matcher_cls(bank, "TM_CCOEFF_NORMED").match_all(gray, edges, "gray", 0.8)
+
+    # Three scales per template hit each spot; NMS must merge them.
+    assert sorted((m.template_name, m.top_left) for m in found) == [
+        ("t0", (60, 300)), ("t1", (30, 40)), ("t1", (401, 213)),
+    ]
+    assert [m.score for m in found] == sorted((m.score for m in found), reverse=True)
+    assert found[0].score == pytest.approx(1.0, abs=1e-3)
+
+
+def test_nms_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60], [2, 0, 12, 10]])
+    scores = np.array([0.8, 0.9, 0.7, 0.85])
+    assert nms(boxes, scores, 0.3) == [1, 2]
+    assert nms(boxes, scores, 0.95) == [1, 3, 0, 2]
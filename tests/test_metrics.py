@@ -0,0 +1,23 @@
+from game_watcher.metrics import MetricsRegistry
+
+
+def test_disabled_registry_records_nothing():
+    reg = MetricsRegistry(enabled=False)
+    with reg.timer("match_seconds"):
+        pass
+    reg.inc("frames_total")
+    assert reg.snapshot() == {"counters": {}, "gauges": {}, "histograms": {}}
+
+
+def test_prometheus_rendering():
+    reg = MetricsRegistry(enabled=True)
+    reg.inc("frames_total", result="processed")
+    reg.inc("frames_total", 2, result="processed")
+    reg.observe("match_seconds", 0.003)
+    reg.observe("match_seconds", 7.0)
+
+    text = reg.render_prometheus()
+    assert 'frames_total{result="processed"} 3' in text
+    assert 'match_seconds_bucket{le="0.005"} 1' in text
+    assert 'match_seconds_bucket{le="+Inf"} 2' in text
+    assert "match_seconds_count 2" in text
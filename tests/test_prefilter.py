@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import numpy as np
+from conftest import gray_edges, label, noise_frame
+
+from game_watcher.vision.matcher import TemplateMatcher
+from game_watcher.vision.prefilter import CandidatePrefilter
+from game_watcher.vision.templates import LoadedTemplate, TemplateBank, build_variants
+
+YELLOW_HSV = ([25, 200, 200], [35, 255, 255])
+
+
+def _frame(at: tuple[int, int] | None) -> np.ndarray:
+    return noise_frame((360, 640), 3, **({"LOOT": at} if at is not None else {}))
+
+
+def _prefilter(**kw) -> CandidatePrefilter:
+    lo, hi = YELLOW_HSV
+    return CandidatePrefilter((160, 40), color_lower=lo, color_upper=hi, **kw)
+
+
+def test_regions_cover_label_and_match_agrees_with_full_search():
+    gray, edges = gray_edges(label("LOOT"))
+    bank = TemplateBank(
+        (LoadedTemplate("t0", Path("t0.png"), gray, edges, build_variants(gray, edges, (1.0,))),),
+        (1.0,),
+    )
+    matcher = TemplateMatcher(bank, "TM_CCOEFF_NORMED")
+
+    frame = _frame((401, 213))
+    gray, edges = gray_edges(frame)
+    pf = _prefilter()
+    regions = pf.regions(frame, edges)
+
+    assert regions
+    assert any(x0 <= 401 and y0 <= 213 and x1 >= 561 and y1 >= 253 for x0, y0, x1, y1 in regions)
+    assert pf.skipped_fraction > 0.5
+
+    full = matcher.match_best(gray, edges, "edges")
+    pre = matcher.match_regions(gray, edges, "edges", regions)
+    assert pre.top_left == full.top_left == (401, 213)
+    assert pre.score == full.score
+
+
+def test_no_candidates_and_coverage_fallback():
+    frame = _frame(None)
+    _, edges = gray_edges(frame)
+    assert _prefilter().regions(frame, edges) == []
+
+    # Everything passes the edge-only test at density 0 -> too much coverage -> full search.
+    pf = CandidatePrefilter((160, 40), min_edge_density=1e-9, max_coverage=0.1)
+    assert pf.regions(frame, edges) is None
+    assert pf.fallbacks == 1 and pf.skipped_fraction == 0.0
@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+
+from game_watcher.vision.preprocess import TiledPreprocessor, edges_from_gray, to_gray
+
+
+def _scene(rng, h=250, w=330) -> np.ndarray:
+    bgr = np.full((h, w, 3), 40, np.uint8)
+    for _ in range(40):
+        p1 = tuple(int(v) for v in rng.integers(0, (w, h)))
+        p2 = tuple(int(v) for v in rng.integers(0, (w, h)))
+        color = tuple(int(v) for v in rng.integers(0, 255, 3))
+        cv2.line(bgr, p1, p2, color, int(rng.integers(1, 4)))
+    return bgr
+
+
+@pytest.mark.parametrize("blur", [0, 3, 4])
+def test_tiled_edges_match_full_recompute(blur):
+    rng = np.random.default_rng(blur)
+    pre = TiledPreprocessor(60, 160, blur, tile_px=32)
+    frame = _scene(rng)
+    for i in range(25):
+        frame = frame.copy()
+        # Small local edits: a line (long chains crossing tiles) or a noisy patch.
+        if i % 3:
+            p1 = tuple(int(v) for v in rng.integers(0, (330, 250)))
+            p2 = tuple(int(v) for v in rng.integers(0, (330, 250)))
+            cv2.line(frame, p1, p2, tuple(int(v) for v in rng.integers(0, 255, 3)), 2)
+        else:
+            x, y = (int(v) for v in rng.integers(0, (300, 220)))
+            frame[y:y + 30, x:x + 30] = rng.integers(0, 255, (30, 30, 3), dtype=np.uint8)
+        if i == 12:
+            frame = _scene(rng)  # full change -> one-shot full pass
+
+        gray, edges = pre.process(frame)
+        assert np.array_equal(gray, to_gray(frame))
+        assert np.array_equal(edges, edges_from_gray(to_gray(frame), 60, 160, blur)), i
+
+    assert 0.3 < pre.reused_fraction < 1.0
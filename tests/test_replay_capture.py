@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+from game_watcher.capture import Region, create_capture_backend
+from game_watcher.config_model import ReplayConfig
+
+REGION = Region(left=0, top=0, width=0, height=0)
+
+
+def _write_frames(path, n):
+    for i in range(n):
+        cv2.imwrite(str(path / f"frame_{i:03d}.png"), np.full((24, 32, 3), i * 10, np.uint8))
+
+
+def test_replay_streams_frames_in_order_then_ends(tmp_path):
+    _write_frames(tmp_path, 3)
+    cap = create_capture_backend("replay", ReplayConfig(path=tmp_path, prefetch=2))
+    try:
+        values = [int(cap.grab(REGION)[0, 0, 0]) for _ in range(3)]
+        assert values == [0, 10, 20]
+        assert cap.grab(REGION) is None
+        assert cap.exhausted
+    finally:
+        cap.close()
+
+
+def test_replay_loops(tmp_path):
+    _write_frames(tmp_path, 2)
+    cap = create_capture_backend("replay", ReplayConfig(path=tmp_path, loop=True))
+    try:
+        values = [int(cap.grab(REGION)[0, 0, 0]) for _ in range(5)]
+        assert values == [0, 10, 0, 10, 0]
+    finally:
+        cap.close()
@@ -0,0 +1,104 @@
+import logging
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from game_watcher.config_model import load_config
+from game_watcher.debug.ring import FrameRing
+from game_watcher.debug.writer import ArtifactWriter
+from game_watcher.runloop import LatestFrameQueue, RunLoop
+from game_watcher.vision.trigger_gate import TriggerGate, Vision
+
+
+def test_latest_frame_queue_drops_oldest():
+    q = LatestFrameQueue(maxsize=2)
+    for i in range(5):
+        q.put(i)
+    assert q.dropped == 3
+    assert q.get(timeout=0) == 3
+    assert q.get(timeout=0) == 4
+    assert q.get(timeout=0) is None
+
+
+def test_latest_frame_queue_close_unblocks_get():
+    q = LatestFrameQueue(maxsize=1)
+    q.put("a")
+    q.close()
+    assert q.get(timeout=1.0) == "a"
+    assert q.get(timeout=1.0) is None
+    assert q.closed
+
+
+class _SlowFirstMatcher:
+    """Stands in for the matcher: frame 0 takes 0.3 s, the rest return at once."""
+
+    def match_best(self, gray, edges, mode):
+        if int(gray[0, 0]) == 0:
+            time.sleep(0.3)
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize("workers,queue_size", [(2, 4), (1, 1)])
+def test_replay_run_decides_in_capture_order(tmp_path, monkeypatch, workers, queue_size):
+    for i in range(10):
+        value = 10 + i * 20 if i else 0
+        cv2.imwrite(str(tmp_path / f"frame_{i:03d}.png"), np.full((24, 32, 3), value, np.uint8))
+    cfg = load_config(Path("config/default.yaml"))
+    cfg.capture.backend = "replay"
+    cfg.capture.replay.path = tmp_path
+    cfg.app.scan_interval_sec = 0.04
+    cfg.app.adaptive.enabled = False
+    cfg.app.pipeline.vision_workers = workers
+    cfg.app.pipeline.queue_size = queue_size
+    cfg.app.pipeline.stats_interval_s = 0
+    cfg.vision.change.enabled = False
+    cfg.vision.match.max_instances = 1
+    order = []
+    monkeypatch.setattr("game_watcher.runloop.decide",
+                        lambda cfg, vision, img, *a: order.append(int(img[0, 0, 0])))
+    loop = RunLoop(cfg, logging.getLogger(), Vision(matcher=_SlowFirstMatcher(),
+                                                    gate=TriggerGate(1, 0.0)))
+    assert loop.run() == 0
+
+    assert order == sorted(order) and loop.decided == len(order)
+    assert loop.captured == 10
+    assert loop.decided + loop.stale + loop.frames.dropped == loop.captured
+    if workers == 2:
+        # Frame 0 finishes after later frames were decided: stale, nothing dropped.
+        assert (loop.stale, loop.frames.dropped) == (1, 0) and 0 not in order
+    else:
+        # One busy worker: the 1-slot queue keeps only the newest frame.
+        assert loop.stale == 0 and loop.frames.dropped > 0 and order[0] == 0
+
+
+def test_touching_the_dump_file_writes_the_ring(tmp_path):
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    for i in range(3):
+        cv2.imwrite(str(frames / f"frame_{i:03d}.png"), np.full((24, 32, 3), i, np.uint8))
+    cfg = load_config(Path("config/default.yaml"))
+    cfg.capture.backend = "replay"
+    cfg.capture.replay.path = frames
+    cfg.app.scan_interval_sec = 0.01
+    cfg.app.adaptive.enabled = False
+    cfg.app.pipeline.stats_interval_s = 0
+    cfg.vision.change.enabled = False
+    cfg.vision.match.max_instances = 1
+    cfg.debug.ring.enabled = True
+    cfg.debug.ring.flush_on = "manual"
+    cfg.debug.ring.dump_request_file = tmp_path / "dump_ring"
+    cfg.debug.ring.dump_request_file.touch()
+    out = tmp_path / "out"
+    vision = Vision(matcher=_SlowFirstMatcher(), gate=TriggerGate(1, 0.0),
+                    artifacts=ArtifactWriter(out), ring=FrameRing(budget_mb=1))
+    assert RunLoop(cfg, logging.getLogger(), vision).run() == 0
+
+    (dump,) = out.iterdir()
+    assert dump.name.startswith("ring_manual") and len(list(dump.iterdir())) == 1
+    assert not cfg.debug.ring.dump_request_file.exists()
@@ -0,0 +1,55 @@
+from game_watcher.scheduler import AdaptiveScheduler, WindowScheduler
+
+
+def _run(s: WindowScheduler, targets, ticks: int, active=()) -> list:
+    picked = []
+    for i in range(ticks):
+        key = s.pick(targets, now=float(i))
+        s.report(key, key in active)
+        picked.append(key)
+    return picked
+
+
+def test_round_robin_visits_every_window_in_turn():
+    s = WindowScheduler("round_robin")
+    targets = [("a", 0), ("b", 0), ("c", 0)]
+    assert _run(s, targets, 6) == ["a", "b", "c", "a", "b", "c"]
+
+    # A new window is scanned first, a vanished one is forgotten.
+    targets = [("a", 0), ("c", 0), ("d", 0)]
+    assert s.pick(targets, now=6.0) == "d"
+
+
+def test_priority_favors_rank_and_active_windows():
+    targets = [("main", 0), ("alt", 1)]
+    picked = _run(WindowScheduler("priority"), targets, 30)
+    assert picked.count("main") > picked.count("alt") > 0
+
+    boosted = _run(WindowScheduler("priority", boost=4.0), targets, 30, active={"alt"})
+    assert boosted.count("alt") > picked.count("alt")
+
+
+def test_adaptive_interval_speeds_up_and_backs_off_within_bounds():
+    s = AdaptiveScheduler(3.5, min_s=0.5, max_s=10.0, speedup=0.5, backoff=2.0, idle_ticks=2)
+    assert s.observe("changed") == 3.5  # already at base
+    assert s.observe("near") == 0.5
+    assert s.observe("idle") == 0.5  # not idle long enough yet
+    assert s.observe("changed") == 1.0  # back toward base; idle count kept
+    assert s.observe("idle") == 2.0
+    for _ in range(10):
+        s.observe("idle")
+    assert s.interval == 10.0
+    assert s.observe("changed") == 5.0
+    assert s.observe("hit") == 0.5
+
+
+def test_adaptive_constant_changes_settle_at_base_interval():
+    # An animated game: the change detector fires on every frame.
+    for start in ("hit", "idle"):
+        s = AdaptiveScheduler(3.5, min_s=0.5, max_s=10.0, speedup=0.7, backoff=1.25,
+                              idle_ticks=3)
+        for _ in range(20):
+            s.observe(start)
+        for _ in range(30):
+            s.observe("changed")
+        assert s.interval == 3.5
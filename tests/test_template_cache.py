@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+from conftest import label
+
+from game_watcher.vision.template_cache import load_templates_cached
+from game_watcher.vision.templates import load_templates
+
+
+def _write_pack(pack, *texts):
+    pack.mkdir(parents=True, exist_ok=True)
+    for i, text in enumerate(texts):
+        cv2.imwrite(str(pack / f"t{i}.png"), label(text))
+
+
+def test_cached_pack_matches_fresh_load_and_rebuilds_when_stale(tmp_path):
+    pack, cache = tmp_path / "pack", tmp_path / "cache"
+    _write_pack(pack, "FARM", "LOOT")
+    scales = [0.95, 1.0, 1.05]
+
+    first = load_templates_cached(pack, 60, 160, 3, scales, cache)
+    assert (cache / "pack.npz").exists()
+    mtime = (cache / "pack.npz").stat().st_mtime_ns
+
+    cached = load_templates_cached(pack, 60, 160, 3, scales, cache)
+    fresh = load_templates(pack, 60, 160, 3, scales)
+    assert (cache / "pack.npz").stat().st_mtime_ns == mtime
+    assert cached.scales == fresh.scales == first.scales
+    for a, b in zip(cached, fresh, strict=True):
+        assert a.name == b.name
+        assert np.array_equal(a.gray, b.gray) and np.array_equal(a.edges, b.edges)
+        for va, vb in zip(a.variants, b.variants, strict=True):
+            assert va.scale == vb.scale
+            assert np.array_equal(va.gray, vb.gray) and np.array_equal(va.edges, vb.edges)
+
+    # Different Canny params or a changed image must not reuse the old cache.
+    other = load_templates_cached(pack, 30, 90, 3, scales, cache)
+    ref = load_templates(pack, 30, 90, 3, scales)
+    assert np.array_equal(other.templates[0].edges, ref.templates[0].edges)
+
+    _write_pack(pack, "BOSS", "LOOT")
+    changed = load_templates_cached(pack, 30, 90, 3, scales, cache)
+    ref = load_templates(pack, 30, 90, 3, scales)
+    assert np.array_equal(changed.templates[0].gray, ref.templates[0].gray)
@@ -0,0 +1,88 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from conftest import gray_edges, label, noise_frame
+
+from game_watcher.config_model import VisionConfig
+from game_watcher.vision.fft_matcher import FFTMatcher
+from game_watcher.vision.matcher import TemplateMatcher
+from game_watcher.vision.template_watch import TemplateBankWatcher
+from game_watcher.vision.templates import load_templates
+
+
+def _write(path, text: str, bump_ns: int = 0) -> None:
+    cv2.imwrite(str(path), label(text))
+    if bump_ns:  # coarse-mtime filesystems: make the edit visible to the stat check
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump_ns))
+
+
+def _frame(text: str) -> tuple[np.ndarray, np.ndarray]:
+    return gray_edges(noise_frame((240, 480), 5, **{text: (200, 150)}))
+
+
+@pytest.mark.parametrize("cls", [TemplateMatcher, FFTMatcher])
+def test_edit_add_remove_swap_only_changed_entries(tmp_path, cls):
+    pack = tmp_path / "pack"
+    pack.mkdir()
+    _write(pack / "a.png", "FARM")
+    _write(pack / "b.png", "LOOT")
+    cfg = VisionConfig(templates_dir=tmp_path, active_pack="pack",
+                       template_cache={"enabled": False})
+    bank = load_templates(pack, 60, 160, 3, [0.9, 1.0])
+    matcher = cls(bank, "TM_CCOEFF_NORMED", search="pyramid", pyramid_levels=1)
+    swaps = []
+    watcher = TemplateBankWatcher(pack, cfg, matcher, on_swap=lambda b, n: swaps.append(n))
+    old_a, old_b = matcher.bank.templates
+    gray, edges = _frame("GOLD")
+    matcher.match_best(gray, edges, "gray")  # warm the per-template caches
+
+    assert watcher.poll() == set()
+
+    _write(pack / "b.png", "GOLD", bump_ns=10_000_000)
+    _write(pack / "c.png", "WOOD")
+    assert watcher.poll() == {"b", "c"}
+    a, b, c = matcher.bank.templates
+    assert a is old_a and b is not old_b and c.name == "c"
+    assert len(b.variants) == 2 and matcher.bank.scales == (0.9, 1.0)
+    assert matcher._state.coarse[("a", 1.0, "gray")] is not None
+
+    best = matcher.match_best(gray, edges, "gray")
+    assert best.template_name == "b" and best.top_left == (200, 150)
+    assert best.score > 0.99
+
+    (pack / "a.png").unlink()
+    assert watcher.poll() == {"a"}
+    assert [t.name for t in matcher.bank] == ["b", "c"]
+    assert swaps == [{"b", "c"}, {"a"}] and watcher.reloads == 2
+
+
+def test_unreadable_edit_keeps_old_entry(tmp_path):
+    pack = tmp_path / "pack"
+    pack.mkdir()
+    _write(pack / "a.png", "FARM")
+    cfg = VisionConfig(templates_dir=tmp_path, active_pack="pack",
+                       template_cache={"enabled": False})
+    matcher = TemplateMatcher(load_templates(pack, 60, 160, 3), "TM_CCOEFF_NORMED")
+    watcher = TemplateBankWatcher(pack, cfg, matcher)
+    old = matcher.bank.templates[0]
+
+    (pack / "a.png").write_bytes(b"\x89PNG half-written")
+    assert watcher.poll() == set()
+    assert matcher.bank.templates[0] is old
+
+    _write(pack / "a.png", "GOLD", bump_ns=10_000_000)
+    assert watcher.poll() == {"a"}
+
+
+def test_bank_from_another_dir_with_same_files_is_not_reloaded(tmp_path):
+    # What a compiled-cache hit looks like: same images, paths of the dir that built it.
+    for d in ("pack", "other"):
+        (tmp_path / d).mkdir()
+        _write(tmp_path / d / "a.png", "FARM")
+    cfg = VisionConfig(templates_dir=tmp_path, active_pack="pack",
+                       template_cache={"enabled": False})
+    matcher = TemplateMatcher(load_templates(tmp_path / "other", 60, 160, 3), "TM_CCOEFF_NORMED")
+    assert TemplateBankWatcher(tmp_path / "pack", cfg, matcher).poll() == set()
@@ -0,0 +1,22 @@
+import cv2
+from conftest import label
+
+from game_watcher.vision.templates import load_templates
+
+
+def test_one_variant_per_scale_and_nbytes_counts_shared_buffers_once(tmp_path):
+    for i, text in enumerate(("FARM", "LOOT")):
+        cv2.imwrite(str(tmp_path / f"t{i}.png"), label(text))
+
+    bank = load_templates(tmp_path, 60, 160, 3, [0.5, 1.0, 2.0, 1.0, -1.0])
+
+    assert bank.scales == (0.5, 1.0, 2.0)  # duplicates and non-positive scales dropped
+    for t in bank:
+        assert [v.scale for v in t.variants] == [0.5, 1.0, 2.0]
+        assert [v.gray.shape for v in t.variants] == [(20, 80), (40, 160), (80, 320)]
+        assert [v.edges.shape for v in t.variants] == [(20, 80), (40, 160), (80, 320)]
+        assert t.variants[1].gray is t.gray and t.variants[1].edges is t.edges
+
+    # Per template: gray + edges at 0.5x, 1.0x (shared with the base images) and 2.0x.
+    per_template = 2 * (20 * 80 + 40 * 160 + 80 * 320)
+    assert bank.nbytes == 2 * per_template
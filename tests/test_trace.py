@@ -0,0 +1,83 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+import pytest
+
+from game_watcher.config_model import load_config
+from game_watcher.trace import Span, TraceWriter, summarize
+from game_watcher.vision.matcher import MatchResult
+from game_watcher.vision.trigger_gate import TriggerGate, Vision, decide
+
+
+def _span(frame_id: int, t0: float, input_at: float | None = 0.020) -> Span:
+    span = Span(frame_id)
+    for name, dt in [("grab", 0.0), ("captured", 0.004), ("dequeued", 0.005),
+                     ("preprocessed", 0.007), ("matched", 0.015), ("gate", 0.0152)]:
+        span.mark(name, t0 + dt)
+    if input_at is not None:
+        span.mark("input", t0 + input_at)
+    return span
+
+
+def test_span_stages_and_total():
+    ms = _span(1, 10.0).stages_ms()
+    assert list(ms) == ["capture", "queue", "preprocess", "match", "gate", "input"]  # no streak
+    assert ms["capture"] == pytest.approx(4.0)
+    assert ms["match"] == pytest.approx(8.0)
+    assert _span(1, 10.0).total_ms() == pytest.approx(20.0)
+    # Nothing sent (no action runner): the span ends at the gate.
+    assert _span(2, 10.0, input_at=None).total_ms() == pytest.approx(15.2)
+    assert Span(3).total_ms() is None
+
+
+def test_writer_and_summary(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    w = TraceWriter(path)
+    for i in range(10):
+        w.write(_span(i, float(i)), win="", tpl="t0", sc=0.9)
+    w.close()
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"id": 99, "ms": {"capt')  # torn last line
+
+    first = json.loads(path.read_text().splitlines()[0])
+    assert first["id"] == 0 and first["tpl"] == "t0"
+
+    s = summarize(path)
+    assert s["records"] == 10 and s["unreadable"] == 1
+    assert s["total"]["p50_ms"] == pytest.approx(20.0)
+    assert s["stages"]["input"]["n"] == 10
+
+
+def test_gate_reports_frame_that_opened_the_streak():
+    gate = TriggerGate(confirm_hits=3, min_interval_s=0.0)
+    fired = [gate.observe(hit, i) for i, hit in enumerate([True, False, True, True, True], 1)]
+    assert fired == [False, False, False, False, True]
+    assert gate.fired_from == 3
+
+
+def test_trigger_span_starts_when_the_label_appeared(tmp_path):
+    cfg = load_config(Path("config/default.yaml"))
+    cfg.vision.match.confirm_hits = 3
+    cfg.vision.match.min_trigger_interval_s = 0.0
+    cfg.debug.ring.flush_on = "manual"
+    path = tmp_path / "trace.jsonl"
+    vision = Vision(matcher=None, gate=TriggerGate(3, 0.0), trace=TraceWriter(path))
+    hit = MatchResult("t0", 0.99, (10, 10), (20, 10), (20, 15))
+
+    # Frames 1..3 grabbed 0.5 s apart (decide marks "gate" with the real clock).
+    t0 = time.perf_counter() - 1.0
+    fired = []
+    for i in range(1, 4):
+        span = Span(i)
+        span.mark("grab", t0 + 0.5 * (i - 1))
+        fired.append(decide(cfg, vision, None, hit, False, 0, 0, logging.getLogger(), (), span))
+    vision.trace.close()
+
+    assert fired == [False, False, True]
+    rec = json.loads(path.read_text())
+    assert rec["id"] == 3 and rec["streak_from"] == 1
+    assert rec["ms"]["appear"] == pytest.approx(1000.0)
+    assert rec["total_ms"] >= 1000.0
+    assert summarize(path)["stages"]["appear"]["n"] == 1
@@ -0,0 +1,93 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from conftest import gray_edges, label, noise_frame
+
+from game_watcher.vision.matcher import TemplateMatcher
+from game_watcher.vision.templates import LoadedTemplate, TemplateBank, build_variants
+from game_watcher.vision.tracking import RoiTracker
+
+
+def _tracker(*texts: str, threshold: float = 0.95) -> RoiTracker:
+    out = []
+    for text in texts:
+        gray, edges = gray_edges(label(text))
+        out.append(LoadedTemplate(text.lower(), Path(f"{text}.png"), gray, edges,
+                                  build_variants(gray, edges, (1.0,))))
+    matcher = TemplateMatcher(TemplateBank(tuple(out), (1.0,)), "TM_CCOEFF_NORMED")
+    return RoiTracker(matcher, pad_px=16, threshold=threshold, log_every=0)
+
+
+def _frame(**labels: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    return gray_edges(noise_frame((360, 640), 11, **labels))
+
+
+def test_roi_hit_is_reused_without_full_scan():
+    tr = _tracker("FARM")
+    frame = _frame(FARM=(50, 50))
+    first = tr.match_best(*frame, "gray")
+    second = tr.match_best(*frame, "gray")
+
+    assert first.top_left == second.top_left == (50, 50)
+    assert second.score == pytest.approx(first.score)
+    assert (tr.full_scans, tr.roi_hits, tr.roi_misses, tr.rest_scans) == (1, 1, 0, 0)
+
+
+def test_roi_miss_falls_back_to_full_scan_and_forgets():
+    tr = _tracker("FARM")
+    tr.match_best(*_frame(FARM=(50, 50)), "gray")
+
+    moved = tr.match_best(*_frame(FARM=(300, 200)), "gray")
+    assert moved.top_left == (300, 200)
+    assert (tr.full_scans, tr.roi_hits, tr.roi_misses) == (2, 0, 1)
+
+    # Nothing on screen: the stale ROI is dropped, near-misses are not remembered.
+    tr.match_best(*_frame(), "gray")
+    tr.match_best(*_frame(), "gray")
+    assert tr._last == {}
+    assert (tr.full_scans, tr.roi_misses) == (4, 2)
+
+
+@pytest.mark.parametrize("threshold", [0.9, 0.95])
+def test_other_template_appearing_elsewhere_wins(threshold):
+    tr = _tracker("FARM", "LOOT", threshold=threshold)
+    assert tr.match_best(*_frame(FARM=(50, 50)), "gray").template_name == "farm"
+
+    # The tracked spot now holds a near-identical label; a perfect LOOT shows up elsewhere.
+    best = tr.match_best(*_frame(FARN=(50, 50), LOOT=(300, 200)), "gray")
+    plain = tr.matcher.match_best(*_frame(FARN=(50, 50), LOOT=(300, 200)), "gray")
+    assert best.template_name == plain.template_name == "loot"
+    assert best.top_left == (300, 200) and best.score == pytest.approx(plain.score)
+    assert "loot" in tr._last
+    # FARN scores ~0.92 in the FARM ROI: a hit at 0.9 (only LOOT is searched further),
+    # a miss at 0.95 (full scan).
+    assert (tr.rest_scans, tr.full_scans) == ((1, 1) if threshold == 0.9 else (0, 2))
+
+
+def test_shared_tracker_survives_two_workers():
+    # Vision workers share the per-window tracker; misses race to forget the same ROI.
+    tr = _tracker("FARM", "LOOT")
+    frames = [_frame(FARM=(50, 50), LOOT=(300, 200)), _frame()]
+    errors = []
+    step = threading.Barrier(2)
+
+    def work():
+        try:
+            for i in range(40):
+                step.wait()  # both workers on the same frame: both miss the same ROIs
+                best = tr.match_best(*frames[i % 2], "gray")
+                assert (best.score >= 0.95) == (i % 2 == 0)
+        except Exception as e:
+            errors.append(e)
+            step.abort()
+
+    workers = [threading.Thread(target=work) for _ in range(2)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert errors == []
+    assert tr.frames == 80 and tr.roi_hits + tr.full_scans == 80
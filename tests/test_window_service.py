@@ -0,0 +1,55 @@
+from game_watcher.windowing import FakeWindowBackend, WindowService
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_lookup_is_cached_until_window_moves_or_goes_away():
+    fake = FakeWindowBackend()
+    fake.add(0x10, "Notepad")
+    fake.add(0x20, "METIN2", (100, 50, 916, 689))
+    clock = Clock()
+    svc = WindowService(fake, ["^METIN2$"], clock=clock)
+
+    for _ in range(50):
+        assert svc.targets() == [(0x20, 0)]
+        info = svc.client(0x20)
+    assert (info.client_left, info.client_top, info.client_width) == (108, 81, 800)
+    assert fake.calls["list_windows"] == 1
+    assert fake.calls["client_info"] == 1
+
+    fake.move(0x20, (300, 50, 1116, 689))
+    assert svc.client(0x20).client_left == 308
+    assert fake.calls["client_info"] == 2
+
+    # Gone: re-enumerate, then find the relaunched client.
+    fake.close(0x20)
+    assert svc.targets() == []
+    fake.add(0x30, "METIN2")
+    assert svc.targets() == []  # next scan only after rescan_s
+    clock.t += 5
+    assert svc.targets() == [(0x30, 0)]
+    assert fake.calls["list_windows"] == 3
+
+
+def test_match_all_ranks_and_rescans_for_new_windows():
+    fake = FakeWindowBackend()
+    fake.add(1, "METIN2 - alt")
+    fake.add(2, "METIN2 - main")
+    clock = Clock()
+    svc = WindowService(fake, ["main$", "^METIN2"], match_all=True, rescan_s=2.0, clock=clock)
+
+    assert svc.targets() == [(2, 0), (1, 1)]
+    fake.add(3, "METIN2 - third")
+    assert svc.targets() == [(2, 0), (1, 1)]
+    clock.t = 2.0
+    assert svc.targets() == [(2, 0), (1, 1), (3, 1)]
+
+    # A renamed window no longer matches its regex.
+    fake.windows[2].title = "Loading..."
+    assert svc.targets() == [(1, 1), (3, 1)]